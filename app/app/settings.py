@@ -26,6 +26,9 @@ SECRET_KEY = os.environ.get("SECRET_KEY", "changeme")
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = bool(int(os.environ.get("DEBUG", 0)))
 
+# Serve the read-only recipe endpoints with async views (enabled under ASGI)
+ASYNC_VIEWS = bool(int(os.environ.get("ASYNC_VIEWS", 0)))
+
 ALLOWED_HOSTS = []
 ALLOWED_HOSTS.extend(
     filter(
@@ -54,6 +57,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "core.middleware.MetricsMiddleware",
+    "core.middleware.RequestTimingMiddleware",
+    "core.middleware.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -147,11 +153,139 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 AUTH_USER_MODEL = "core.User"
 
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Rate limit buckets. Point THROTTLE_CACHE_DIR to tmpfs so that all workers
+    # share them. Writes don't scan or cull the directory; purge_deleted deletes
+    # the expired buckets, so it needs the same directory.
+    "throttle": {
+        "BACKEND": "core.cache.SharedFileCache",
+        "LOCATION": os.environ["THROTTLE_CACHE_DIR"],
+    }
+    if os.environ.get("THROTTLE_CACHE_DIR")
+    else {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "throttle",
+    },
+    # Cached token lookups, evicted on token deletion and user saves; the
+    # cache must be shared by all workers for evictions to reach them.
+    "auth": {
+        "BACKEND": "core.cache.SharedFileCache",
+        "LOCATION": os.environ["AUTH_TOKEN_CACHE_DIR"],
+    }
+    if os.environ.get("AUTH_TOKEN_CACHE_DIR")
+    else {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "auth",
+    },
+}
+
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_RENDERER_CLASSES": [
+        "core.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "core.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
+    # Client addresses are the last X-Forwarded-For entry, the one appended
+    # by the proxy; entries sent by the client are ignored.
+    "NUM_PROXIES": int(os.environ.get("NUM_PROXIES", 1)),
+    # Token buckets, see core.throttling. An empty rate disables a throttle.
+    "DEFAULT_THROTTLE_CLASSES": [
+        "core.throttling.AnonTokenBucketThrottle",
+        "core.throttling.UserTokenBucketThrottle",
+        "core.throttling.ScopedTokenBucketThrottle",
+    ],
+    "DEFAULT_THROTTLE_RATES": {
+        scope: os.environ.get(f"THROTTLE_{scope.upper()}_RATE", rate) or None
+        for scope, rate in [
+            ("anon", "120/min"),
+            ("user", "1200/min"),
+            # Token creation and sign up hash a password (PBKDF2).
+            ("token", "10/min"),
+            ("upload", "30/min"),
+            ("bulk", "60/min"),
+        ]
+    },
 }
 
 SPECTACULAR_SETTINGS = {
     # Enable image uploads via webrowser work properly
     "COMPONENT_SPLIT_REQUEST": True,
 }
+# The schema only changes on deploy; it is generated once per process and
+# served with an ETag so clients can revalidate it.
+SCHEMA_CACHE_MAX_AGE = int(os.environ.get("SCHEMA_CACHE_MAX_AGE", 86400))
+
+# Per-request SQL and timing instrumentation (Server-Timing header and a log
+# line per request). Requests over either threshold are logged as warnings.
+REQUEST_TIMING = bool(int(os.environ.get("REQUEST_TIMING", 0)))
+REQUEST_TIMING_SLOW_MS = int(os.environ.get("REQUEST_TIMING_SLOW_MS", 500))
+REQUEST_TIMING_MAX_QUERIES = int(os.environ.get("REQUEST_TIMING_MAX_QUERIES", 50))
+
+# Render recipe list/retrieve responses from values() rows instead of running
+# the serializers per field (the output is identical)
+RECIPE_FAST_READ = bool(int(os.environ.get("RECIPE_FAST_READ", 1)))
+# Stream recipe list responses in chunks instead of building the whole body in
+# memory. Only used by the fast read path and ignored when serving over ASGI.
+# Their request timings are logged after the last chunk, without Server-Timing.
+STREAM_JSON_LISTS = bool(int(os.environ.get("STREAM_JSON_LISTS", 0)))
+
+# Recipe statistics are cached per user data version (core.User.data_version),
+# the TTL only bounds the memory used by versions nobody asks for anymore.
+RECIPE_STATS_CACHE_TTL = int(os.environ.get("RECIPE_STATS_CACHE_TTL", 3600))
+
+# Paginated lists count up to EXACT_COUNT_LIMIT rows exactly; above it the
+# count is PostgreSQL's planner estimate.
+EXACT_COUNT_LIMIT = int(os.environ.get("EXACT_COUNT_LIMIT", 1000))
+
+# Seconds the response of a write sent with an Idempotency-Key is replayed for.
+IDEMPOTENCY_KEY_TTL = int(os.environ.get("IDEMPOTENCY_KEY_TTL", 86400))
+
+# Seconds a sync token stays valid; tombstones of deletions are kept as long.
+SYNC_TOKEN_TTL = int(os.environ.get("SYNC_TOKEN_TTL", 30 * 86400))
+
+# Compress JSON and OpenAPI responses of at least COMPRESSION_MIN_SIZE bytes with
+# gzip (or zstd/brotli when available). Compressed bodies of responses with an
+# ETag are cached for COMPRESSION_CACHE_TTL seconds (0 disables the cache).
+COMPRESSION_ENABLED = bool(int(os.environ.get("COMPRESSION_ENABLED", 1)))
+COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", 1024))
+COMPRESSION_CACHE_TTL = int(os.environ.get("COMPRESSION_CACHE_TTL", 300))
+
+# Load views, serializers and templates when the WSGI module is imported
+# (in the uwsgi master, before the workers are forked) instead of on the first
+# requests.
+WORKER_WARMUP = bool(int(os.environ.get("WORKER_WARMUP", 1)))
+
+# Prometheus metrics exposed at /metrics. Set PROMETHEUS_MULTIPROC_DIR to
+# aggregate the values of all uwsgi workers.
+METRICS_ENABLED = bool(int(os.environ.get("METRICS_ENABLED", 1)))
+
+# Seconds an authenticated token lookup is cached for (0 disables caching).
+# Only used with AUTH_TOKEN_CACHE_DIR (e.g. on tmpfs) shared by the workers, as
+# a per-process cache would keep serving deleted tokens and deactivated users.
+AUTH_TOKEN_CACHE_TTL = (
+    int(os.environ.get("AUTH_TOKEN_CACHE_TTL", 0))
+    if os.environ.get("AUTH_TOKEN_CACHE_DIR")
+    else 0
+)
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "core": {
+            "handlers": ["console"],
+            "level": os.environ.get("LOG_LEVEL", "INFO"),
+        },
+    },
+}
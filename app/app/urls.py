@@ -17,18 +17,15 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
-from drf_spectacular.views import (
-    SpectacularAPIView,
-    SpectacularRedocView,
-    SpectacularSwaggerView,
-)
+from drf_spectacular.views import SpectacularRedocView, SpectacularSwaggerView
 
 from core import views as core_views
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/health-check", core_views.health_check, name="health-check"),
-    path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
+    path("metrics", core_views.metrics, name="metrics"),
+    path("api/schema/", core_views.CachedSpectacularAPIView.as_view(), name="schema"),
     # API DOCS
     path(
         "api/docs/", SpectacularSwaggerView.as_view(url_name="schema"), name="api-docs"
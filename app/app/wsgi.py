@@ -9,8 +9,15 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
 
 application = get_wsgi_application()
+
+# uwsgi imports this module in the master and forks the workers afterwards.
+if settings.WORKER_WARMUP:
+    from core.warmup import warm_up
+
+    warm_up()
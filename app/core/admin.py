@@ -1,18 +1,57 @@
 """
 Django Admin Customization.
 """
+from django.conf import settings
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 
 from core import models
+from core.pagination import estimate_count
+from core.signals import record_deletions, uncount_hidden_recipes
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator using PostgreSQL's row estimate for large changelists.
+
+    A COUNT(*) over a large table scans all of it. As for the API lists,
+    up to EXACT_COUNT_LIMIT rows are counted exactly and above it the
+    planner estimate is good enough for page links.
+    """
+
+    @cached_property
+    def count(self):
+        """Return the estimated or exact number of objects."""
+        if not hasattr(self.object_list, "query"):
+            return super().count
+        return estimate_count(self.object_list, settings.EXACT_COUNT_LIMIT)[0]
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Base admin for tables too large to count or list in select boxes."""
+
+    paginator = EstimatedCountPaginator
+    # Don't count the whole table again when a search or filter is applied.
+    show_full_result_count = False
+    list_select_related = ["user"]
+    raw_id_fields = ["user"]
+
+    def get_actions(self, request):
+        """Drop the delete action, which loads and deletes objects one by one."""
+        actions = super().get_actions(request)
+        actions.pop("delete_selected", None)
+        return actions
 
 
 class UserAdmin(BaseUserAdmin):
     """Define the admin pages for users."""
 
     ordering = ["id"]
-    list_display = ["email", "name"]
+    list_display = ["email", "name", "pending_deletion"]
+    actions = ["mark_for_deletion"]
     fieldsets = (
         (
             None,
@@ -57,8 +96,69 @@ class UserAdmin(BaseUserAdmin):
         ),
     )
 
+    def has_delete_permission(self, request, obj=None):
+        """Disable deletion, which loads and deletes every recipe one by one."""
+        return False
+
+    @admin.action(description=_("Delete selected users in the background"))
+    def mark_for_deletion(self, request, queryset):
+        """Deactivate the accounts, deleted later by purge_deleted."""
+        count = 0
+        for user in queryset.filter(pending_deletion=False):
+            user.is_active = False
+            user.pending_deletion = True
+            # Saved one by one so their cached tokens are evicted.
+            user.save(update_fields=["is_active", "pending_deletion"])
+            count += 1
+        self.message_user(request, _("%d users marked for deletion.") % count)
+
+
+class RecipeAdmin(LargeTableAdmin):
+    """Define the admin pages for recipes."""
+
+    list_display = ["title", "user", "time_minutes", "price", "pending_deletion"]
+    # Case-sensitive lookups, served by indexes.
+    search_fields = ["title__startswith", "user__email__exact"]
+    autocomplete_fields = ["tags", "ingredients"]
+    actions = ["mark_for_deletion"]
+
+    @admin.action(description=_("Delete selected recipes in the background"))
+    def mark_for_deletion(self, request, queryset):
+        """Mark the recipes for deletion by purge_deleted, in one update."""
+        rows = list(
+            queryset.filter(pending_deletion=False).values_list("pk", "user_id")
+        )
+        ids = [pk for pk, owner in rows]
+        with transaction.atomic():
+            count = models.Recipe.objects.filter(pk__in=ids).update(
+                pending_deletion=True
+            )
+            uncount_hidden_recipes(ids)
+            for user_id in {owner for pk, owner in rows}:
+                record_deletions(
+                    models.Recipe,
+                    user_id,
+                    [pk for pk, owner in rows if owner == user_id],
+                )
+        self.message_user(request, _("%d recipes marked for deletion.") % count)
+
+
+class RecipeAttrAdmin(LargeTableAdmin):
+    """Define the admin pages for tags and ingredients."""
+
+    list_display = ["name", "user", "recipe_count"]
+    search_fields = ["name__startswith"]
+    readonly_fields = ["recipe_count"]
+    actions = ["refresh_recipe_counts"]
+
+    @admin.action(description=_("Recompute recipe counts"))
+    def refresh_recipe_counts(self, request, queryset):
+        """Recompute recipe_count of the selected objects, in one update."""
+        count = queryset.refresh_recipe_counts()
+        self.message_user(request, _("%d recipe counts fixed.") % count)
+
 
 admin.site.register(models.User, UserAdmin)
-admin.site.register(models.Recipe)
-admin.site.register(models.Tag)
-admin.site.register(models.Ingredient)
+admin.site.register(models.Recipe, RecipeAdmin)
+admin.site.register(models.Tag, RecipeAttrAdmin)
+admin.site.register(models.Ingredient, RecipeAttrAdmin)
@@ -0,0 +1,42 @@
+"""
+Authentication classes for the API.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+
+from core.metrics import AUTH_TOKEN_CACHE
+
+
+def token_cache_key(key):
+    """Return the cache key for a token, without exposing the token itself."""
+    return "auth-token:" + hashlib.sha256(key.encode()).hexdigest()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication caching successful lookups.
+
+    Tokens are cached for ``AUTH_TOKEN_CACHE_TTL`` seconds in the "auth"
+    cache, shared by the workers, and evicted when the token is deleted or its
+    user is saved. A TTL of 0 disables the cache. The cached user is only fit
+    for reading; views saving it must load it again.
+    """
+
+    def authenticate_credentials(self, key):
+        ttl = settings.AUTH_TOKEN_CACHE_TTL
+        if not ttl:
+            return super().authenticate_credentials(key)
+
+        cache = caches["auth"]
+        cache_key = token_cache_key(key)
+        token = cache.get(cache_key)
+        if token is not None:
+            AUTH_TOKEN_CACHE.labels("hit").inc()
+            return (token.user, token)
+
+        AUTH_TOKEN_CACHE.labels("miss").inc()
+        user, token = super().authenticate_credentials(key)
+        cache.set(cache_key, token, ttl)
+        return (user, token)
@@ -0,0 +1,114 @@
+"""
+Helpers for driving concurrent HTTP benchmarks against a running server.
+"""
+import math
+import threading
+import time
+import urllib.parse
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPConnection, HTTPException, HTTPSConnection
+
+
+def percentile(values, pct):
+    """Return the nearest-rank percentile of a sorted list of values."""
+    if not values:
+        return None
+    rank = max(math.ceil(pct / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+class HTTPClient:
+    """Minimal keep-alive HTTP client holding one connection per thread."""
+
+    def __init__(self, base_url, timeout=30):
+        parts = urllib.parse.urlsplit(base_url)
+        self.connection_class = (
+            HTTPSConnection if parts.scheme == "https" else HTTPConnection
+        )
+        self.netloc = parts.netloc
+        self.prefix = parts.path.rstrip("/")
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self.connection_class(self.netloc, timeout=self.timeout)
+            self._local.conn = conn
+        return conn
+
+    def _reset(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+        self._local.conn = None
+
+    def request(self, method, path, body=None, headers=None, token=None):
+        """Send a request and return (status, elapsed seconds, body).
+
+        Connection failures are reported with a status of 0.
+        """
+        headers = dict(headers or {})
+        if token:
+            headers["Authorization"] = f"Token {token}"
+
+        start = time.perf_counter()
+        for attempt in range(2):
+            try:
+                conn = self._connection()
+                conn.request(method, self.prefix + path, body=body, headers=headers)
+                res = conn.getresponse()
+                payload = res.read()
+                return res.status, time.perf_counter() - start, payload
+            except (HTTPException, OSError):
+                # Stale keep-alive connections are retried once.
+                self._reset()
+        return 0, time.perf_counter() - start, b""
+
+
+def run_load(make_request, concurrency, total):
+    """Issue ``total`` calls of ``make_request`` from ``concurrency`` threads.
+
+    ``make_request`` receives the call index and returns a tuple of
+    (endpoint name, status, elapsed seconds). Returns the samples grouped by
+    endpoint together with the wall-clock duration of the run.
+    """
+    samples = defaultdict(list)
+    lock = threading.Lock()
+
+    def call(index):
+        name, status, elapsed = make_request(index)
+        with lock:
+            samples[name].append((status, elapsed))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(call, range(total)))
+    return samples, time.perf_counter() - start
+
+
+def summarize(samples, duration):
+    """Reduce raw samples to throughput and latency percentiles (in ms)."""
+    endpoints = {}
+    for name, results in sorted(samples.items()):
+        latencies = sorted(elapsed * 1000 for _, elapsed in results)
+        errors = sum(1 for status, _ in results if status == 0 or status >= 400)
+        endpoints[name] = {
+            "requests": len(results),
+            "errors": errors,
+            "throughput": round(len(results) / duration, 2),
+            "mean_ms": round(sum(latencies) / len(latencies), 2),
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+        }
+
+    total = sum(item["requests"] for item in endpoints.values())
+    return {
+        "duration_s": round(duration, 3),
+        "requests": total,
+        "errors": sum(item["errors"] for item in endpoints.values()),
+        "throughput": round(total / duration, 2) if duration else 0,
+        "endpoints": endpoints,
+    }
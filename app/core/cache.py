@@ -0,0 +1,39 @@
+"""
+File based cache for state shared by the workers (throttle buckets, tokens).
+"""
+from django.core.cache import caches
+from django.core.cache.backends.filebased import FileBasedCache
+
+
+class SharedFileCache(FileBasedCache):
+    """File based cache that never culls on writes.
+
+    Django's FileBasedCache lists its whole directory on every ``set`` to
+    decide whether to cull, and then drops entries at random. Here writes
+    only touch their own file; expired entries are deleted by
+    ``delete_expired``, which purge_deleted runs periodically.
+    """
+
+    def _cull(self):
+        pass
+
+    def delete_expired(self):
+        """Delete the expired entries, returning how many were deleted."""
+        deleted = 0
+        for path in self._list_cache_files():
+            try:
+                with open(path, "rb") as fh:
+                    deleted += self._is_expired(fh)
+            except FileNotFoundError:
+                # Deleted or replaced by a worker meanwhile.
+                pass
+        return deleted
+
+
+def delete_expired_entries():
+    """Delete the expired entries of every SharedFileCache, returning how many."""
+    return sum(
+        cache.delete_expired()
+        for cache in caches.all()
+        if isinstance(cache, SharedFileCache)
+    )
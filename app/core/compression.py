@@ -0,0 +1,79 @@
+"""
+Response compression codecs and Accept-Encoding negotiation.
+
+gzip is always available. zstd (``compression.zstd``, stdlib from Python
+3.14) and brotli (the ``brotli`` package) are used when importable. Streamed
+bodies are flushed after every chunk, so each reaches the client right away.
+"""
+import zlib
+
+from django.utils.text import compress_string
+
+try:
+    from compression import zstd
+except ImportError:
+    zstd = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def _gzip_sequence(sequence):
+    # Django's compress_sequence only flushes when its buffer fills up.
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in sequence:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def _zstd_sequence(sequence):
+    compressor = zstd.ZstdCompressor()
+    for chunk in sequence:
+        yield compressor.compress(chunk, zstd.ZstdCompressor.FLUSH_BLOCK)
+    yield compressor.flush()
+
+
+def _brotli_sequence(sequence):
+    compressor = brotli.Compressor()
+    for chunk in sequence:
+        yield compressor.process(chunk) + compressor.flush()
+    yield compressor.finish()
+
+
+# Content coding: (compress bytes, compress an iterable of bytes), in order of
+# preference when the client accepts several with the same quality.
+CODECS = {}
+if zstd is not None:
+    CODECS["zstd"] = (zstd.compress, _zstd_sequence)
+if brotli is not None:
+    CODECS["br"] = (brotli.compress, _brotli_sequence)
+CODECS["gzip"] = (compress_string, _gzip_sequence)
+
+
+def negotiate(accept_encoding, codecs=CODECS):
+    """Return the best supported coding of an Accept-Encoding header.
+
+    Returns None when the client accepts none of them.
+    """
+    qualities = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+
+    best, best_quality = None, 0.0
+    for coding in codecs:
+        quality = qualities.get(coding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
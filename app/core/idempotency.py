@@ -0,0 +1,129 @@
+"""
+Idempotency-Key support for write endpoints.
+
+A client retrying a write (after a timeout or a dropped connection) sends the
+same ``Idempotency-Key`` header. The first request stores its response under
+the key, in the transaction of the write itself, and retries within
+``IDEMPOTENCY_KEY_TTL`` get that response back without running the write
+again; failed requests wrote nothing and are not stored. Inserting the key
+row takes the lock: a concurrent duplicate blocks on the unique constraint
+until the first request commits, then replays it.
+"""
+import functools
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from core.models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+IDEMPOTENCY_PARAMETER = OpenApiParameter(
+    HEADER,
+    OpenApiTypes.STR,
+    location=OpenApiParameter.HEADER,
+    description="Unique key of the request; retries with the same key get "
+    "the first response back instead of writing again.",
+)
+
+
+def _fingerprint(request):
+    """Return a hash of the method, path and payload of a request."""
+    digest = hashlib.sha256()
+    digest.update(f"{request.method} {request.path}\n".encode())
+    if not request.content_type.startswith("multipart/"):
+        digest.update(request.body)
+        return digest.hexdigest()
+
+    # Uploads are not held in memory as a whole body; hash the parsed parts.
+    for name in sorted(request.data):
+        for value in request.data.getlist(name):
+            digest.update(f"\n{name}=".encode())
+            if hasattr(value, "chunks"):
+                for chunk in value.chunks():
+                    digest.update(chunk)
+                value.seek(0)
+            else:
+                digest.update(str(value).encode())
+    return digest.hexdigest()
+
+
+def _replay(record):
+    return Response(
+        record.response,
+        status=record.status_code,
+        headers={REPLAYED_HEADER: "true"},
+    )
+
+
+def _claim(user, key, fingerprint):
+    """Insert the key row, or return the locked existing one."""
+    expires_at = timezone.now() + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+    record = None
+    while record is None:
+        try:
+            with transaction.atomic():
+                return IdempotencyKey.objects.create(
+                    user=user, key=key, fingerprint=fingerprint, expires_at=expires_at
+                )
+        except IntegrityError:
+            # Also None when the holder deleted the row after a server error.
+            record = (
+                IdempotencyKey.objects.select_for_update()
+                .filter(user=user, key=key)
+                .first()
+            )
+    if record.expires_at <= timezone.now():
+        # Not purged yet; the key is free to be used again.
+        record.fingerprint = fingerprint
+        record.status_code = record.response = None
+        record.expires_at = expires_at
+        record.save()
+    return record
+
+
+def idempotent(method):
+    """Make a viewset write method honour the Idempotency-Key header."""
+
+    @functools.wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return method(self, request, *args, **kwargs)
+        if not 1 <= len(key) <= 255:
+            raise ValidationError(
+                {HEADER: ["Must be between 1 and 255 characters long."]}
+            )
+
+        fingerprint = _fingerprint(request)
+        with transaction.atomic():
+            record = _claim(request.user, key, fingerprint)
+            if record.status_code is not None:
+                if record.fingerprint != fingerprint:
+                    return Response(
+                        {"detail": f"{HEADER} was already used for another request."},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    )
+                return _replay(record)
+
+            response = method(self, request, *args, **kwargs)
+            if response.status_code >= 400:
+                # Nothing was written, so the key stays free for a retry (as
+                # when the error is raised).
+                record.delete()
+            else:
+                record.status_code = response.status_code
+                record.response = response.data
+                record.save(update_fields=["status_code", "response"])
+            return response
+
+    return wrapper
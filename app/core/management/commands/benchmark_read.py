@@ -0,0 +1,99 @@
+"""
+Django command to benchmark the read-only recipe APIs of a running server.
+
+Run it against the WSGI (uwsgi) and ASGI (uvicorn) deployments in turn to
+compare throughput at each concurrency level.
+"""
+import json
+import urllib.parse
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmark import HTTPClient, run_load, summarize
+
+
+class Command(BaseCommand):
+    """
+    Django command to measure read throughput at fixed concurrency levels.
+    """
+
+    help = "Benchmark the recipe, tag and ingredient read endpoints."
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default="http://localhost:8000")
+        parser.add_argument("--token", help="Auth token of an existing user.")
+        parser.add_argument("--email", help="Obtain a token for this user.")
+        parser.add_argument("--password")
+        parser.add_argument(
+            "--concurrency",
+            default="1,8,32",
+            help="Comma separated list of concurrency levels.",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=500,
+            help="Requests issued at each concurrency level.",
+        )
+        parser.add_argument("--output", help="Write the results to a JSON file.")
+
+    def _obtain_token(self, client, email, password):
+        body = urllib.parse.urlencode({"email": email, "password": password})
+        status, _, payload = client.request(
+            "POST",
+            "/api/user/token/",
+            body=body,
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+        )
+        if status != 200:
+            raise CommandError(f"Could not obtain a token (HTTP {status}).")
+        return json.loads(payload)["token"]
+
+    def handle(self, *args, **options):
+        """Entry point for command."""
+        client = HTTPClient(options["base_url"])
+        token = options["token"]
+        if not token:
+            if not options["email"]:
+                raise CommandError("Pass either --token or --email/--password.")
+            token = self._obtain_token(client, options["email"], options["password"])
+
+        status, _, payload = client.request("GET", "/api/recipe/recipes/", token=token)
+        if status != 200:
+            raise CommandError(f"Recipe list request failed (HTTP {status}).")
+        recipes = json.loads(payload)
+        endpoints = [
+            ("recipe-list", "/api/recipe/recipes/"),
+            ("tag-list", "/api/recipe/tags/"),
+            ("ingredient-list", "/api/recipe/ingredients/"),
+        ]
+        if recipes:
+            endpoints.append(
+                ("recipe-detail", f"/api/recipe/recipes/{recipes[0]['id']}/")
+            )
+
+        def make_request(index):
+            name, path = endpoints[index % len(endpoints)]
+            status, elapsed, _ = client.request("GET", path, token=token)
+            return name, status, elapsed
+
+        results = {}
+        for level in [int(value) for value in options["concurrency"].split(",")]:
+            samples, duration = run_load(make_request, level, options["requests"])
+            summary = summarize(samples, duration)
+            results[str(level)] = summary
+            self.stdout.write(
+                f"concurrency={level}: {summary['throughput']} req/s, "
+                f"{summary['errors']} errors"
+            )
+            for name, stats in summary["endpoints"].items():
+                self.stdout.write(
+                    f"  {name:<16} p50={stats['p50_ms']}ms "
+                    f"p95={stats['p95_ms']}ms p99={stats['p99_ms']}ms"
+                )
+
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                json.dump(results, fh, indent=2, sort_keys=True)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
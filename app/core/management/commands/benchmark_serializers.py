@@ -0,0 +1,80 @@
+"""
+Django command to compare the recipe serializers with the fast read path.
+"""
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Prefetch
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from core.models import Ingredient, Recipe, Tag
+from recipe.serializers import (
+    FastRecipeReader,
+    RecipeDetailSerializer,
+    RecipeSerializer,
+)
+
+
+class Command(BaseCommand):
+    """
+    Django command to measure recipe rendering speed in rows per second.
+    """
+
+    help = "Benchmark RecipeSerializer against the fast read path."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--email",
+            help="Render this user's recipes (default: the user with the most).",
+        )
+        parser.add_argument("--detail", action="store_true")
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        """Entry point for command."""
+        users = get_user_model().objects.all()
+        if options["email"]:
+            user = users.filter(email=options["email"]).first()
+        else:
+            user = users.annotate(n=Count("recipe")).order_by("-n").first()
+        if user is None:
+            raise CommandError("No user found, run seed_data first.")
+
+        serializer_class = (
+            RecipeDetailSerializer if options["detail"] else (RecipeSerializer)
+        )
+        request = Request(APIRequestFactory().get("/api/recipe/recipes/"))
+        context = {"request": request}
+        queryset = Recipe.objects.filter(user=user).order_by("-id")
+        prefetched = queryset.prefetch_related(
+            Prefetch("tags", queryset=Tag.objects.order_by("id")),
+            Prefetch("ingredients", queryset=Ingredient.objects.order_by("id")),
+        )
+
+        def serializer_path():
+            return serializer_class(list(prefetched), many=True, context=context).data
+
+        def fast_path():
+            reader = FastRecipeReader(serializer_class(context=context))
+            return reader.render(queryset)
+
+        rows = queryset.count()
+        self.stdout.write(f"Rendering {rows} recipes of {user.email}")
+        rates = {}
+        for name, render in [("serializer", serializer_path), ("fast", fast_path)]:
+            best = None
+            for _ in range(options["repeat"]):
+                start = time.perf_counter()
+                render()
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            rates[name] = rows / best if best else 0
+            self.stdout.write(
+                f"  {name:<10} {best * 1000:.1f}ms {rates[name]:.0f} rows/s"
+            )
+
+        if rates["serializer"]:
+            speedup = rates["fast"] / rates["serializer"]
+            self.stdout.write(self.style.SUCCESS(f"Fast path speedup: {speedup:.1f}x"))
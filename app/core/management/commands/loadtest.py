@@ -0,0 +1,351 @@
+"""
+Django command to load test the recipe and user APIs of a running server.
+
+Seeds load test users (with tokens and a few recipes) into the configured
+database, then drives a weighted mix of requests covering every endpoint of
+recipe/urls.py and user/urls.py against the server at --base-url. Run it
+against a local server sharing the same database, with the throttles disabled
+(see README.md): the token and sign up scenarios alone exceed the token budget
+of one IP address.
+"""
+import io
+import json
+import random
+import subprocess
+import threading
+import uuid
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from PIL import Image
+from rest_framework.authtoken.models import Token
+
+from core.benchmark import HTTPClient, run_load, summarize
+from core.models import Ingredient, Recipe, Tag
+
+PASSWORD = "loadtest-pass-123"
+
+# Relative weight of each scenario in the request mix.
+DEFAULT_MIX = {
+    "recipe-list": 20,
+    "recipe-list-filtered": 10,
+    "recipe-detail": 20,
+    "recipe-create": 8,
+    "recipe-update": 5,
+    "recipe-upload-image": 3,
+    "recipe-delete": 2,
+    "tag-list": 8,
+    "tag-update": 2,
+    "ingredient-list": 8,
+    "ingredient-update": 2,
+    "user-token": 5,
+    "user-me": 5,
+    "user-update": 2,
+    "user-create": 2,
+}
+
+
+def _multipart(field, filename, content, content_type):
+    """Encode a single file as a multipart/form-data body."""
+    boundary = uuid.uuid4().hex
+    body = (
+        (
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode()
+        + content
+        + f"\r\n--{boundary}--\r\n".encode()
+    )
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def _git_revision():
+    """Return the current git commit, if the code is in a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class LoadTestUser:
+    """A seeded user with the objects it owns.
+
+    Tags and ingredients are (id, name) pairs, so updates can keep the name
+    of each object: names are unique per user.
+    """
+
+    def __init__(self, user, token, recipe_ids, tags, ingredients):
+        self.email = user.email
+        self.token = token
+        self.recipe_ids = recipe_ids
+        self.tags = tags
+        self.ingredients = ingredients
+        self.created_ids = []
+        self.lock = threading.Lock()
+
+
+class Command(BaseCommand):
+    """
+    Django command to measure API latency percentiles and throughput.
+    """
+
+    help = "Load test every recipe and user endpoint and write a JSON report."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default="http://localhost:8000")
+        parser.add_argument("--users", type=int, default=10)
+        parser.add_argument("--recipes-per-user", type=int, default=20)
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--mix",
+            help="Override scenario weights, e.g. recipe-list=50,user-token=0.",
+        )
+        parser.add_argument("--output", default="loadtest.json")
+
+    def _seed(self, count, recipes_per_user, rng):
+        """Create (or reuse) the load test users and their data."""
+        password = make_password(PASSWORD)
+        users = []
+        for index in range(count):
+            user, created = get_user_model().objects.get_or_create(
+                email=f"loadtest-{index}@example.com",
+                defaults={"name": f"Load Test {index}", "password": password},
+            )
+            token, _ = Token.objects.get_or_create(user=user)
+            if created:
+                tags = Tag.objects.bulk_create(
+                    Tag(user=user, name=f"Tag {n}") for n in range(10)
+                )
+                ingredients = Ingredient.objects.bulk_create(
+                    Ingredient(user=user, name=f"Ingredient {n}") for n in range(20)
+                )
+                for n in range(recipes_per_user):
+                    recipe = Recipe.objects.create(
+                        user=user,
+                        title=f"Recipe {n}",
+                        description="Load test recipe. " * rng.randint(1, 20),
+                        time_minutes=rng.randint(5, 120),
+                        price=Decimal(rng.randint(100, 5000)) / 100,
+                    )
+                    recipe.tags.add(*rng.sample(tags, 3))
+                    recipe.ingredients.add(*rng.sample(ingredients, 5))
+
+            users.append(
+                LoadTestUser(
+                    user,
+                    token.key,
+                    list(Recipe.objects.filter(user=user).values_list("id", flat=True)),
+                    list(Tag.objects.filter(user=user).values_list("id", "name")),
+                    list(
+                        Ingredient.objects.filter(user=user).values_list("id", "name")
+                    ),
+                )
+            )
+        return users
+
+    def _parse_mix(self, value):
+        mix = dict(DEFAULT_MIX)
+        for item in filter(None, (value or "").split(",")):
+            name, _, weight = item.partition("=")
+            if name not in mix:
+                raise CommandError(f"Unknown scenario: {name}")
+            mix[name] = int(weight)
+        return {name: weight for name, weight in mix.items() if weight > 0}
+
+    def handle(self, *args, **options):
+        """Entry point for command."""
+        if options["users"] < 1 or options["recipes_per_user"] < 1:
+            raise CommandError("--users and --recipes-per-user must be at least 1.")
+        seed = options["seed"]
+        mix = self._parse_mix(options["mix"])
+        users = self._seed(
+            options["users"], options["recipes_per_user"], random.Random(seed)
+        )
+        client = HTTPClient(options["base_url"])
+
+        image = io.BytesIO()
+        Image.new("RGB", (200, 200), (200, 120, 40)).save(image, format="JPEG")
+        image_body = image.getvalue()
+
+        def send(method, path, user=None, payload=None, json_body=True):
+            headers = {}
+            body = None
+            if payload is not None and json_body:
+                body = json.dumps(payload)
+                headers["Content-Type"] = "application/json"
+            elif payload is not None:
+                body, headers["Content-Type"] = payload
+            return client.request(
+                method, path, body=body, headers=headers, token=user and user.token
+            )
+
+        scenarios = {}
+
+        def scenario(name):
+            def register(func):
+                scenarios[name] = func
+                return func
+
+            return register
+
+        @scenario("recipe-list")
+        def recipe_list(rng, user):
+            return send("GET", "/api/recipe/recipes/", user)
+
+        @scenario("recipe-list-filtered")
+        def recipe_list_filtered(rng, user):
+            tags = ",".join(str(pk) for pk, _ in rng.sample(user.tags, 2))
+            ingredients = ",".join(str(pk) for pk, _ in rng.sample(user.ingredients, 2))
+            return send(
+                "GET",
+                f"/api/recipe/recipes/?tags={tags}&ingredients={ingredients}",
+                user,
+            )
+
+        @scenario("recipe-detail")
+        def recipe_detail(rng, user):
+            recipe_id = rng.choice(user.recipe_ids)
+            return send("GET", f"/api/recipe/recipes/{recipe_id}/", user)
+
+        @scenario("recipe-create")
+        def recipe_create(rng, user):
+            payload = {
+                "title": f"Created recipe {rng.randint(0, 10**6)}",
+                "time_minutes": rng.randint(5, 120),
+                "price": f"{rng.randint(100, 5000) / 100:.2f}",
+                "tags": [{"name": f"Tag {rng.randint(0, 15)}"} for _ in range(2)],
+                "ingredients": [
+                    {"name": f"Ingredient {rng.randint(0, 25)}"} for _ in range(4)
+                ],
+            }
+            status, elapsed, body = send("POST", "/api/recipe/recipes/", user, payload)
+            if status == 201:
+                with user.lock:
+                    user.created_ids.append(json.loads(body)["id"])
+            return status, elapsed, body
+
+        @scenario("recipe-update")
+        def recipe_update(rng, user):
+            recipe_id = rng.choice(user.recipe_ids)
+            payload = {"time_minutes": rng.randint(5, 120)}
+            return send("PATCH", f"/api/recipe/recipes/{recipe_id}/", user, payload)
+
+        @scenario("recipe-upload-image")
+        def recipe_upload_image(rng, user):
+            recipe_id = rng.choice(user.recipe_ids)
+            payload = _multipart("image", "image.jpg", image_body, "image/jpeg")
+            return send(
+                "POST",
+                f"/api/recipe/recipes/{recipe_id}/upload-image/",
+                user,
+                payload,
+                json_body=False,
+            )
+
+        @scenario("recipe-delete")
+        def recipe_delete(rng, user):
+            with user.lock:
+                recipe_id = user.created_ids.pop() if user.created_ids else None
+            if recipe_id is None:
+                return None
+            return send("DELETE", f"/api/recipe/recipes/{recipe_id}/", user)
+
+        @scenario("tag-list")
+        def tag_list(rng, user):
+            return send("GET", "/api/recipe/tags/?assigned_only=1", user)
+
+        @scenario("tag-update")
+        def tag_update(rng, user):
+            tag_id, name = rng.choice(user.tags)
+            return send("PATCH", f"/api/recipe/tags/{tag_id}/", user, {"name": name})
+
+        @scenario("ingredient-list")
+        def ingredient_list(rng, user):
+            return send("GET", "/api/recipe/ingredients/", user)
+
+        @scenario("ingredient-update")
+        def ingredient_update(rng, user):
+            ingredient_id, name = rng.choice(user.ingredients)
+            return send(
+                "PATCH",
+                f"/api/recipe/ingredients/{ingredient_id}/",
+                user,
+                {"name": name},
+            )
+
+        @scenario("user-token")
+        def user_token(rng, user):
+            payload = {"email": user.email, "password": PASSWORD}
+            return send("POST", "/api/user/token/", payload=payload)
+
+        @scenario("user-me")
+        def user_me(rng, user):
+            return send("GET", "/api/user/me/", user)
+
+        @scenario("user-update")
+        def user_update(rng, user):
+            return send("PATCH", "/api/user/me/", user, {"name": user.email})
+
+        @scenario("user-create")
+        def user_create(rng, user):
+            payload = {
+                "email": f"loadtest-{uuid.uuid4().hex}@example.com",
+                "password": PASSWORD,
+                "name": "Load Test",
+            }
+            return send("POST", "/api/user/create/", payload=payload)
+
+        names = list(mix)
+        weights = [mix[name] for name in names]
+
+        def make_request(index):
+            rng = random.Random(seed * 1_000_003 + index)
+            name = rng.choices(names, weights)[0]
+            user = rng.choice(users)
+            result = scenarios[name](rng, user)
+            if result is None:
+                # No created recipe left to delete: create one instead, and
+                # record it as such so each endpoint's percentiles stay pure.
+                name, result = "recipe-create", recipe_create(rng, user)
+            status, elapsed, _ = result
+            return name, status, elapsed
+
+        samples, duration = run_load(
+            make_request, options["concurrency"], options["requests"]
+        )
+        summary = summarize(samples, duration)
+        report = {
+            "commit": _git_revision(),
+            "config": {
+                "concurrency": options["concurrency"],
+                "requests": options["requests"],
+                "users": options["users"],
+                "recipes_per_user": options["recipes_per_user"],
+                "seed": seed,
+                "mix": mix,
+            },
+            "summary": summary,
+        }
+        with open(options["output"], "w") as fh:
+            json.dump(report, fh, indent=2, sort_keys=True)
+
+        self.stdout.write(
+            f"{summary['requests']} requests in {summary['duration_s']}s: "
+            f"{summary['throughput']} req/s, {summary['errors']} errors"
+        )
+        for name, stats in summary["endpoints"].items():
+            self.stdout.write(
+                f"  {name:<22} n={stats['requests']:<5} p50={stats['p50_ms']}ms "
+                f"p95={stats['p95_ms']}ms p99={stats['p99_ms']}ms"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
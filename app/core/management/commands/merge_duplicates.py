@@ -0,0 +1,61 @@
+"""
+Django command to merge duplicate tags and ingredients.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Ingredient, Tag
+from recipe import bulk
+
+MODELS = {"tag": Tag, "ingredient": Ingredient}
+
+
+class Command(BaseCommand):
+    """
+    Django command to merge tags or ingredients into one another.
+    """
+
+    help = (
+        "Merge the given tags or ingredients into a target, or every group "
+        "with the same normalized name for each user."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--model",
+            choices=list(MODELS),
+            help="Only merge tags or ingredients (default: both).",
+        )
+        parser.add_argument("--target", type=int, help="Id of the object to keep.")
+        parser.add_argument(
+            "--sources",
+            help="Comma separated ids of the objects merged into the target.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Objects merged per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        """Entry point for command."""
+        if (options["target"] is None) != (options["sources"] is None):
+            raise CommandError("--target and --sources go together.")
+
+        if options["target"] is not None:
+            if options["model"] is None:
+                raise CommandError("--model is required with --target.")
+            model = MODELS[options["model"]]
+            try:
+                target = model.objects.get(pk=options["target"])
+                sources = [int(pk) for pk in options["sources"].split(",")]
+            except (model.DoesNotExist, ValueError) as exc:
+                raise CommandError(exc)
+            merged = bulk.merge(target, sources, options["batch_size"])
+            self.stdout.write(f"{model._meta.verbose_name_plural}: {merged} merged")
+            return
+
+        models = [MODELS[options["model"]]] if options["model"] else MODELS.values()
+        for model in models:
+            merged = bulk.merge_duplicates(model, options["batch_size"])
+            self.stdout.write(f"{model._meta.verbose_name_plural}: {merged} merged")
@@ -0,0 +1,49 @@
+"""
+Django command to delete the recipes and accounts marked for deletion.
+
+Each round also deletes the expired entries of the shared file caches
+(core.cache), which are not culled when written.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.cache import delete_expired_entries
+from core.purge import purge
+
+
+class Command(BaseCommand):
+    """
+    Django command to purge pending deletions in batches.
+    """
+
+    help = "Delete the recipes and accounts marked for deletion, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows deleted per transaction.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=0,
+            help="Keep running, checking for work every this many seconds.",
+        )
+
+    def handle(self, *args, **options):
+        """Entry point for command."""
+        while True:
+            total = delete_expired_entries()
+            while True:
+                deleted = purge(options["batch_size"])
+                if not deleted:
+                    break
+                total += deleted
+            if total or not options["interval"]:
+                self.stdout.write(f"purge_deleted: {total} rows deleted")
+            if not options["interval"]:
+                return
+            time.sleep(options["interval"])
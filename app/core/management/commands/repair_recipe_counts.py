@@ -0,0 +1,37 @@
+"""
+Django command to recompute the recipe counters of tags and ingredients.
+"""
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+
+from core.models import Ingredient, Tag
+
+
+class Command(BaseCommand):
+    """
+    Django command to repair Tag.recipe_count and Ingredient.recipe_count.
+    """
+
+    help = "Recompute recipe_count of tags and ingredients set-wise."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=50000,
+            help="Rows updated per statement, by primary key range.",
+        )
+
+    def handle(self, *args, **options):
+        """Entry point for command."""
+        batch_size = options["batch_size"]
+        for model in (Tag, Ingredient):
+            last = model.objects.aggregate(last=Max("pk"))["last"] or 0
+            fixed = 0
+            for first in range(0, last + 1, batch_size):
+                fixed += model.objects.filter(
+                    pk__gte=first, pk__lt=first + batch_size
+                ).refresh_recipe_counts()
+            self.stdout.write(
+                f"{model._meta.verbose_name_plural}: {fixed} counters fixed"
+            )
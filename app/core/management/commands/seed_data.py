@@ -0,0 +1,267 @@
+"""
+Django command to generate a synthetic dataset for benchmarks.
+
+The output only depends on the options (most importantly ``--seed``): every
+user gets its own random generator derived from the seed and its index, so
+two runs with the same options produce the same rows.
+"""
+import io
+import random
+import time
+from decimal import Decimal
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core.models import Ingredient, Recipe, Tag
+from core.purge import purge_user
+
+WORDS = (
+    "spicy sweet smoky tangy crispy creamy quick slow roasted grilled baked "
+    "braised fresh hearty light vegan vegetarian keto paleo spring summer "
+    "autumn winter thai indian italian mexican greek korean french lebanese "
+    "breakfast lunch dinner dessert snack soup salad curry stew pasta noodles "
+    "rice bread pie cake tart sauce dip"
+).split()
+INGREDIENT_WORDS = (
+    "garlic onion shallot ginger chili tomato potato carrot celery pepper "
+    "spinach kale basil parsley coriander cumin turmeric paprika cinnamon "
+    "nutmeg butter cream milk yogurt cheese egg flour sugar honey salt oil "
+    "vinegar lemon lime orange apple banana rice lentil chickpea bean tofu "
+    "chicken beef pork lamb salmon prawn mushroom aubergine courgette pea"
+).split()
+
+
+def _max_names(words):
+    """Return how many distinct names _names can build from the words."""
+    # Single words, then ordered pairs of different words.
+    return len(words) ** 2
+
+
+def _names(words, count, rng):
+    """Return ``count`` distinct names built from the given words.
+
+    ``count`` must be at most ``_max_names(words)``.
+    """
+    names = []
+    seen = set()
+    while len(names) < count:
+        name = " ".join(rng.sample(words, 1 if len(seen) < len(words) else 2))
+        if name not in seen:
+            seen.add(name)
+            names.append(name.capitalize())
+    return names
+
+
+def _zipf_weights(count, exponent):
+    """Return cumulative Zipf weights for ranks 1..count."""
+    return list(accumulate(1 / rank**exponent for rank in range(1, count + 1)))
+
+
+class Command(BaseCommand):
+    """
+    Django command to seed the database with synthetic users and recipes.
+    """
+
+    help = "Generate a deterministic synthetic dataset for benchmarks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument(
+            "--recipes",
+            type=int,
+            default=50,
+            help="Mean number of recipes per user (exponentially distributed).",
+        )
+        parser.add_argument("--tags", type=int, default=30, help="Tags per user.")
+        parser.add_argument(
+            "--ingredients", type=int, default=80, help="Ingredients per user."
+        )
+        parser.add_argument("--tags-per-recipe", type=int, default=3)
+        parser.add_argument("--ingredients-per-recipe", type=int, default=8)
+        parser.add_argument(
+            "--zipf",
+            type=float,
+            default=1.1,
+            help="Exponent of the Zipf distribution of tag/ingredient popularity.",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--users-per-chunk",
+            type=int,
+            default=500,
+            help="Users generated and inserted per transaction.",
+        )
+        parser.add_argument("--prefix", default="seed")
+        parser.add_argument("--password", default="seedpass123")
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Delete users previously seeded with the same prefix first.",
+        )
+
+    def _insert_links(self, model, rows, batch_size):
+        """Insert (recipe_id, other_id) rows into an M2M through table."""
+        if not rows:
+            return
+        through = model.through
+        columns = [field.column for field in through._meta.fields[1:]]
+        if connection.vendor == "postgresql":
+            # COPY is several times faster than INSERT for plain integer rows.
+            buffer = io.StringIO("".join(f"{a}\t{b}\n" for a, b in rows))
+            with connection.cursor() as cursor:
+                cursor.copy_expert(
+                    f"COPY {through._meta.db_table} ({', '.join(columns)}) "
+                    "FROM STDIN",
+                    buffer,
+                )
+            return
+        attnames = [field.attname for field in through._meta.fields[1:]]
+        through.objects.bulk_create(
+            (through(**dict(zip(attnames, row))) for row in rows),
+            batch_size=batch_size,
+        )
+
+    def _generate_chunk(self, indexes, options, password):
+        """Generate and insert the users with the given indexes."""
+        batch_size = options["batch_size"]
+        users = get_user_model().objects.bulk_create(
+            [
+                get_user_model()(
+                    email=f"{options['prefix']}-{index}@example.com",
+                    name=f"Seed User {index}",
+                    password=password,
+                )
+                for index in indexes
+            ],
+            batch_size=batch_size,
+        )
+
+        tags, ingredients, recipes, plans = [], [], [], []
+        for index, user in zip(indexes, users):
+            rng = random.Random(f"{options['seed']}-{index}")
+            user_tags = [
+                Tag(user=user, name=name)
+                for name in _names(WORDS, options["tags"], rng)
+            ]
+            user_ingredients = [
+                Ingredient(user=user, name=name)
+                for name in _names(INGREDIENT_WORDS, options["ingredients"], rng)
+            ]
+            count = (
+                int(rng.expovariate(1 / options["recipes"]))
+                if options["recipes"]
+                else 0
+            )
+            user_recipes = [
+                Recipe(
+                    user=user,
+                    title=" ".join(rng.sample(WORDS, rng.randint(2, 5))).capitalize(),
+                    description=" ".join(
+                        rng.choices(WORDS, k=int(rng.lognormvariate(3, 1)))
+                    ),
+                    time_minutes=rng.randint(5, 240),
+                    price=Decimal(rng.randint(50, 9999)) / 100,
+                    link=f"https://example.com/recipes/{index}/{n}"
+                    if rng.random() < 0.5
+                    else "",
+                )
+                for n in range(count)
+            ]
+            tags.extend(user_tags)
+            ingredients.extend(user_ingredients)
+            recipes.extend(user_recipes)
+            plans.append((rng, user_recipes, user_tags, user_ingredients))
+
+        Tag.objects.bulk_create(tags, batch_size=batch_size)
+        Ingredient.objects.bulk_create(ingredients, batch_size=batch_size)
+        Recipe.objects.bulk_create(recipes, batch_size=batch_size)
+
+        tag_links, ingredient_links = [], []
+        for rng, user_recipes, user_tags, user_ingredients in plans:
+            tag_weights = _zipf_weights(len(user_tags), options["zipf"])
+            ingredient_weights = _zipf_weights(len(user_ingredients), options["zipf"])
+            for recipe in user_recipes:
+                # With --tags 0 or --ingredients 0 there is nothing to link.
+                if user_tags:
+                    for tag in {
+                        *rng.choices(
+                            user_tags,
+                            cum_weights=tag_weights,
+                            k=options["tags_per_recipe"],
+                        )
+                    }:
+                        tag_links.append((recipe.id, tag.id))
+                if user_ingredients:
+                    for ingredient in {
+                        *rng.choices(
+                            user_ingredients,
+                            cum_weights=ingredient_weights,
+                            k=options["ingredients_per_recipe"],
+                        )
+                    }:
+                        ingredient_links.append((recipe.id, ingredient.id))
+
+        self._insert_links(Recipe.tags, tag_links, batch_size)
+        self._insert_links(Recipe.ingredients, ingredient_links, batch_size)
+        # The links bypass the signals maintaining recipe_count.
+        Tag.objects.filter(user__in=users).refresh_recipe_counts()
+        Ingredient.objects.filter(user__in=users).refresh_recipe_counts()
+        return {
+            "users": len(users),
+            "tags": len(tags),
+            "ingredients": len(ingredients),
+            "recipes": len(recipes),
+            "recipe_tags": len(tag_links),
+            "recipe_ingredients": len(ingredient_links),
+        }
+
+    def handle(self, *args, **options):
+        """Entry point for command."""
+        for option, words in (("tags", WORDS), ("ingredients", INGREDIENT_WORDS)):
+            if not 0 <= options[option] <= _max_names(words):
+                raise CommandError(
+                    f"--{option} must be between 0 and {_max_names(words)}."
+                )
+
+        prefix = options["prefix"]
+        seeded = get_user_model().objects.filter(email__startswith=f"{prefix}-")
+        if options["clear"]:
+            # Set-wise, batch by batch; the ORM would load every recipe and
+            # send its signals.
+            for user in list(seeded.only("pk")):
+                purge_user(user, options["batch_size"])
+        elif seeded.exists():
+            raise CommandError(
+                f"Users with the prefix '{prefix}' exist, pass --clear to replace them."
+            )
+
+        # Hash the password once instead of once per user.
+        password = make_password(options["password"])
+        totals = {}
+        start = time.perf_counter()
+        chunk = options["users_per_chunk"]
+        for first in range(0, options["users"], chunk):
+            indexes = range(first, min(first + chunk, options["users"]))
+            with transaction.atomic():
+                counts = self._generate_chunk(indexes, options, password)
+            for name, value in counts.items():
+                totals[name] = totals.get(name, 0) + value
+            self.stdout.write(
+                f"{indexes[-1] + 1}/{options['users']} users "
+                f"({time.perf_counter() - start:.1f}s)"
+            )
+
+        elapsed = time.perf_counter() - start
+        rows = sum(totals.values())
+        summary = ", ".join(f"{value} {name}" for name, value in totals.items())
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Inserted {rows} rows in {elapsed:.1f}s "
+                f"({rows / elapsed:.0f} rows/s): {summary}"
+            )
+        )
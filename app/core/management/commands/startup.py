@@ -0,0 +1,111 @@
+"""
+Django command to prepare a container for serving, skipping unneeded work.
+
+Runs wait_for_db, collectstatic and migrate in one process. collectstatic is
+skipped when the static sources are unchanged since the last run against the
+same volume, and migrate when the one query listing applied migrations shows
+nothing to apply.
+"""
+import hashlib
+import os
+import time
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.migrations.loader import MigrationLoader
+
+MANIFEST_NAME = ".static-manifest"
+
+
+def static_manifest_hash():
+    """Return a hash of the path, size and mtime of every static source."""
+    digest = hashlib.sha256()
+    entries = []
+    for finder in finders.get_finders():
+        for path, storage in finder.list([]):
+            stat = os.stat(storage.path(path))
+            entries.append(f"{path}\0{stat.st_size}\0{stat.st_mtime_ns}\n")
+    for entry in sorted(entries):
+        digest.update(entry.encode())
+    return digest.hexdigest()
+
+
+class Command(BaseCommand):
+    """
+    Django command to wait for the database, collect static files and migrate.
+    """
+
+    help = "Prepare the container for serving, skipping work that is up to date."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Always run collectstatic and migrate.",
+        )
+        parser.add_argument(
+            "--schema-dir",
+            help="Also write openapi.yaml and openapi.json to this directory.",
+        )
+
+    def _phase(self, name, func):
+        start = time.perf_counter()
+        result = func()
+        elapsed = (time.perf_counter() - start) * 1000
+        self.stdout.write(f"startup: {name} {result} in {elapsed:.0f}ms")
+
+    def _wait_for_db(self):
+        call_command("wait_for_db")
+        return "done"
+
+    def _collectstatic(self, force):
+        manifest = os.path.join(settings.STATIC_ROOT, MANIFEST_NAME)
+        current = static_manifest_hash()
+        if not force and os.path.exists(manifest):
+            with open(manifest) as fh:
+                if fh.read() == current:
+                    return "skipped (static files unchanged)"
+
+        call_command("collectstatic", interactive=False, verbosity=0)
+        with open(manifest, "w") as fh:
+            fh.write(current)
+        return "done"
+
+    def _migrate(self, force):
+        if not force:
+            # Loads the migrations from disk and lists the applied ones in a
+            # single query.
+            loader = MigrationLoader(connection, ignore_no_migrations=True)
+            if set(loader.graph.nodes) <= set(loader.applied_migrations):
+                return "skipped (no unapplied migrations)"
+
+        call_command("migrate", interactive=False, verbosity=0)
+        return "done"
+
+    def _schema(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        for name, schema_format in [
+            ("openapi.yaml", "openapi"),
+            ("openapi.json", "openapi-json"),
+        ]:
+            call_command(
+                "spectacular",
+                file=os.path.join(directory, name),
+                format=schema_format,
+            )
+        return "done"
+
+    def handle(self, *args, **options):
+        """Entry point for command."""
+        start = time.perf_counter()
+        self._phase("wait_for_db", self._wait_for_db)
+        self._phase("collectstatic", lambda: self._collectstatic(options["force"]))
+        self._phase("migrate", lambda: self._migrate(options["force"]))
+        if options["schema_dir"]:
+            self._phase("schema", lambda: self._schema(options["schema_dir"]))
+
+        elapsed = (time.perf_counter() - start) * 1000
+        self.stdout.write(self.style.SUCCESS(f"startup: ready in {elapsed:.0f}ms"))
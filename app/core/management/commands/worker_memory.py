@@ -0,0 +1,91 @@
+"""
+Django command to report the memory use of running server workers.
+"""
+import os
+import time
+import urllib.request
+
+from django.core.management.base import BaseCommand, CommandError
+
+FIELDS = (
+    "Rss",
+    "Pss",
+    "Shared_Clean",
+    "Shared_Dirty",
+    "Private_Clean",
+    "Private_Dirty",
+)
+
+
+def _memory(pid):
+    """Return the smaps_rollup counters of a process, in kB."""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as fh:
+        for line in fh:
+            name, _, value = line.partition(":")
+            if name in FIELDS:
+                values[name] = int(value.split()[0])
+    return values
+
+
+def _processes(match):
+    """Yield (pid, command line) of the processes whose command matches."""
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit() or int(entry) == os.getpid():
+            continue
+        try:
+            with open(f"/proc/{entry}/cmdline", "rb") as fh:
+                cmdline = fh.read().replace(b"\0", b" ").decode().strip()
+        except OSError:
+            continue
+        if match in cmdline:
+            yield int(entry), cmdline
+
+
+class Command(BaseCommand):
+    """
+    Django command to print per-process RSS, PSS and shared memory.
+    """
+
+    help = "Report RSS/PSS of server processes and first-request latency."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--match", default="uwsgi", help="Substring of the command lines."
+        )
+        parser.add_argument(
+            "--url",
+            help="Also time requests to this URL, e.g. right after a restart.",
+        )
+        parser.add_argument("--requests", type=int, default=1)
+
+    def handle(self, *args, **options):
+        """Entry point for command."""
+        processes = sorted(_processes(options["match"]))
+        if not processes:
+            raise CommandError(f"No process matches '{options['match']}'.")
+
+        self.stdout.write(
+            f"{'pid':>8} {'rss':>8} {'pss':>8} {'shared':>8} {'private':>8}  (MiB)"
+        )
+        total_pss = 0
+        for pid, cmdline in processes:
+            try:
+                memory = _memory(pid)
+            except OSError:
+                continue
+            shared = memory["Shared_Clean"] + memory["Shared_Dirty"]
+            private = memory["Private_Clean"] + memory["Private_Dirty"]
+            total_pss += memory["Pss"]
+            self.stdout.write(
+                f"{pid:>8} {memory['Rss'] / 1024:>8.1f} {memory['Pss'] / 1024:>8.1f} "
+                f"{shared / 1024:>8.1f} {private / 1024:>8.1f}  {cmdline[:60]}"
+            )
+        self.stdout.write(f"Total PSS: {total_pss / 1024:.1f} MiB")
+
+        for index in range(options["url"] and options["requests"] or 0):
+            start = time.perf_counter()
+            with urllib.request.urlopen(options["url"]) as response:
+                response.read()
+            elapsed = (time.perf_counter() - start) * 1000
+            self.stdout.write(f"Request {index + 1}: {elapsed:.1f}ms")
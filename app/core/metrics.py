@@ -0,0 +1,86 @@
+"""
+Prometheus metrics for the API.
+
+Every uwsgi worker is a separate process. When ``PROMETHEUS_MULTIPROC_DIR``
+is set each worker writes its values to mmap'd files in that directory and a
+scrape of any worker aggregates all of them into whole-server totals.
+"""
+import os
+
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+REQUESTS = Counter(
+    "api_requests_total",
+    "HTTP requests handled, by view and action.",
+    ["view", "method", "status"],
+)
+LATENCY = Histogram(
+    "api_request_duration_seconds",
+    "Time spent handling a request, by view and action.",
+    ["view"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+QUERIES = Histogram(
+    "api_request_db_queries",
+    "Database queries issued per request, by view and action.",
+    ["view"],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200),
+)
+AUTH_TOKEN_CACHE = Counter(
+    "api_auth_token_cache_total",
+    "Token authentication cache lookups, by result.",
+    ["result"],
+)
+COMPRESSION_CACHE = Counter(
+    "api_compression_cache_total",
+    "Compressed response cache lookups, by result.",
+    ["result"],
+)
+
+
+class QueryCounter:
+    """Database execute wrapper counting the queries it sees."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def view_label(request):
+    """Return a low cardinality label for the view that handled a request.
+
+    DRF viewsets are labelled ``ViewSet.action`` (``RecipeViewSet.list``),
+    API views by class or function name and anything else by URL name.
+    """
+    match = request.resolver_match
+    if match is None:
+        return "unresolved"
+
+    view_class = getattr(match.func, "cls", None)
+    actions = getattr(match.func, "actions", None)
+    if actions:
+        action = actions.get(request.method.lower())
+        return f"{view_class.__name__}.{action}" if action else view_class.__name__
+    if view_class is not None:
+        return view_class.__name__
+    return match.view_name or match.func.__name__
+
+
+def render_latest():
+    """Render the current metric values in the Prometheus text format."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry)
@@ -0,0 +1,211 @@
+"""
+Middleware for the API.
+"""
+import hashlib
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.utils.cache import patch_vary_headers
+
+from core import compression, metrics
+from core.timing import RequestTimings, current_timings
+
+logger = logging.getLogger("core.timing")
+
+
+class RequestTimingMiddleware:
+    """Measure query count, DB, serializer and view time per request.
+
+    The timings are returned in a ``Server-Timing`` header and logged as one
+    JSON line per request; requests over the configured thresholds are logged
+    as warnings. Streaming responses load their rows while the body is sent,
+    after the headers: they are timed until the last chunk and only logged.
+    Removed from the stack entirely unless ``REQUEST_TIMING`` is enabled.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_TIMING:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = RequestTimings()
+        token = timings.activate()
+        try:
+            with connection.execute_wrapper(timings):
+                response = self.get_response(request)
+        finally:
+            RequestTimings.deactivate(token)
+
+        if response.streaming:
+            chunks = iter(response.streaming_content)
+            response.streaming_content = self._timed_stream(
+                request, response, timings, chunks
+            )
+            return response
+
+        timings.finish()
+        response["Server-Timing"] = timings.server_timing()
+        self._log(request, response, timings)
+        return response
+
+    def _timed_stream(self, request, response, timings, chunks):
+        """Yield the streamed chunks, timing the work done to produce them."""
+        try:
+            while True:
+                token = timings.activate()
+                try:
+                    with connection.execute_wrapper(timings):
+                        chunk = next(chunks, None)
+                finally:
+                    RequestTimings.deactivate(token)
+                if chunk is None:
+                    return
+                yield chunk
+        finally:
+            timings.finish()
+            self._log(request, response, timings)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timings = current_timings()
+        if timings is not None:
+            timings.view_start = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # Called once the view returned, before the response is rendered.
+        timings = current_timings()
+        if timings is not None and timings.view_start is not None:
+            timings.view = time.perf_counter() - timings.view_start
+        return response
+
+    def _log(self, request, response, timings):
+        record = timings.as_dict()
+        slow = (
+            record["total_ms"] > settings.REQUEST_TIMING_SLOW_MS
+            or record["queries"] > settings.REQUEST_TIMING_MAX_QUERIES
+        )
+        match = request.resolver_match
+        record.update(
+            {
+                "method": request.method,
+                "path": request.path,
+                "view": match.view_name if match else None,
+                "status": response.status_code,
+                "slow": slow,
+            }
+        )
+        level = logging.WARNING if slow else logging.INFO
+        logger.log(level, json.dumps(record, sort_keys=True))
+
+
+class MetricsMiddleware:
+    """Record request counts, latency and query counts per view and action."""
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = metrics.QueryCounter()
+        start = time.perf_counter()
+        with connection.execute_wrapper(queries):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        view = metrics.view_label(request)
+        metrics.REQUESTS.labels(view, request.method, response.status_code).inc()
+        metrics.LATENCY.labels(view).observe(elapsed)
+        metrics.QUERIES.labels(view).observe(queries.count)
+        return response
+
+
+class CompressionMiddleware:
+    """Compress responses with the best coding the client accepts.
+
+    Only JSON and OpenAPI responses of at least ``COMPRESSION_MIN_SIZE``
+    bytes are compressed, streaming responses chunk by chunk. HTML pages (the
+    admin, the browsable API) are left alone: they embed the CSRF token next
+    to reflected input, which compression would expose to BREACH. The
+    compressed body of a response with an ETag is cached by path, ETag and
+    Content-Type, so repeated requests for the same representation are not
+    compressed again.
+    """
+
+    content_types = ("application/json",)
+
+    def __init__(self, get_response):
+        if not settings.COMPRESSION_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not self._compressible(response):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        coding = compression.negotiate(
+            request.META.get("HTTP_ACCEPT_ENCODING", ""), compression.CODECS
+        )
+        if coding is None:
+            return response
+
+        compress, compress_sequence = compression.CODECS[coding]
+        if response.streaming:
+            response.streaming_content = compress_sequence(response.streaming_content)
+            del response.headers["Content-Length"]
+        else:
+            content = self._compress_content(request, response, coding, compress)
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response.headers["Content-Length"] = str(len(content))
+
+        # The compressed body is a different representation of the resource.
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = coding
+        return response
+
+    def _compressible(self, response):
+        if response.has_header("Content-Encoding"):
+            return False
+        content_type = response.get("Content-Type", "").split(";")[0].strip()
+        if not (
+            content_type in self.content_types
+            or content_type.endswith("+json")
+            or content_type.startswith("application/vnd.oai.openapi")
+        ):
+            return False
+        return response.streaming or (
+            len(response.content) >= settings.COMPRESSION_MIN_SIZE
+        )
+
+    def _compress_content(self, request, response, coding, compress):
+        etag = response.get("ETag")
+        if not etag or not settings.COMPRESSION_CACHE_TTL:
+            return compress(response.content)
+
+        key = (
+            "compressed:"
+            + hashlib.sha256(
+                f"{coding}:{request.get_full_path()}:{etag}:"
+                f"{response.get('Content-Type', '')}".encode()
+            ).hexdigest()
+        )
+        content = cache.get(key)
+        if content is not None:
+            metrics.COMPRESSION_CACHE.labels("hit").inc()
+            return content
+
+        metrics.COMPRESSION_CACHE.labels("miss").inc()
+        content = compress(response.content)
+        cache.set(key, content, settings.COMPRESSION_CACHE_TTL)
+        return content
@@ -0,0 +1,57 @@
+# Generated by Django 4.1.13 on 2026-10-19 04:32
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_recipes(apps, schema_editor):
+    """Set recipe_count of existing tags and ingredients."""
+    Recipe = apps.get_model("core", "Recipe")
+    for name, through in [
+        ("tag", Recipe.tags.through),
+        ("ingredient", Recipe.ingredients.through),
+    ]:
+        counts = (
+            through.objects.filter(**{name: OuterRef("pk")})
+            .order_by()
+            .values(name)
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+        apps.get_model("core", name).objects.update(
+            recipe_count=Coalesce(Subquery(counts), 0)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0005_recipe_image"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ingredient",
+            name="recipe_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="tag",
+            name="recipe_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_recipes, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="ingredient",
+            index=models.Index(
+                fields=["user", "recipe_count"], name="core_ingred_user_id_de1121_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="tag",
+            index=models.Index(
+                fields=["user", "recipe_count"], name="core_tag_user_id_699afc_idx"
+            ),
+        ),
+    ]
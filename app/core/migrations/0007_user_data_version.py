@@ -0,0 +1,18 @@
+# Generated by Django 4.1.13 on 2026-10-19 04:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0006_recipe_count"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="data_version",
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
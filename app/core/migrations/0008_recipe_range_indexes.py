@@ -0,0 +1,26 @@
+# Generated by Django 4.1.13 on 2026-10-19 04:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0007_user_data_version"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(
+                fields=["user", "time_minutes", "id"],
+                name="core_recipe_user_id_93b1a9_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(
+                fields=["user", "price", "id"], name="core_recipe_user_id_4dae59_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.1.13 on 2026-10-19 04:47
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_duplicate_names(apps, schema_editor):
+    """Merge tags and ingredients with the same user and name into the oldest."""
+    Recipe = apps.get_model("core", "Recipe")
+    for name, through in [
+        ("tag", Recipe.tags.through),
+        ("ingredient", Recipe.ingredients.through),
+    ]:
+        model = apps.get_model("core", name)
+        groups = (
+            model.objects.values("user_id", "name")
+            .annotate(count=Count("id"), target=Min("id"))
+            .filter(count__gt=1)
+            .order_by()
+        )
+        for group in list(groups):
+            sources = model.objects.filter(
+                user_id=group["user_id"], name=group["name"]
+            ).exclude(pk=group["target"])
+            linked = through.objects.filter(**{f"{name}_id": group["target"]})
+            recipe_ids = (
+                through.objects.filter(**{f"{name}__in": sources})
+                .exclude(recipe_id__in=linked.values("recipe_id"))
+                .values_list("recipe_id", flat=True)
+                .distinct()
+            )
+            through.objects.bulk_create(
+                [
+                    through(recipe_id=recipe_id, **{f"{name}_id": group["target"]})
+                    for recipe_id in recipe_ids
+                ]
+            )
+            sources.delete()
+            model.objects.filter(pk=group["target"]).update(
+                recipe_count=linked.count()
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0008_recipe_range_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_names, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.1.13 on 2026-10-19 04:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0010_unique_names"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="pending_deletion",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="pending_deletion",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(
+                condition=models.Q(("pending_deletion", True)),
+                fields=["id"],
+                name="recipe_pending_deletion",
+            ),
+        ),
+    ]
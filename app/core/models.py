@@ -10,7 +10,10 @@ from django.contrib.auth.models import (
     BaseUserManager,
     PermissionsMixin,
 )
-from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 
 
 def recipe_image_file_path(instance, filename):
@@ -51,6 +54,12 @@ class User(AbstractBaseUser, PermissionsMixin):
     name = models.CharField(max_length=255)
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
+    # Bumped by core.signals whenever the user's recipes, tags or ingredients
+    # change; caches of data derived from them are keyed by it.
+    data_version = models.PositiveBigIntegerField(default=0)
+    # Set (with is_active cleared) when the user deletes their account; the
+    # account is then deleted in batches by the purge_deleted command.
+    pending_deletion = models.BooleanField(default=False)
 
     objects = UserManager()
 
@@ -59,8 +68,81 @@ class User(AbstractBaseUser, PermissionsMixin):
     def __str__(self):
         return self.email
 
+    def save(self, *args, **kwargs):
+        # data_version is only changed with F() updates; don't write back a
+        # value loaded before the last bump.
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != "data_version"
+            ]
+        super().save(*args, **kwargs)
 
-class Recipe(models.Model):
+
+def next_change_seq(user_id):
+    """Bump a user's data_version and return it as the sequence of a change.
+
+    Call it in the transaction of the change: the update locks the user row
+    until commit, so a user's changes commit in sequence order and a client
+    that has seen every change up to a sequence number misses none below it.
+    """
+    User.objects.filter(pk=user_id).update(data_version=F("data_version") + 1)
+    return User.objects.filter(pk=user_id).values_list("data_version", flat=True).get()
+
+
+class SyncedModel(models.Model):
+    """Base of the models clients sync by change sequence (see recipe.sync)."""
+
+    updated_at = models.DateTimeField(auto_now=True)
+    # The owner's data_version of the last change, set on save and by
+    # core.signals.record_changes for set-wise updates.
+    change_seq = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            self.change_seq = next_change_seq(self.user_id)
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {
+                    *kwargs["update_fields"],
+                    "change_seq",
+                    "updated_at",
+                }
+            super().save(*args, **kwargs)
+
+
+class RecipeCountQuerySet(models.QuerySet):
+    """QuerySet for objects with a denormalized ``recipe_count``."""
+
+    def recipe_counts(self):
+        """Return an expression counting the recipes linked to each row.
+
+        Recipes marked for deletion are not counted, as the API hides them.
+        """
+        relation = self.model._meta.get_field("recipe")
+        column = relation.field.m2m_reverse_field_name()
+        recipe = relation.field.m2m_field_name()
+        counts = (
+            relation.through.objects.filter(
+                **{column: OuterRef("pk"), f"{recipe}__pending_deletion": False}
+            )
+            .order_by()
+            .values(column)
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+        return Coalesce(Subquery(counts), 0)
+
+    def refresh_recipe_counts(self):
+        """Recompute ``recipe_count`` set-wise, returning the rows fixed."""
+        counts = self.recipe_counts()
+        return self.exclude(recipe_count=counts).update(recipe_count=counts)
+
+
+class Recipe(SyncedModel):
     """Recipe Object."""
 
     user = models.ForeignKey(
@@ -75,12 +157,35 @@ class Recipe(models.Model):
     tags = models.ManyToManyField("Tag")
     ingredients = models.ManyToManyField("Ingredient")
     image = models.ImageField(null=True, blank=True, upload_to=recipe_image_file_path)
+    # Set by bulk deletes; the API hides these recipes and the purge_deleted
+    # command deletes them in batches.
+    pending_deletion = models.BooleanField(default=False)
+
+    class Meta:
+        # Back the range filters and orderings of the recipe list; the id
+        # breaks ties for keyset pagination.
+        indexes = [
+            models.Index(fields=["user", "change_seq", "id"]),
+            models.Index(fields=["user", "time_minutes", "id"]),
+            models.Index(fields=["user", "price", "id"]),
+            models.Index(
+                fields=["id"],
+                condition=models.Q(pending_deletion=True),
+                name="recipe_pending_deletion",
+            ),
+            # Prefix (LIKE 'x%') searches of the admin.
+            models.Index(
+                fields=["title"],
+                name="recipe_title_prefix",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
 
-class Tag(models.Model):
+class Tag(SyncedModel):
     """Tag Object for filtering recipes."""
 
     user = models.ForeignKey(
@@ -88,12 +193,32 @@ class Tag(models.Model):
         on_delete=models.CASCADE,
     )
     name = models.CharField(max_length=255)
+    # Number of recipes using it, not counting those marked for deletion;
+    # maintained by core.signals.
+    recipe_count = models.PositiveIntegerField(default=0)
+
+    objects = RecipeCountQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "change_seq", "id"]),
+            models.Index(fields=["user", "recipe_count"]),
+            # Prefix (LIKE 'x%') searches of the admin.
+            models.Index(
+                fields=["name"],
+                name="tag_name_prefix",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["user", "name"], name="unique_tag_name")
+        ]
 
     def __str__(self):
         return self.name
 
 
-class Ingredient(models.Model):
+class Ingredient(SyncedModel):
     """Ingredient Object."""
 
     user = models.ForeignKey(
@@ -101,6 +226,72 @@ class Ingredient(models.Model):
         on_delete=models.CASCADE,
     )
     name = models.CharField(max_length=255)
+    # Number of recipes using it, not counting those marked for deletion;
+    # maintained by core.signals.
+    recipe_count = models.PositiveIntegerField(default=0)
+
+    objects = RecipeCountQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "change_seq", "id"]),
+            models.Index(fields=["user", "recipe_count"]),
+            models.Index(
+                fields=["name"],
+                name="ingredient_name_prefix",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "name"], name="unique_ingredient_name"
+            )
+        ]
 
     def __str__(self):
         return self.name
+
+
+class Tombstone(models.Model):
+    """Record of a deleted recipe, tag or ingredient, for syncing clients."""
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+    )
+    # Model name of the deleted object.
+    kind = models.CharField(max_length=20)
+    object_id = models.BigIntegerField()
+    change_seq = models.PositiveBigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["user", "change_seq", "id"])]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}"
+
+
+class IdempotencyKey(models.Model):
+    """Response of a write request sent with an Idempotency-Key header."""
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+    )
+    key = models.CharField(max_length=255)
+    # Hash of the method, path and body the key was first used with.
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response = models.JSONField(encoder=DjangoJSONEncoder, null=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "key"], name="unique_idempotency_key"
+            )
+        ]
+
+    def __str__(self):
+        return self.key
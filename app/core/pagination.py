@@ -0,0 +1,198 @@
+"""
+Keyset pagination for the API.
+"""
+import base64
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import DecimalField, IntegerField, Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def _planner_rows(queryset):
+    """Return PostgreSQL's estimate of the rows of a queryset, or None.
+
+    The planner scales the table size by the column statistics of the
+    filters (e.g. the share of rows of the user), without reading the rows.
+    """
+    if connections[queryset.db].vendor != "postgresql":
+        return None
+    plan = json.loads(queryset.order_by().explain(format="json"))
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def estimate_count(queryset, exact_limit):
+    """Return (count, is_exact) for a queryset.
+
+    Up to exact_limit rows are counted exactly, reading at most that many;
+    above it the planner estimate is used where available.
+    """
+    count = queryset.order_by()[: exact_limit + 1].count()
+    if count <= exact_limit:
+        return count, True
+
+    estimate = _planner_rows(queryset)
+    if estimate is None:
+        return queryset.count(), True
+    return max(estimate, count), False
+
+
+class KeysetPagination(BasePagination):
+    """Opt-in keyset ("seek") pagination over the queryset's ordering.
+
+    Only used when the client sends ``limit`` or ``cursor``, so unpaginated
+    clients keep getting a plain list. The cursor holds the ordering values
+    of the last row of a page and the next page filters on them, so every
+    page is an index range scan however deep it is. The ordering must end
+    with a unique field (e.g. ``("-price", "-id")``).
+
+    Pages also carry the total ``count`` of the list, which is exact up to
+    ``EXACT_COUNT_LIMIT`` and an estimate above (``count_is_exact``).
+    """
+
+    limit_query_param = "limit"
+    cursor_query_param = "cursor"
+    default_limit = 50
+    max_limit = 500
+
+    def is_requested(self, request):
+        """Return whether the client asked for a paginated response."""
+        return (
+            self.limit_query_param in request.query_params
+            or self.cursor_query_param in request.query_params
+        )
+
+    def _get_limit(self, request):
+        value = request.query_params.get(self.limit_query_param)
+        if value is None:
+            return self.default_limit
+        try:
+            limit = int(value)
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= self.max_limit:
+            raise ValidationError(
+                {
+                    self.limit_query_param: [
+                        f"Must be an integer between 1 and {self.max_limit}."
+                    ]
+                }
+            )
+        return limit
+
+    def _encode_cursor(self, values):
+        payload = json.dumps([self.ordering, [str(value) for value in values]])
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def _decode_cursor(self, cursor, queryset):
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            ordering, values = json.loads(base64.urlsafe_b64decode(padded))
+            if ordering != self.ordering or len(values) != len(ordering):
+                raise ValueError
+            return [
+                self._to_python(queryset.model, name.lstrip("-"), value)
+                for name, value in zip(ordering, values)
+            ]
+        except (ValueError, TypeError, InvalidOperation):
+            raise ValidationError({self.cursor_query_param: ["Invalid cursor."]})
+
+    def _to_python(self, model, name, value):
+        field = model._meta.get_field(name)
+        if isinstance(field, DecimalField):
+            return Decimal(value)
+        if isinstance(field, IntegerField):
+            return int(value)
+        return str(value)
+
+    def _after(self, values):
+        """Return a filter selecting the rows sorted after the given values."""
+        names = [name.lstrip("-") for name in self.ordering]
+        ops = ["lt" if name.startswith("-") else "gt" for name in self.ordering]
+        condition = Q()
+        for index in range(len(names) - 1, -1, -1):
+            after = Q(**{f"{names[index]}__{ops[index]}": values[index]})
+            if index < len(names) - 1:
+                after |= Q(**{names[index]: values[index]}) & condition
+            condition = after
+        # A plain range on the leading column lets the database start the
+        # index scan at the cursor.
+        start = "lte" if ops[0] == "lt" else "gte"
+        return Q(**{f"{names[0]}__{start}": values[0]}) & condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Return the page as a sliced queryset, or None if not requested."""
+        if not self.is_requested(request):
+            return None
+
+        self.request = request
+        self.limit = self._get_limit(request)
+        self.ordering = list(queryset.query.order_by)
+        self.count, self.count_is_exact = estimate_count(
+            queryset, settings.EXACT_COUNT_LIMIT
+        )
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(
+                self._after(self._decode_cursor(cursor, queryset))
+            )
+
+        # The ordering keys come from the index alone; the page itself is
+        # loaded by the caller, with whatever columns it renders.
+        names = [name.lstrip("-") for name in self.ordering]
+        keys = list(queryset.values_list(*names)[: self.limit + 1])
+        self.next_values = keys[self.limit - 1] if len(keys) > self.limit else None
+        return queryset[: self.limit]
+
+    def get_next_link(self):
+        if self.next_values is None:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        return replace_query_param(
+            url, self.cursor_query_param, self._encode_cursor(self.next_values)
+        )
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "count": self.count,
+                "count_is_exact": self.count_is_exact,
+                "next": self.get_next_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "count": {"type": "integer"},
+                "count_is_exact": {"type": "boolean"},
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.limit_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Number of results per page; enables pagination.",
+                "schema": {"type": "integer"},
+            },
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Cursor of the page, from the previous page's next.",
+                "schema": {"type": "string"},
+            },
+        ]
@@ -0,0 +1,123 @@
+"""
+Batched deletion of the recipes and accounts marked for deletion.
+
+Deleting through the ORM collects every related object in memory and sends
+signals for each of them, which for a large account holds locks for long.
+Here rows are deleted set-wise, a bounded batch per short transaction: the
+recipe links, then the recipes (and their images), and for accounts the tags,
+ingredients and finally the user. Expired idempotency keys and sync tombstones
+are removed along the way.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import IdempotencyKey, Ingredient, Recipe, Tag, Tombstone
+from core.signals import bump_data_version
+
+RELATIONS = ("tags", "ingredients")
+
+
+def _raw_delete(model, ids):
+    """Delete rows by id in one statement, without collector or signals."""
+    return model.objects.filter(pk__in=ids)._raw_delete(model.objects.db)
+
+
+def _purge_recipes(queryset, batch_size):
+    """Delete a batch of the recipes in the queryset, returning how many."""
+    rows = list(
+        queryset.order_by("pk").values_list("pk", "user_id", "image")[:batch_size]
+    )
+    if not rows:
+        return 0
+
+    ids = [pk for pk, _, _ in rows]
+    with transaction.atomic():
+        # recipe_count was updated when the recipes were marked for deletion
+        # (or their whole account is purged).
+        for name in RELATIONS:
+            Recipe._meta.get_field(name).remote_field.through.objects.filter(
+                recipe_id__in=ids
+            ).delete()
+        deleted = _raw_delete(Recipe, ids)
+        for user_id in {user_id for _, user_id, _ in rows}:
+            bump_data_version(user_id)
+
+    storage = Recipe._meta.get_field("image").storage
+    for _, _, image in rows:
+        if image:
+            storage.delete(image)
+    return deleted
+
+
+def _purge_user(user, batch_size):
+    """Delete a batch of a pending account's data, or the emptied account."""
+    deleted = _purge_recipes(Recipe.objects.filter(user=user), batch_size)
+    if deleted:
+        return deleted
+
+    # No recipes are left, so nothing links to the tags and ingredients.
+    for model in (Tag, Ingredient):
+        ids = list(
+            model.objects.filter(user=user)
+            .order_by("pk")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if ids:
+            return _raw_delete(model, ids)
+
+    # Only small relations (tokens, groups) are left.
+    user.delete()
+    return 1
+
+
+def purge_user(user, batch_size=1000):
+    """Delete an account and all of its data now, returning rows deleted."""
+    deleted = 0
+    while user.pk is not None:
+        # The last batch deletes the user, which clears its pk.
+        deleted += _purge_user(user, batch_size)
+    return deleted
+
+
+def _purge_idempotency_keys(batch_size):
+    """Delete a batch of expired idempotency keys, returning how many."""
+    ids = list(
+        IdempotencyKey.objects.filter(expires_at__lte=timezone.now())
+        .order_by("pk")
+        .values_list("pk", flat=True)[:batch_size]
+    )
+    return _raw_delete(IdempotencyKey, ids) if ids else 0
+
+
+def _purge_tombstones(batch_size):
+    """Delete a batch of tombstones older than any valid sync token."""
+    cutoff = timezone.now() - timedelta(seconds=settings.SYNC_TOKEN_TTL)
+    ids = list(
+        Tombstone.objects.filter(deleted_at__lt=cutoff)
+        .order_by("pk")
+        .values_list("pk", flat=True)[:batch_size]
+    )
+    return _raw_delete(Tombstone, ids) if ids else 0
+
+
+def purge(batch_size=1000):
+    """Delete one batch of pending recipes or accounts, returning rows deleted.
+
+    Returns 0 once nothing is left to delete.
+    """
+    deleted = _purge_idempotency_keys(batch_size) + _purge_tombstones(batch_size)
+    if deleted:
+        return deleted
+
+    deleted = _purge_recipes(Recipe.objects.filter(pending_deletion=True), batch_size)
+    if deleted:
+        return deleted
+
+    user = get_user_model().objects.filter(pending_deletion=True).first()
+    if user is None:
+        return 0
+    return _purge_user(user, batch_size)
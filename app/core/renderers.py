@@ -0,0 +1,89 @@
+"""
+JSON renderers for the API.
+"""
+from decimal import Decimal
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+# Streamed list responses are sent in chunks of about this many bytes.
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class DecimalJSONEncoder(JSONEncoder):
+    """DRF's JSON encoder, rendering Decimals as exact strings."""
+
+    def default(self, obj):
+        if isinstance(obj, Decimal):
+            # Same representation as DecimalField, instead of a lossy float.
+            return str(obj)
+        return super().default(obj)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """Render JSON with orjson, byte for byte like DRF's JSONRenderer.
+
+    Falls back to the stdlib ``json`` module when orjson is not installed and
+    for indented output (the browsable API). ``iter_render`` renders a list
+    item by item so large responses can be streamed.
+    """
+
+    encoder_class = DecimalJSONEncoder
+
+    def _use_orjson(self, accepted_media_type, renderer_context):
+        return (
+            orjson is not None
+            and self.compact
+            and not self.ensure_ascii
+            and self.get_indent(accepted_media_type, renderer_context or {}) is None
+        )
+
+    def _dumps(self, data):
+        # Datetimes go through DRF's encoder to keep its format ("Z" suffix,
+        # millisecond precision).
+        rendered = orjson.dumps(
+            data,
+            default=self.encoder_class().default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+        )
+        # Like DRF, escape the separators that are invalid in JavaScript.
+        return rendered.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render data into JSON, returning a bytestring."""
+        if data is None:
+            return b""
+        if not self._use_orjson(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+        return self._dumps(data)
+
+    def iter_render(self, items, accepted_media_type=None, renderer_context=None):
+        """Yield the rendering of a list of items in chunks.
+
+        The joined chunks are exactly what ``render(list(items))`` returns.
+        """
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            yield self.render(list(items), accepted_media_type, renderer_context)
+            return
+
+        if self._use_orjson(accepted_media_type, renderer_context):
+            dumps = self._dumps
+        else:
+            dumps = super().render
+        chunk = bytearray(b"[")
+        for index, item in enumerate(items):
+            if index:
+                chunk += b","
+            chunk += b"null" if item is None else dumps(item)
+            if len(chunk) >= STREAM_CHUNK_SIZE:
+                yield bytes(chunk)
+                chunk.clear()
+        chunk += b"]"
+        yield bytes(chunk)
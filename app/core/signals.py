@@ -0,0 +1,151 @@
+"""
+Signal handlers for the core app.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from core.authentication import token_cache_key
+from core.models import Ingredient, Recipe, Tag, Tombstone, next_change_seq
+
+
+@receiver(post_delete, sender=Token)
+def evict_deleted_token(sender, instance, **kwargs):
+    """Drop a deleted token from the authentication cache."""
+    caches["auth"].delete(token_cache_key(instance.key))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def evict_user_tokens(sender, instance, created, **kwargs):
+    """Drop a user's cached tokens so changes (e.g. deactivation) apply."""
+    if created or not settings.AUTH_TOKEN_CACHE_TTL:
+        return
+    keys = Token.objects.filter(user=instance).values_list("key", flat=True)
+    caches["auth"].delete_many([token_cache_key(key) for key in keys])
+
+
+def _adjust_recipe_count(queryset, delta):
+    """Add delta to recipe_count of the rows in the queryset, in one query."""
+    if delta > 0:
+        queryset.update(recipe_count=F("recipe_count") + delta)
+    elif delta < 0:
+        queryset.update(recipe_count=Greatest(F("recipe_count") + delta, 0))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def count_recipe_links(sender, instance, action, reverse, model, pk_set, **kwargs):
+    """Keep recipe_count of tags and ingredients in step with recipe links.
+
+    Removals are counted before the links are deleted, so ids of objects that
+    were not linked are ignored. Django runs both in one transaction.
+    """
+    if reverse:
+        # tag.recipe_set.add(recipe, ...): a single counted object.
+        target = type(instance)._meta.model_name
+        counted = type(instance).objects.filter(pk=instance.pk)
+        if action == "post_add":
+            _adjust_recipe_count(counted, len(pk_set))
+        elif action == "pre_remove":
+            links = sender.objects.filter(**{target: instance, "recipe__in": pk_set})
+            _adjust_recipe_count(counted, -links.count())
+        elif action == "pre_clear":
+            counted.update(recipe_count=0)
+        return
+
+    if instance.pending_deletion:
+        # Not counted since it was marked for deletion.
+        return
+    if action == "post_add" and pk_set:
+        _adjust_recipe_count(model.objects.filter(pk__in=pk_set), 1)
+    elif action == "pre_remove" and pk_set:
+        linked = model.objects.filter(recipe=instance, pk__in=pk_set)
+        _adjust_recipe_count(linked, -1)
+    elif action == "pre_clear":
+        _adjust_recipe_count(model.objects.filter(recipe=instance), -1)
+
+
+@receiver(pre_delete, sender=Recipe)
+def uncount_deleted_recipe(sender, instance, **kwargs):
+    """Decrement recipe_count of the tags and ingredients of a deleted recipe."""
+    if instance.pending_deletion:
+        return
+    _adjust_recipe_count(Tag.objects.filter(recipe=instance), -1)
+    _adjust_recipe_count(Ingredient.objects.filter(recipe=instance), -1)
+
+
+def uncount_hidden_recipes(ids):
+    """Recount the tags and ingredients of recipes just marked for deletion."""
+    Tag.objects.filter(recipe__in=ids).refresh_recipe_counts()
+    Ingredient.objects.filter(recipe__in=ids).refresh_recipe_counts()
+
+
+def bump_data_version(user_id):
+    """Invalidate the caches derived from a user's recipes, tags and ingredients."""
+    get_user_model().objects.filter(pk=user_id).update(
+        data_version=F("data_version") + 1
+    )
+
+
+def record_changes(queryset, user_id):
+    """Stamp rows of a user changed by a set-wise statement as a new change.
+
+    Saving a row stamps it already (core.models.SyncedModel).
+    """
+    return queryset.update(
+        change_seq=next_change_seq(user_id), updated_at=timezone.now()
+    )
+
+
+def record_deletions(model, user_id, ids):
+    """Leave tombstones of a user's deleted (or hidden) rows for syncing."""
+    change_seq = next_change_seq(user_id)
+    Tombstone.objects.bulk_create(
+        [
+            Tombstone(
+                user_id=user_id,
+                kind=model._meta.model_name,
+                object_id=pk,
+                change_seq=change_seq,
+            )
+            for pk in ids
+        ],
+        batch_size=1000,
+    )
+
+
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def record_deleted_object(sender, instance, origin=None, **kwargs):
+    """Leave a tombstone of a deleted object, unless its owner is deleted."""
+    user_model = get_user_model()
+    if isinstance(origin, user_model) or getattr(origin, "model", None) is user_model:
+        return
+    record_deletions(sender, instance.user_id, [instance.pk])
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def record_linked_recipes(sender, instance, action, reverse, pk_set, **kwargs):
+    """Record the recipes whose links changed, for data_version and syncing."""
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            record_changes(Recipe.objects.filter(pk=instance.pk), instance.user_id)
+        return
+
+    # tag.recipe_set.add(recipe, ...): the recipes changed.
+    if action in ("post_add", "post_remove") and pk_set:
+        recipes = Recipe.objects.filter(pk__in=pk_set)
+    elif action == "pre_clear":
+        relation = "tags" if sender is Recipe.tags.through else "ingredients"
+        recipes = Recipe.objects.filter(**{relation: instance})
+    else:
+        return
+    record_changes(recipes, instance.user_id)
@@ -1,11 +1,17 @@
 """
 Test for the Django admin modifications.
 """
+from decimal import Decimal
+from unittest.mock import patch
+
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.test import Client
 
+from core.admin import EstimatedCountPaginator
+from core.models import Recipe, Tag
+
 
 class AdminSiteTests(TestCase):
     """Tests for Django Admin."""
@@ -45,3 +51,113 @@ class AdminSiteTests(TestCase):
         res = self.client.get(url)
 
         self.assertEqual(res.status_code, 200)
+
+    def create_recipe(self, **params):
+        defaults = {"title": "Soup", "time_minutes": 5, "price": Decimal("1.00")}
+        defaults.update(params)
+        return Recipe.objects.create(user=self.user, **defaults)
+
+    def test_mark_users_for_deletion(self):
+        """Test users are deactivated for background deletion, not deleted."""
+        self.create_recipe()
+        url = reverse("admin:core_user_changelist")
+
+        res = self.client.post(
+            url, {"action": "mark_for_deletion", "_selected_action": [self.user.pk]}
+        )
+
+        self.assertEqual(res.status_code, 302)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.pending_deletion)
+        self.assertFalse(self.user.is_active)
+        self.assertTrue(Recipe.objects.filter(user=self.user).exists())
+        res = self.client.get(reverse("admin:core_user_delete", args=[self.user.pk]))
+        self.assertEqual(res.status_code, 403)
+
+    def test_recipes_list(self):
+        """Test recipes are listed with their users in a fixed number of queries."""
+        for n in range(5):
+            self.create_recipe(title=f"Soup {n}")
+        url = reverse("admin:core_recipe_changelist")
+
+        # Session, user, a single count and the recipes joined with users.
+        with self.assertNumQueries(4):
+            res = self.client.get(url)
+
+        self.assertContains(res, "Soup 4")
+        self.assertContains(res, self.user.email)
+
+    def test_search_recipes(self):
+        """Test searching recipes by title prefix and by exact user email."""
+        self.create_recipe(title="Tomato soup")
+        self.create_recipe(title="Pancakes")
+        url = reverse("admin:core_recipe_changelist")
+
+        res = self.client.get(url, {"q": "Tomato"})
+        self.assertContains(res, "Tomato soup")
+        self.assertNotContains(res, "Pancakes")
+
+        res = self.client.get(url, {"q": self.user.email})
+        self.assertContains(res, "Pancakes")
+
+    def test_edit_recipe_page(self):
+        """Test the edit recipe page does not list every tag."""
+        recipe = self.create_recipe()
+        Tag.objects.create(user=self.user, name="Unrelated tag")
+        url = reverse("admin:core_recipe_change", args=[recipe.pk])
+
+        res = self.client.get(url)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertNotContains(res, "Unrelated tag")
+
+    def test_mark_recipes_for_deletion(self):
+        """Test the bulk action marks recipes for background deletion."""
+        recipe = self.create_recipe()
+        tag = Tag.objects.create(user=self.user, name="Vegan")
+        recipe.tags.add(tag)
+        url = reverse("admin:core_recipe_changelist")
+
+        res = self.client.post(
+            url, {"action": "mark_for_deletion", "_selected_action": [recipe.pk]}
+        )
+
+        self.assertEqual(res.status_code, 302)
+        recipe.refresh_from_db()
+        self.assertTrue(recipe.pending_deletion)
+        tag.refresh_from_db()
+        self.assertEqual(tag.recipe_count, 0)
+
+    def test_refresh_tag_recipe_counts(self):
+        """Test the bulk action recomputes recipe counts."""
+        tag = Tag.objects.create(user=self.user, name="Vegan")
+        self.create_recipe().tags.add(tag)
+        Tag.objects.update(recipe_count=0)
+        url = reverse("admin:core_tag_changelist")
+
+        self.client.post(
+            url, {"action": "refresh_recipe_counts", "_selected_action": [tag.pk]}
+        )
+
+        tag.refresh_from_db()
+        self.assertEqual(tag.recipe_count, 1)
+
+    def test_estimated_count_paginator_exact_on_small_tables(self):
+        """Test the paginator counts small tables exactly."""
+        self.create_recipe()
+
+        paginator = EstimatedCountPaginator(Recipe.objects.order_by("id"), 10)
+
+        self.assertEqual(paginator.count, 1)
+
+    def test_estimated_count_paginator_large_tables(self):
+        """Test the paginator uses the planner estimate above the limit."""
+        for _ in range(3):
+            self.create_recipe()
+
+        with self.settings(EXACT_COUNT_LIMIT=2), patch(
+            "core.pagination._planner_rows", return_value=5000
+        ):
+            paginator = EstimatedCountPaginator(Recipe.objects.order_by("id"), 10)
+
+            self.assertEqual(paginator.count, 5000)
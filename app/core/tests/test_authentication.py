@@ -0,0 +1,77 @@
+"""
+Tests for the cached token authentication.
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from prometheus_client import REGISTRY
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+ME_URL = reverse("user:me")
+
+
+def cache_hits():
+    """Return the number of token cache hits recorded so far."""
+    value = REGISTRY.get_sample_value("api_auth_token_cache_total", {"result": "hit"})
+    return value or 0
+
+
+@override_settings(AUTH_TOKEN_CACHE_TTL=60)
+class CachedTokenAuthenticationTests(TestCase):
+    """Test the cached token authentication."""
+
+    def setUp(self):
+        caches["auth"].clear()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com",
+            password="testpass123",
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def test_repeated_requests_hit_cache(self):
+        """Test a second request is authenticated from the cache."""
+        before = cache_hits()
+        self.client.get(ME_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(cache_hits(), before + 1)
+
+    def test_deleted_token_evicted(self):
+        """Test a deleted token stops authenticating immediately."""
+        self.client.get(ME_URL)
+        self.token.delete()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_evicted(self):
+        """Test deactivating a user stops their cached token working."""
+        self.client.get(ME_URL)
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_update_reloads_cached_user(self):
+        """Test updating the account does not save a stale cached user."""
+        self.client.get(ME_URL)
+        get_user_model().objects.filter(pk=self.user.pk).update(name="Fresh")
+
+        res = self.client.patch(ME_URL, {"password": "newpass123"})
+
+        self.user.refresh_from_db()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.user.name, "Fresh")
+        self.assertTrue(self.user.check_password("newpass123"))
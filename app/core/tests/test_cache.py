@@ -0,0 +1,61 @@
+"""
+Tests for the shared file cache.
+"""
+import shutil
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from core.cache import SharedFileCache
+
+
+class SharedFileCacheTests(SimpleTestCase):
+    """Test the file cache shared by the workers."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.cache = SharedFileCache(self.directory, {})
+
+    def test_set_does_not_scan(self):
+        """Test writes don't list the cache directory."""
+        with patch.object(SharedFileCache, "_list_cache_files") as listing:
+            for n in range(400):
+                self.cache.set(f"key-{n}", n)
+
+        listing.assert_not_called()
+        self.assertEqual(self.cache.get("key-0"), 0)
+
+    def test_delete_expired(self):
+        """Test only the expired entries are deleted."""
+        self.cache.set("old", 1)
+        self.cache.set("new", 2)
+        with patch("time.time", return_value=0):
+            self.cache.set("old", 1, 10)
+
+        self.assertEqual(self.cache.delete_expired(), 1)
+        self.assertEqual(len(self.cache._list_cache_files()), 1)
+        self.assertEqual(self.cache.get("new"), 2)
+
+    def test_purge_deleted_deletes_expired(self):
+        """Test purge_deleted deletes the expired entries of shared caches."""
+        shared = override_settings(
+            CACHES={
+                "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+                "throttle": {
+                    "BACKEND": "core.cache.SharedFileCache",
+                    "LOCATION": self.directory,
+                },
+            }
+        )
+        with shared:
+            with patch("time.time", return_value=0):
+                caches["throttle"].set("bucket", 1, 10)
+            with patch("core.management.commands.purge_deleted.purge", return_value=0):
+                call_command("purge_deleted", stdout=StringIO())
+
+            self.assertEqual(caches["throttle"]._list_cache_files(), [])
@@ -2,14 +2,30 @@
 Test Custom Django management commands
 """
 
+import json
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+from io import StringIO
 from unittest.mock import patch
 
-from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import CommandError, call_command
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import (
+    LiveServerTestCase,
+    SimpleTestCase,
+    TestCase,
+    override_settings,
+)
 
 from psycopg2 import OperationalError as Psycopg2OpError
 
+from core.models import Ingredient, Recipe, Tag
+from core.throttling import TokenBucketThrottle
+
 
 @patch("core.management.commands.wait_for_db.Command.check")
 class CommandTests(SimpleTestCase):
@@ -36,3 +52,291 @@ class CommandTests(SimpleTestCase):
 
         self.assertEqual(patched_check.call_count, 6)
         patched_check.assert_called_with(databases=["default"])
+
+
+class SeedDataCommandTests(TestCase):
+    """
+    Test the seed_data command.
+    """
+
+    def _snapshot(self):
+        return list(
+            Recipe.objects.order_by("user__email", "title", "time_minutes").values_list(
+                "user__email", "title", "time_minutes", "price", "description"
+            )
+        )
+
+    def test_seed_data(self):
+        """Test seeding creates users with their recipes, tags and ingredients"""
+        call_command(
+            "seed_data", "--users=3", "--recipes=10", "--tags=5", stdout=StringIO()
+        )
+
+        self.assertEqual(get_user_model().objects.count(), 3)
+        self.assertEqual(Tag.objects.count(), 15)
+        self.assertEqual(Ingredient.objects.count(), 240)
+        for recipe in Recipe.objects.all():
+            self.assertEqual(recipe.tags.exclude(user=recipe.user).count(), 0)
+        self.assertEqual(Tag.objects.refresh_recipe_counts(), 0)
+
+    def test_seed_data_deterministic(self):
+        """Test the same seed generates the same dataset"""
+        call_command("seed_data", "--users=5", "--seed=7", stdout=StringIO())
+        first = self._snapshot()
+
+        call_command("seed_data", "--users=5", "--seed=7", "--clear", stdout=StringIO())
+
+        self.assertTrue(first)
+        self.assertEqual(self._snapshot(), first)
+
+    def test_seed_data_clear(self):
+        """Test --clear deletes the seeded users without the ORM collector."""
+        call_command("seed_data", "--users=2", "--seed=7", stdout=StringIO())
+        call_command(
+            "seed_data", "--users=2", "--seed=7", stdout=StringIO(), prefix="other"
+        )
+
+        with patch("core.signals._adjust_recipe_count") as adjust:
+            call_command("seed_data", "--users=1", "--clear", stdout=StringIO())
+
+        adjust.assert_not_called()
+        self.assertEqual(
+            get_user_model().objects.filter(email__startswith="seed-").count(), 1
+        )
+        self.assertEqual(
+            get_user_model().objects.filter(email__startswith="other-").count(), 2
+        )
+
+    def test_seed_data_without_tags(self):
+        """Test recipes are seeded without links when there are no tags."""
+        call_command(
+            "seed_data",
+            "--users=2",
+            "--recipes=10",
+            "--tags=0",
+            "--ingredients=0",
+            stdout=StringIO(),
+        )
+
+        self.assertFalse(Tag.objects.exists())
+        self.assertFalse(Recipe.tags.through.objects.exists())
+
+    def test_seed_data_too_many_names(self):
+        """Test asking for more names than can be built is rejected."""
+        with self.assertRaises(CommandError):
+            call_command("seed_data", "--tags=3000", stdout=StringIO())
+
+
+class RepairRecipeCountsCommandTests(TestCase):
+    """Test the repair_recipe_counts command."""
+
+    def test_repair_recipe_counts(self):
+        """Test drifted counters are recomputed."""
+        user = get_user_model().objects.create_user("user@example.com", "pass1234")
+        tag = Tag.objects.create(user=user, name="Vegan")
+        recipe = Recipe.objects.create(
+            user=user, title="Soup", time_minutes=5, price=Decimal("1.00")
+        )
+        recipe.tags.add(tag)
+        Tag.objects.update(recipe_count=0)
+        out = StringIO()
+
+        call_command("repair_recipe_counts", "--batch-size", "1", stdout=out)
+
+        tag.refresh_from_db()
+        self.assertEqual(tag.recipe_count, 1)
+        self.assertIn("tags: 1 counters fixed", out.getvalue())
+
+
+class MergeDuplicatesCommandTests(TestCase):
+    """Test the merge_duplicates command."""
+
+    def test_merge_duplicates(self):
+        """Test objects with the same normalized name are merged per user."""
+        user = get_user_model().objects.create_user("user@example.com", "pass1234")
+        other = get_user_model().objects.create_user("other@example.com", "pass1234")
+        garlic = Ingredient.objects.create(user=user, name="Garlic")
+        dup = Ingredient.objects.create(user=user, name=" garlic ")
+        other_garlic = Ingredient.objects.create(user=other, name="garlic")
+        salt = Ingredient.objects.create(user=user, name="Salt")
+        recipe = Recipe.objects.create(
+            user=user, title="Soup", time_minutes=5, price=Decimal("1.00")
+        )
+        recipe.ingredients.add(dup, salt)
+        out = StringIO()
+
+        call_command(
+            "merge_duplicates", "--model", "ingredient", "--batch-size", "1", stdout=out
+        )
+
+        self.assertEqual(set(Ingredient.objects.all()), {garlic, other_garlic, salt})
+        self.assertEqual(set(recipe.ingredients.all()), {garlic, salt})
+        garlic.refresh_from_db()
+        self.assertEqual(garlic.recipe_count, 1)
+        self.assertIn("ingredients: 1 merged", out.getvalue())
+
+    def test_merge_into_target(self):
+        """Test merging the given sources into a target."""
+        user = get_user_model().objects.create_user("user@example.com", "pass1234")
+        target = Tag.objects.create(user=user, name="Vegan")
+        source = Tag.objects.create(user=user, name="Plant based")
+        out = StringIO()
+
+        call_command(
+            "merge_duplicates",
+            "--model",
+            "tag",
+            "--target",
+            str(target.id),
+            "--sources",
+            str(source.id),
+            stdout=out,
+        )
+
+        self.assertEqual(list(Tag.objects.all()), [target])
+        self.assertIn("tags: 1 merged", out.getvalue())
+
+
+class PurgeDeletedCommandTests(TestCase):
+    """Test the purge_deleted command."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.user = get_user_model().objects.create_user("user@example.com", "pass1234")
+
+    def create_recipe(self, user, **params):
+        return Recipe.objects.create(
+            user=user, title="Soup", time_minutes=5, price=Decimal("1.00"), **params
+        )
+
+    def test_purge_pending_recipes(self):
+        """Test pending recipes, their links and images are deleted."""
+        tag = Tag.objects.create(user=self.user, name="Vegan")
+        kept = self.create_recipe(self.user)
+        kept.tags.add(tag)
+        with self.settings(MEDIA_ROOT=self.media_root):
+            for _ in range(3):
+                recipe = self.create_recipe(self.user, pending_deletion=True)
+                recipe.tags.add(tag)
+                recipe.image.save("soup.jpg", ContentFile(b"image"))
+            image_path = recipe.image.path
+            out = StringIO()
+
+            call_command("purge_deleted", "--batch-size", "2", stdout=out)
+
+        self.assertEqual(list(Recipe.objects.all()), [kept])
+        self.assertEqual(list(tag.recipe_set.all()), [kept])
+        tag.refresh_from_db()
+        self.assertEqual(tag.recipe_count, 1)
+        self.assertFalse(os.path.exists(image_path))
+        self.assertIn("3 rows deleted", out.getvalue())
+
+    def test_purge_pending_account(self):
+        """Test a pending account is deleted with all its data."""
+        other = get_user_model().objects.create_user("other@example.com", "pass1234")
+        other_recipe = self.create_recipe(other)
+        for n in range(3):
+            recipe = self.create_recipe(self.user)
+            recipe.tags.add(Tag.objects.create(user=self.user, name=f"Tag {n}"))
+            recipe.ingredients.add(
+                Ingredient.objects.create(user=self.user, name=f"Ingredient {n}")
+            )
+        self.user.pending_deletion = True
+        self.user.save()
+
+        call_command("purge_deleted", "--batch-size", "2", stdout=StringIO())
+
+        self.assertFalse(get_user_model().objects.filter(pk=self.user.pk).exists())
+        self.assertEqual(list(Recipe.objects.all()), [other_recipe])
+        self.assertFalse(Tag.objects.exists())
+        self.assertFalse(Ingredient.objects.exists())
+
+
+@patch.object(
+    TokenBucketThrottle,
+    "THROTTLE_RATES",
+    {scope: None for scope in ("anon", "user", "token", "upload", "bulk")},
+)
+class LoadTestCommandTests(LiveServerTestCase):
+    """Test the loadtest command against a live server."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_loadtest(self):
+        """Test every request succeeds and is reported per endpoint."""
+        output = os.path.join(self.directory, "loadtest.json")
+
+        with self.settings(MEDIA_ROOT=self.directory):
+            call_command(
+                "loadtest",
+                "--base-url",
+                self.live_server_url,
+                "--users",
+                "2",
+                "--recipes-per-user",
+                "2",
+                "--concurrency",
+                "1",
+                "--requests",
+                "60",
+                "--mix",
+                "user-token=1,user-create=1",
+                "--output",
+                output,
+                stdout=StringIO(),
+            )
+
+        with open(output) as fh:
+            report = json.load(fh)
+        self.assertEqual(report["summary"]["requests"], 60)
+        self.assertEqual(report["summary"]["errors"], 0)
+        self.assertEqual(report["config"]["users"], 2)
+        self.assertIn("tag-update", report["summary"]["endpoints"])
+
+    def test_loadtest_without_recipes(self):
+        """Test the run is rejected when there are no recipes to request."""
+        with self.assertRaises(CommandError):
+            call_command("loadtest", "--recipes-per-user", "0")
+
+
+class WorkerMemoryCommandTests(SimpleTestCase):
+    """Test the worker_memory command."""
+
+    def test_worker_memory(self):
+        """Test the memory of matching processes is reported."""
+        out = StringIO()
+
+        call_command("worker_memory", "--match", "python", stdout=out)
+
+        self.assertIn("Total PSS:", out.getvalue())
+
+
+class StartupCommandTests(TestCase):
+    """Test the startup command."""
+
+    def setUp(self):
+        self.static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.static_root)
+
+    @patch("core.management.commands.wait_for_db.Command.check")
+    def test_startup_skips_unchanged_work(self, patched_check):
+        """Test collectstatic and migrate only run when needed."""
+        with override_settings(STATIC_ROOT=self.static_root), patch(
+            "core.management.commands.startup.call_command", wraps=call_command
+        ) as patched_call:
+            first, second = StringIO(), StringIO()
+            call_command("startup", stdout=first)
+            call_command("startup", stdout=second)
+
+        commands = [call.args[0] for call in patched_call.call_args_list]
+        self.assertEqual(commands.count("collectstatic"), 1)
+        self.assertNotIn("migrate", commands)
+        self.assertIn("collectstatic done", first.getvalue())
+        self.assertIn("collectstatic skipped", second.getvalue())
+        self.assertIn("migrate skipped", second.getvalue())
+        self.assertTrue(
+            os.path.exists(os.path.join(self.static_root, "admin", "css", "base.css"))
+        )
@@ -0,0 +1,155 @@
+"""
+Tests for Idempotency-Key handling of recipe writes.
+"""
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.models import IdempotencyKey, Recipe
+from core.purge import purge
+
+RECIPES_URL = reverse("recipe:recipe-list")
+
+PAYLOAD = {"title": "Soup", "time_minutes": 10, "price": Decimal("2.50")}
+
+
+def detail_url(recipe_id):
+    return reverse("recipe:recipe-detail", args=[recipe_id])
+
+
+def create_user(email="user@example.com"):
+    return get_user_model().objects.create_user(email=email, password="testpass123")
+
+
+class IdempotencyKeyTests(APITestCase):
+    """Test retried writes are applied once."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+
+    def post(self, payload=PAYLOAD, key="key-1"):
+        return self.client.post(
+            RECIPES_URL, payload, format="json", HTTP_IDEMPOTENCY_KEY=key
+        )
+
+    def test_retry_replays_first_response(self):
+        """Test a retried create returns the stored response, creating once."""
+        first = self.post()
+        second = self.post()
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        self.assertFalse(first.has_header("Idempotent-Replayed"))
+        self.assertEqual(Recipe.objects.count(), 1)
+
+    def test_without_key_writes_every_time(self):
+        """Test requests without the header are not deduplicated."""
+        self.client.post(RECIPES_URL, PAYLOAD, format="json")
+        self.client.post(RECIPES_URL, PAYLOAD, format="json")
+
+        self.assertEqual(Recipe.objects.count(), 2)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_key_reused_for_other_request(self):
+        """Test reusing a key with another payload is rejected."""
+        self.post()
+        res = self.post({**PAYLOAD, "title": "Stew"})
+
+        self.assertEqual(res.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Recipe.objects.count(), 1)
+
+    def test_keys_are_per_user(self):
+        """Test the same key of another user is a different request."""
+        self.post()
+        self.client.force_authenticate(create_user("other@example.com"))
+        res = self.post()
+
+        self.assertFalse(res.has_header("Idempotent-Replayed"))
+        self.assertEqual(Recipe.objects.count(), 2)
+
+    def test_expired_key_writes_again(self):
+        """Test a key past its TTL is used for a new request."""
+        self.post()
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(1))
+        res = self.post({**PAYLOAD, "title": "Stew"})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Recipe.objects.count(), 2)
+        self.assertEqual(IdempotencyKey.objects.count(), 1)
+
+    def test_error_response_not_stored(self):
+        """Test a rejected request leaves the key free for a fixed retry."""
+        first = self.post({"title": "Soup"})
+        second = self.post()
+
+        self.assertEqual(first.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(second.has_header("Idempotent-Replayed"))
+        self.assertEqual(Recipe.objects.count(), 1)
+
+    def test_update_replayed(self):
+        """Test a retried update is not applied again."""
+        recipe = Recipe.objects.create(user=self.user, **PAYLOAD)
+        url = detail_url(recipe.id)
+        self.client.patch(url, {"title": "New"}, HTTP_IDEMPOTENCY_KEY="k")
+        Recipe.objects.filter(pk=recipe.pk).update(title="Changed elsewhere")
+        res = self.client.patch(url, {"title": "New"}, HTTP_IDEMPOTENCY_KEY="k")
+
+        recipe.refresh_from_db()
+        self.assertEqual(res.data["title"], "New")
+        self.assertEqual(recipe.title, "Changed elsewhere")
+
+    def test_upload_image_replayed(self):
+        """Test a retried upload does not store the image again."""
+        recipe = Recipe.objects.create(user=self.user, **PAYLOAD)
+        url = reverse("recipe:recipe-upload-image", args=[recipe.id])
+        responses = []
+        with tempfile.NamedTemporaryFile(suffix=".jpg") as image_file:
+            Image.new("RGB", (10, 10)).save(image_file, format="JPEG")
+            for _ in range(2):
+                image_file.seek(0)
+                responses.append(
+                    self.client.post(
+                        url,
+                        {"image": image_file},
+                        format="multipart",
+                        HTTP_IDEMPOTENCY_KEY="upload",
+                    )
+                )
+
+        recipe.refresh_from_db()
+        self.addCleanup(recipe.image.delete)
+        self.assertEqual(responses[1].status_code, status.HTTP_200_OK)
+        self.assertEqual(responses[1].data, responses[0].data)
+        self.assertEqual(responses[1]["Idempotent-Replayed"], "true")
+        self.assertTrue(responses[0].data["image"].endswith(recipe.image.name))
+
+    def test_invalid_key(self):
+        """Test an overlong key is rejected."""
+        res = self.post(key="k" * 256)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_purge_deletes_expired_keys(self):
+        """Test expired keys are removed by the purge."""
+        self.post()
+        self.post(key="key-2")
+        IdempotencyKey.objects.filter(key="key-1").update(
+            expires_at=timezone.now() - timedelta(1)
+        )
+
+        self.assertEqual(purge(), 1)
+        self.assertEqual(
+            list(IdempotencyKey.objects.values_list("key", flat=True)), ["key-2"]
+        )
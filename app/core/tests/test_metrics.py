@@ -0,0 +1,71 @@
+"""
+Tests for the metrics endpoint and middleware.
+"""
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from prometheus_client import REGISTRY
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+METRICS_URL = reverse("metrics")
+
+
+def requests_count(view, method="GET", status_code=200):
+    """Return the current request counter value for a view."""
+    value = REGISTRY.get_sample_value(
+        "api_requests_total",
+        {"view": view, "method": method, "status": str(status_code)},
+    )
+    return value or 0
+
+
+class MetricsTests(TestCase):
+    """Test the metrics endpoint and middleware."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com",
+            password="testpass123",
+        )
+        self.client = APIClient()
+
+    def test_metrics_endpoint(self):
+        """Test metrics are exposed in the Prometheus text format."""
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res["Content-Type"].startswith("text/plain"))
+        self.assertIn(b"api_requests_total", res.content)
+
+    def test_viewset_action_label(self):
+        """Test viewset requests are labelled by viewset and action."""
+        self.client.force_authenticate(user=self.user)
+        before = requests_count("RecipeViewSet.list")
+
+        self.client.get(reverse("recipe:recipe-list"))
+
+        self.assertEqual(requests_count("RecipeViewSet.list"), before + 1)
+
+    def test_api_view_label(self):
+        """Test API views are labelled by class name."""
+        before = requests_count("CreateTokenView", "POST")
+
+        self.client.post(
+            reverse("user:token"),
+            {"email": "user@example.com", "password": "testpass123"},
+        )
+
+        self.assertEqual(requests_count("CreateTokenView", "POST"), before + 1)
+
+    def test_query_histogram(self):
+        """Test DB query counts are recorded per view."""
+        self.client.force_authenticate(user=self.user)
+        labels = {"view": "ManageUserView"}
+        before = REGISTRY.get_sample_value("api_request_db_queries_count", labels)
+
+        self.client.get(reverse("user:me"))
+
+        after = REGISTRY.get_sample_value("api_request_db_queries_count", labels)
+        self.assertEqual(after, (before or 0) + 1)
@@ -0,0 +1,276 @@
+"""
+Tests for the middleware.
+"""
+import gzip
+import json
+import zlib
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core import compression
+from core.middleware import CompressionMiddleware
+from core.models import Recipe
+
+RECIPES_URL = reverse("recipe:recipe-list")
+
+
+class RequestTimingMiddlewareTests(TestCase):
+    """Test the request timing middleware."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com",
+            password="testpass123",
+        )
+        Recipe.objects.create(
+            user=self.user,
+            title="Sample recipe",
+            time_minutes=5,
+            price=Decimal("5.50"),
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_disabled_by_default(self):
+        """Test no Server-Timing header is sent when timing is disabled."""
+        res = self.client.get(RECIPES_URL)
+
+        self.assertNotIn("Server-Timing", res)
+
+    @override_settings(REQUEST_TIMING=True)
+    def test_server_timing_header(self):
+        """Test timings are returned in a Server-Timing header."""
+        with self.assertLogs("core.timing", level="INFO") as logs:
+            res = self.client.get(RECIPES_URL)
+
+        header = res["Server-Timing"]
+        for metric in ["db;dur=", "serializer;dur=", "view;dur=", "total;dur="]:
+            self.assertIn(metric, header)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record["view"], "recipe:recipe-list")
+        self.assertEqual(record["status"], 200)
+        self.assertGreater(record["queries"], 0)
+        self.assertFalse(record["slow"])
+
+    @override_settings(REQUEST_TIMING=True, RECIPE_FAST_READ=True)
+    def test_fast_read_path_timed(self):
+        """Test the fast recipe reader reports its rendering time."""
+        recipe = Recipe.objects.get()
+        for url in [RECIPES_URL, reverse("recipe:recipe-detail", args=[recipe.id])]:
+            with self.assertLogs("core.timing", level="INFO") as logs:
+                self.client.get(url)
+
+            record = json.loads(logs.records[0].getMessage())
+            self.assertGreater(record["serializer_ms"], 0)
+
+    @override_settings(
+        REQUEST_TIMING=True, RECIPE_FAST_READ=True, STREAM_JSON_LISTS=True
+    )
+    def test_streamed_list_timed(self):
+        """Test rows loaded while streaming a list are timed and logged."""
+        with self.assertLogs("core.timing", level="INFO") as logs:
+            res = self.client.get(RECIPES_URL)
+            self.assertFalse(logs.records[1:])
+            body = b"".join(res.streaming_content)
+
+        self.assertIn(b"Sample recipe", body)
+        self.assertIn("Accept", res["Vary"])
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertGreater(record["queries"], 0)
+        self.assertGreater(record["serializer_ms"], 0)
+
+    @override_settings(REQUEST_TIMING=True, REQUEST_TIMING_MAX_QUERIES=0)
+    def test_slow_request_flagged(self):
+        """Test requests over a threshold are logged as warnings."""
+        with self.assertLogs("core.timing", level="WARNING") as logs:
+            self.client.get(RECIPES_URL)
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertTrue(record["slow"])
+
+    @override_settings(REQUEST_TIMING=True)
+    def test_admin_requests_timed(self):
+        """Test admin pages are instrumented too."""
+        admin = get_user_model().objects.create_superuser(
+            "admin@example.com",
+            "testpass123",
+        )
+        self.client.force_login(admin)
+
+        with self.assertLogs("core.timing", level="INFO"):
+            res = self.client.get(reverse("admin:core_recipe_changelist"))
+
+        self.assertIn("db;dur=", res["Server-Timing"])
+
+
+class NegotiateTests(SimpleTestCase):
+    """Test Accept-Encoding negotiation."""
+
+    def test_negotiate(self):
+        """Test the best supported coding is chosen."""
+        codecs = {"zstd": None, "br": None, "gzip": None}
+        cases = [
+            ("", None),
+            ("identity", None),
+            ("gzip", "gzip"),
+            ("gzip, deflate, br", "br"),
+            ("zstd;q=0.5, gzip", "gzip"),
+            ("GZIP;q=0.2, br;q=0.1", "gzip"),
+            ("*", "zstd"),
+            ("*;q=0.5, zstd;q=0", "br"),
+            ("gzip;q=0", None),
+        ]
+        for header, expected in cases:
+            self.assertEqual(compression.negotiate(header, codecs), expected, header)
+
+
+class CompressionMiddlewareTests(SimpleTestCase):
+    """Test the compression middleware."""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.body = json.dumps([{"title": "Sample recipe"}] * 100).encode()
+
+    def _response(self, request, response):
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_gzip_json(self):
+        """Test large JSON responses are gzipped when accepted."""
+        request = self.factory.get("/", HTTP_ACCEPT_ENCODING="gzip, deflate")
+        response = HttpResponse(self.body, content_type="application/json")
+
+        res = self._response(request, response)
+
+        self.assertEqual(res["Content-Encoding"], "gzip")
+        self.assertEqual(res["Vary"], "Accept-Encoding")
+        self.assertEqual(int(res["Content-Length"]), len(res.content))
+        self.assertEqual(gzip.decompress(res.content), self.body)
+
+    def test_not_accepted(self):
+        """Test responses are sent as is when no coding is accepted."""
+        request = self.factory.get("/")
+        response = HttpResponse(self.body, content_type="application/json")
+
+        res = self._response(request, response)
+
+        self.assertNotIn("Content-Encoding", res)
+        self.assertEqual(res["Vary"], "Accept-Encoding")
+        self.assertEqual(res.content, self.body)
+
+    def test_small_and_binary_responses_skipped(self):
+        """Test small, binary and HTML responses are not compressed."""
+        request = self.factory.get("/", HTTP_ACCEPT_ENCODING="gzip")
+        responses = [
+            HttpResponse(b'{"id": 1}', content_type="application/json"),
+            HttpResponse(self.body, content_type="image/jpeg"),
+            # HTML carries CSRF tokens, see BREACH.
+            HttpResponse(self.body, content_type="text/html; charset=utf-8"),
+        ]
+        for response in responses:
+            res = self._response(request, response)
+
+            self.assertNotIn("Content-Encoding", res)
+
+    def test_streaming_response(self):
+        """Test streaming responses are compressed chunk by chunk."""
+        request = self.factory.get("/", HTTP_ACCEPT_ENCODING="gzip")
+        response = StreamingHttpResponse(
+            iter([b"[", self.body, b"]"]), content_type="application/json"
+        )
+
+        res = self._response(request, response)
+
+        self.assertEqual(res["Content-Encoding"], "gzip")
+        chunks = iter(res.streaming_content)
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        # Each chunk is flushed, so it can be decoded before the next one.
+        self.assertEqual(decompressor.decompress(next(chunks)), b"[")
+        content = b"[" + decompressor.decompress(b"".join(chunks))
+        self.assertEqual(content, b"[" + self.body + b"]")
+        self.assertTrue(decompressor.eof)
+
+    def test_compressed_body_cached_by_etag(self):
+        """Test the compressed body of a response with an ETag is reused."""
+        request = self.factory.get("/", HTTP_ACCEPT_ENCODING="gzip")
+        response = HttpResponse(self.body, content_type="application/json")
+        response["ETag"] = '"v1"'
+        first = self._response(request, response)
+
+        response = HttpResponse(self.body, content_type="application/json")
+        response["ETag"] = '"v1"'
+        with patch.dict(compression.CODECS, {"gzip": (None, None)}):
+            second = self._response(request, response)
+
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second["ETag"], 'W/"v1"')
+
+    def test_compressed_body_cached_per_content_type(self):
+        """Test representations sharing an ETag are cached separately."""
+        request = self.factory.get("/", HTTP_ACCEPT_ENCODING="gzip")
+        first = HttpResponse(self.body, content_type="application/json")
+        first["ETag"] = '"v1"'
+        self._response(request, first)
+
+        other_body = b"openapi: 3.0.3\n" * 100
+        response = HttpResponse(other_body, content_type="application/vnd.oai.openapi")
+        response["ETag"] = '"v1"'
+        res = self._response(request, response)
+
+        self.assertEqual(gzip.decompress(res.content), other_body)
+
+
+class CompressionApiTests(TestCase):
+    """Test API responses are compressed."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com",
+            password="testpass123",
+        )
+        for n in range(20):
+            Recipe.objects.create(
+                user=self.user,
+                title=f"Sample recipe {n}",
+                time_minutes=5,
+                price=Decimal("5.50"),
+                description="A long description. " * 10,
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_recipe_list_compressed(self):
+        """Test the recipe list is gzipped when accepted."""
+        expected = self.client.get(RECIPES_URL).content
+
+        with patch.object(compression, "CODECS", {"gzip": compression.CODECS["gzip"]}):
+            res = self.client.get(RECIPES_URL, HTTP_ACCEPT_ENCODING="gzip, br")
+
+        self.assertEqual(res["Content-Encoding"], "gzip")
+        self.assertLess(len(res.content), len(expected) / 4)
+        self.assertEqual(gzip.decompress(res.content), expected)
+
+    def test_admin_pages_not_compressed(self):
+        """Test HTML pages holding a CSRF token are sent uncompressed."""
+        admin = get_user_model().objects.create_superuser(
+            "admin@example.com",
+            "testpass123",
+        )
+        self.client.force_login(admin)
+
+        res = self.client.get(
+            reverse("admin:core_tag_changelist"),
+            {"q": "secret"},
+            HTTP_ACCEPT_ENCODING="gzip",
+        )
+
+        self.assertIn(b"csrfmiddlewaretoken", res.content)
+        self.assertNotIn("Content-Encoding", res)
@@ -98,3 +98,84 @@ class ModelTests(TestCase):
         file_path = models.recipe_image_file_path(None, "example.jpg")
 
         self.assertEqual(file_path, f"uploads/recipe/{uuid}.jpg")
+
+
+class RecipeCountTests(TestCase):
+    """Test the recipe counters of tags and ingredients."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.tags = [
+            models.Tag.objects.create(user=self.user, name=name)
+            for name in ["Vegan", "Quick", "Dessert"]
+        ]
+        self.recipes = [
+            models.Recipe.objects.create(
+                user=self.user,
+                title=f"Recipe {n}",
+                time_minutes=5,
+                price=Decimal("5.50"),
+            )
+            for n in range(2)
+        ]
+
+    def assertCounts(self, *counts):
+        self.assertEqual(
+            [tag.recipe_count for tag in models.Tag.objects.order_by("id")],
+            list(counts),
+        )
+
+    def test_add_remove_and_clear(self):
+        """Test counters follow links added and removed from recipes."""
+        vegan, quick, dessert = self.tags
+        first, second = self.recipes
+
+        first.tags.add(vegan, quick)
+        first.tags.add(vegan)
+        second.tags.add(vegan)
+        self.assertCounts(2, 1, 0)
+
+        first.tags.remove(vegan, dessert)
+        self.assertCounts(1, 1, 0)
+
+        second.tags.set([quick, dessert])
+        self.assertCounts(0, 2, 1)
+
+        second.tags.clear()
+        self.assertCounts(0, 1, 0)
+
+    def test_reverse_links(self):
+        """Test counters follow links changed from the tag side."""
+        vegan = self.tags[0]
+
+        vegan.recipe_set.add(*self.recipes)
+        self.assertCounts(2, 0, 0)
+
+        vegan.recipe_set.remove(self.recipes[0])
+        self.assertCounts(1, 0, 0)
+
+        vegan.recipe_set.clear()
+        self.assertCounts(0, 0, 0)
+
+    def test_delete_recipe(self):
+        """Test deleting a recipe decrements the counters of its links."""
+        ingredient = models.Ingredient.objects.create(user=self.user, name="Salt")
+        for recipe in self.recipes:
+            recipe.tags.add(self.tags[0])
+            recipe.ingredients.add(ingredient)
+
+        self.recipes[0].delete()
+
+        self.assertCounts(1, 0, 0)
+        ingredient.refresh_from_db()
+        self.assertEqual(ingredient.recipe_count, 1)
+
+    def test_refresh_recipe_counts(self):
+        """Test counters are recomputed set-wise."""
+        self.recipes[0].tags.add(*self.tags[:2])
+        models.Tag.objects.update(recipe_count=7)
+
+        fixed = models.Tag.objects.refresh_recipe_counts()
+
+        self.assertEqual(fixed, 3)
+        self.assertCounts(1, 1, 0)
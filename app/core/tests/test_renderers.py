@@ -0,0 +1,98 @@
+"""
+Tests for the JSON renderer and parser.
+"""
+import io
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+
+from core import renderers
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer
+
+SAMPLE = {
+    "id": 1,
+    "title": 'Crème brûlée \u2028 \u2029 "quoted"',
+    "price": "5.50",
+    "ratio": 0.25,
+    "tags": [{"id": 2, "name": "Dessert"}, None, True],
+    "created": datetime(2022, 9, 1, 12, 30, 15, 123456, tzinfo=timezone.utc),
+    "uuid": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+    "lazy": gettext_lazy("Invalid token."),
+    3: "non str key",
+}
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    """Test the JSON renderer."""
+
+    def test_matches_drf_renderer(self):
+        """Test the output is identical to DRF's JSON renderer."""
+        self.assertEqual(
+            FastJSONRenderer().render(SAMPLE),
+            JSONRenderer().render(SAMPLE),
+        )
+
+    def test_decimal_rendered_exactly(self):
+        """Test Decimals are rendered as exact strings."""
+        data = {"price": Decimal("12345678901234567.89")}
+
+        self.assertEqual(
+            FastJSONRenderer().render(data),
+            b'{"price":"12345678901234567.89"}',
+        )
+
+    def test_stdlib_fallback(self):
+        """Test the stdlib is used when orjson is not installed."""
+        data = dict(SAMPLE, price=Decimal("5.50"))
+        expected = FastJSONRenderer().render(data)
+
+        with patch.object(renderers, "orjson", None):
+            self.assertEqual(FastJSONRenderer().render(data), expected)
+
+    def test_indented_output(self):
+        """Test indented output is rendered like DRF does."""
+        context = {"indent": 4}
+
+        self.assertEqual(
+            FastJSONRenderer().render(SAMPLE, renderer_context=context),
+            JSONRenderer().render(SAMPLE, renderer_context=context),
+        )
+
+    def test_iter_render_matches_render(self):
+        """Test chunked rendering joins up to the full rendering."""
+        items = [dict(SAMPLE, id=n, title="x" * 1000) for n in range(200)]
+        renderer = FastJSONRenderer()
+
+        chunks = list(renderer.iter_render(iter(items)))
+
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(b"".join(chunks), renderer.render(items))
+        self.assertEqual(b"".join(renderer.iter_render([])), b"[]")
+
+
+class FastJSONParserTests(SimpleTestCase):
+    """Test the JSON parser."""
+
+    def test_parse(self):
+        """Test parsing matches DRF's JSON parser."""
+        body = FastJSONRenderer().render(
+            {"title": "Crème", "price": 5.5, "tags": [{"name": "A"}]}
+        )
+
+        self.assertEqual(
+            FastJSONParser().parse(io.BytesIO(body)),
+            {"title": "Crème", "price": 5.5, "tags": [{"name": "A"}]},
+        )
+
+    def test_parse_error(self):
+        """Test invalid JSON raises a parse error."""
+        for body in [b'{"title": ', b'{"price": NaN}', b"\xff"]:
+            with self.assertRaises(ParseError):
+                FastJSONParser().parse(io.BytesIO(body))
@@ -0,0 +1,53 @@
+"""
+Tests for the cached OpenAPI schema view.
+"""
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+from django.urls import reverse
+from drf_spectacular.generators import SchemaGenerator
+
+from core.views import CachedSpectacularAPIView
+
+SCHEMA_URL = reverse("schema")
+
+
+class CachedSchemaTests(SimpleTestCase):
+    """Test the cached schema view."""
+
+    def setUp(self):
+        CachedSpectacularAPIView._schemas.clear()
+        patcher = patch.object(
+            SchemaGenerator, "get_schema", return_value={"openapi": "3.0.3"}
+        )
+        self.get_schema = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_schema_generated_once(self):
+        """Test the schema is generated on the first request only."""
+        first = self.client.get(SCHEMA_URL)
+        second = self.client.get(SCHEMA_URL)
+
+        self.assertEqual(self.get_schema.call_count, 1)
+        self.assertEqual(first.content, second.content)
+        self.assertIn(b"openapi: 3.0.3", first.content)
+        self.assertTrue(first["Content-Type"].startswith("application/vnd.oai.openapi"))
+        self.assertIn("max-age=86400", first["Cache-Control"])
+        self.assertEqual(first["ETag"], second["ETag"])
+
+    def test_formats_cached_separately(self):
+        """Test each format gets its own document and ETag."""
+        yaml = self.client.get(SCHEMA_URL)
+        json = self.client.get(SCHEMA_URL, {"format": "json"})
+
+        self.assertEqual(json.json(), {"openapi": "3.0.3"})
+        self.assertNotEqual(yaml["ETag"], json["ETag"])
+
+    def test_not_modified(self):
+        """Test a matching If-None-Match gets a 304."""
+        etag = self.client.get(SCHEMA_URL)["ETag"]
+
+        res = self.client.get(SCHEMA_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(res.content, b"")
@@ -0,0 +1,121 @@
+"""
+Tests for the token bucket throttles.
+"""
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.throttling import TokenBucketThrottle
+
+TOKEN_URL = reverse("user:token")
+RECIPES_URL = reverse("recipe:recipe-list")
+RATES = {"anon": None, "user": "3/min", "token": "2/min"}
+
+
+@patch.object(TokenBucketThrottle, "THROTTLE_RATES", RATES)
+class TokenBucketThrottleTests(TestCase):
+    """Test the token bucket throttles."""
+
+    def setUp(self):
+        caches["throttle"].clear()
+        self.addCleanup(caches["throttle"].clear)
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com",
+            password="testpass123",
+        )
+        self.client = APIClient()
+
+    def test_user_bucket(self):
+        """Test a user is throttled once the bucket is empty."""
+        self.client.force_authenticate(self.user)
+
+        for _ in range(3):
+            res = self.client.get(RECIPES_URL)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(res["Retry-After"], "20")
+
+    def test_bucket_refills(self):
+        """Test tokens come back at the rate of the bucket."""
+        self.client.force_authenticate(self.user)
+
+        with patch.object(TokenBucketThrottle, "timer", return_value=1000.0):
+            for _ in range(4):
+                res = self.client.get(RECIPES_URL)
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        with patch.object(TokenBucketThrottle, "timer", return_value=1020.0):
+            res = self.client.get(RECIPES_URL)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            res = self.client.get(RECIPES_URL)
+            self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_token_scope(self):
+        """Test token creation has its own, smaller budget per IP."""
+        payload = {"email": "user@example.com", "password": "wrong"}
+
+        for _ in range(2):
+            res = self.client.post(TOKEN_URL, payload)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        res = self.client.post(TOKEN_URL, payload)
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn("Retry-After", res)
+
+        other = APIClient(REMOTE_ADDR="10.0.0.2")
+        res = other.post(TOKEN_URL, payload)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_spoofed_forwarded_for_ignored(self):
+        """Test clients can't pick a new bucket by sending X-Forwarded-For."""
+        payload = {"email": "user@example.com", "password": "wrong"}
+
+        # The proxy appends the address it sees after the client's entries.
+        for n in range(3):
+            res = self.client.post(
+                TOKEN_URL, payload, HTTP_X_FORWARDED_FOR=f"10.0.0.{n}, 192.0.2.1"
+            )
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        res = self.client.post(
+            TOKEN_URL, payload, HTTP_X_FORWARDED_FOR="10.0.0.1, 192.0.2.2"
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_file_cache_shared(self):
+        """Test buckets in a file cache are shared by all cache instances."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        shared = override_settings(
+            CACHES={
+                "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+                "throttle": {
+                    "BACKEND": "core.cache.SharedFileCache",
+                    "LOCATION": directory,
+                },
+            }
+        )
+        self.client.force_authenticate(self.user)
+
+        # Each override builds new cache instances, as in separate workers.
+        for _ in range(3):
+            with shared:
+                res = self.client.get(RECIPES_URL)
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+        with shared:
+            res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertTrue(
+            any(name.endswith(".djcache") for name in os.listdir(directory))
+        )
@@ -0,0 +1,23 @@
+"""
+Tests for the worker warm-up.
+"""
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from core.warmup import warm_up
+
+
+class WarmUpTests(SimpleTestCase):
+    """Test the warm-up run before forking workers."""
+
+    @patch("core.warmup.gc")
+    @patch("core.warmup.connections")
+    def test_warm_up(self, patched_connections, patched_gc):
+        """Test views and serializers are loaded and the heap frozen."""
+        with self.assertLogs("core.warmup", level="INFO") as logs:
+            warm_up()
+
+        self.assertRegex(logs.output[0], r"Warmed up \d+ views and \d+ serializers")
+        patched_connections.close_all.assert_called_once()
+        patched_gc.freeze.assert_called_once()
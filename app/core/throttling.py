@@ -0,0 +1,129 @@
+"""
+Token bucket throttles with state shared by all workers.
+
+Buckets live in the ``throttle`` cache, a file based cache on tmpfs
+(core.cache.SharedFileCache) in deployment so every uwsgi worker sees the same
+buckets, and a local memory cache otherwise. Rates use DRF's format: ``"60/min"`` is a
+bucket of 60 requests refilled at one per second. Rejected requests get a
+429 with ``Retry-After``.
+"""
+import os
+import threading
+import zlib
+from contextlib import contextmanager
+
+from django.core.cache import caches
+from rest_framework.throttling import SimpleRateThrottle
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+LOCK_STRIPES = 64
+_local_lock = threading.Lock()
+
+
+@contextmanager
+def _bucket_lock(cache, key):
+    """Serialize updates of a bucket, across processes for file caches."""
+    directory = getattr(cache, "_dir", None)
+    if directory is None or fcntl is None:
+        with _local_lock:
+            yield
+        return
+
+    # A few lock files shared by all keys, next to the cache files (which
+    # the cache only recognizes by their suffix, so it leaves these alone).
+    stripe = zlib.crc32(key.encode()) % LOCK_STRIPES
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, f"lock-{stripe}"), "a") as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """Base token bucket throttle; subclasses define ``get_cache_key``."""
+
+    cache_format = "throttle_%(scope)s_%(ident)s"
+
+    def allow_request(self, request, view):
+        """Take a token from the client's bucket, if there is one left."""
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        cache = caches["throttle"]
+        refill = self.num_requests / self.duration
+        now = self.timer()
+        with _bucket_lock(cache, self.key):
+            tokens, updated = cache.get(self.key, (self.num_requests, now))
+            tokens = min(self.num_requests, tokens + (now - updated) * refill)
+            if tokens < 1:
+                self.wait_time = (1 - tokens) / refill
+                return False
+            cache.set(self.key, (tokens - 1, now), self.duration)
+        return True
+
+    def wait(self):
+        """Return the seconds until the bucket has a token again."""
+        return self.wait_time
+
+
+class AnonTokenBucketThrottle(TokenBucketThrottle):
+    """Throttle unauthenticated requests per IP address."""
+
+    scope = "anon"
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return None
+        return self.cache_format % {
+            "scope": self.scope,
+            "ident": self.get_ident(request),
+        }
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    """Throttle authenticated requests per user."""
+
+    scope = "user"
+
+    def get_cache_key(self, request, view):
+        if not (request.user and request.user.is_authenticated):
+            return None
+        return self.cache_format % {"scope": self.scope, "ident": request.user.pk}
+
+
+class ScopedTokenBucketThrottle(TokenBucketThrottle):
+    """Separate budget for views with a ``throttle_scope``, per user or IP.
+
+    Costly endpoints (token creation, image uploads, exports) set a scope so
+    their budget is smaller than, and spent apart from, the general one.
+    """
+
+    def __init__(self):
+        # The rate depends on the view, see allow_request.
+        pass
+
+    def allow_request(self, request, view):
+        """Throttle only the views with a scope."""
+        self.scope = getattr(view, "throttle_scope", None)
+        if not self.scope:
+            return True
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().allow_request(request, view)
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {"scope": self.scope, "ident": ident}
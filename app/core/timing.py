@@ -0,0 +1,110 @@
+"""
+Per-request timing collection.
+
+The timings of the request being handled live in a context variable, so code
+that is not given the request (database wrappers, serializers) can record
+into it. When no request is being timed every hook is a no-op.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_current = ContextVar("request_timings", default=None)
+
+
+def current_timings():
+    """Return the timings of the request being handled, if any."""
+    return _current.get()
+
+
+class RequestTimings:
+    """Timings accumulated while handling a single request."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.db = 0.0
+        self.serializer = 0.0
+        self.view_start = None
+        self.view = None
+        self.total = None
+        self._serializing = False
+
+    def activate(self):
+        """Make these the current timings, returning a reset token."""
+        return _current.set(self)
+
+    @staticmethod
+    def deactivate(token):
+        _current.reset(token)
+
+    def __call__(self, execute, sql, params, many, context):
+        """Database execute wrapper counting queries and time spent in them."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - start
+            self.queries += 1
+
+    def finish(self):
+        """Close the timings once the response has been produced."""
+        now = time.perf_counter()
+        self.total = now - self.start
+        if self.view is None and self.view_start is not None:
+            self.view = now - self.view_start
+
+    def as_dict(self):
+        """Return the timings in milliseconds."""
+        data = {
+            "queries": self.queries,
+            "db_ms": round(self.db * 1000, 2),
+            "serializer_ms": round(self.serializer * 1000, 2),
+            "total_ms": round(self.total * 1000, 2),
+        }
+        if self.view is not None:
+            data["view_ms"] = round(self.view * 1000, 2)
+        return data
+
+    def server_timing(self):
+        """Format the timings as a Server-Timing header value."""
+        metrics = [
+            f'db;dur={self.db * 1000:.2f};desc="{self.queries} queries"',
+            f"serializer;dur={self.serializer * 1000:.2f}",
+        ]
+        if self.view is not None:
+            metrics.append(f"view;dur={self.view * 1000:.2f}")
+        metrics.append(f"total;dur={self.total * 1000:.2f}")
+        return ", ".join(metrics)
+
+
+@contextmanager
+def timed_serialization():
+    """Record the time spent in the block as serializer time of the request.
+
+    Nested blocks are not counted twice.
+    """
+    timings = _current.get()
+    if timings is None or timings._serializing:
+        yield
+        return
+
+    timings._serializing = True
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.serializer += time.perf_counter() - start
+        timings._serializing = False
+
+
+class TimedSerializerMixin:
+    """Record time spent rendering a serializer on the current request.
+
+    Only the outermost ``to_representation`` call is timed, so nested
+    serializers are not counted twice. Lazily loaded relations are included.
+    """
+
+    def to_representation(self, instance):
+        with timed_serialization():
+            return super().to_representation(instance)
@@ -1,12 +1,70 @@
 """
 Core views for the API.
 """
+import hashlib
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from drf_spectacular.views import SpectacularAPIView
+from prometheus_client import CONTENT_TYPE_LATEST
 from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 
+from core.metrics import render_latest
+
 
 @api_view(["GET"])
 def health_check(request):
     """Returns successful response."""
     return Response({"healthy": True}, status=status.HTTP_200_OK)
+
+
+def metrics(request):
+    """Returns metrics in the Prometheus text format."""
+    return HttpResponse(render_latest(), content_type=CONTENT_TYPE_LATEST)
+
+
+class CachedSpectacularAPIView(SpectacularAPIView):
+    """OpenAPI schema generated once per process instead of per request.
+
+    The rendered document is kept per format, language and version and served
+    with an ETag and ``Cache-Control`` headers; matching ``If-None-Match``
+    requests get a 304.
+    """
+
+    _schemas = {}
+
+    def get(self, request, *args, **kwargs):
+        key = (
+            request.accepted_media_type,
+            request.version,
+            request.GET.get("lang"),
+            request.GET.get("version"),
+        )
+        schema = self._schemas.get(key)
+        if schema is None:
+            schema = self._schemas[key] = self._render_schema(request, *args, **kwargs)
+
+        content, headers = schema
+        response = HttpResponse(content, headers=headers)
+        patch_cache_control(
+            response, public=True, max_age=settings.SCHEMA_CACHE_MAX_AGE
+        )
+        return get_conditional_response(
+            request, etag=headers["ETag"], response=response
+        )
+
+    def _render_schema(self, request, *args, **kwargs):
+        response = super().get(request, *args, **kwargs)
+        response.accepted_renderer = request.accepted_renderer
+        response.accepted_media_type = request.accepted_media_type
+        response.renderer_context = self.get_renderer_context()
+        content = response.rendered_content
+        headers = {
+            "Content-Type": response["Content-Type"],
+            "Content-Disposition": response["Content-Disposition"],
+            "ETag": '"%s"' % hashlib.sha256(content).hexdigest()[:32],
+        }
+        return content, headers
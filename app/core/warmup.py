@@ -0,0 +1,81 @@
+"""
+Warm-up of a freshly loaded application, before workers are forked.
+
+uwsgi loads the WSGI module in the master process and forks the workers from
+it. Everything Django and DRF build lazily on the first request (the URL
+resolver, view modules, serializer fields, Pillow plugins, templates) is done
+here instead, once, so workers share it copy-on-write and their first request
+is as fast as the next ones.
+"""
+import gc
+import logging
+import time
+
+from django.db import connections
+from django.template import TemplateDoesNotExist
+from django.template.loader import get_template
+from django.urls import URLPattern, URLResolver, get_resolver
+from PIL import Image
+from rest_framework.serializers import BaseSerializer
+
+logger = logging.getLogger("core.warmup")
+
+APP_MODULES = ("core.", "recipe.", "user.")
+TEMPLATES = ("rest_framework/api.html", "admin/index.html", "admin/login.html")
+
+
+def _views(patterns):
+    """Yield the view callbacks of the given URL patterns, recursively."""
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _views(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern):
+            yield pattern.callback
+
+
+def _subclasses(cls):
+    for subclass in cls.__subclasses__():
+        yield subclass
+        yield from _subclasses(subclass)
+
+
+def warm_up():
+    """Load everything the first requests would otherwise load lazily."""
+    start = time.perf_counter()
+
+    # Populating the resolver imports every view module (and through them
+    # the serializers, drf_spectacular and the admin).
+    resolver = get_resolver()
+    resolver.reverse_dict
+    views = list(_views(resolver.url_patterns))
+
+    # Build the fields of the API's serializers, which also fills the model
+    # meta caches they rely on.
+    serializers = [
+        cls
+        for cls in _subclasses(BaseSerializer)
+        if cls.__module__.startswith(APP_MODULES)
+    ]
+    for cls in serializers:
+        cls().fields
+
+    Image.init()
+    for name in TEMPLATES:
+        try:
+            get_template(name)
+        except TemplateDoesNotExist:
+            pass
+
+    # Database connections must not be shared with the forked workers.
+    connections.close_all()
+    # Move everything allocated so far out of the collector's reach, so
+    # collections in the workers don't write to (and copy) the shared pages.
+    gc.collect()
+    gc.freeze()
+
+    logger.info(
+        "Warmed up %d views and %d serializers in %.0fms",
+        len(views),
+        len(serializers),
+        (time.perf_counter() - start) * 1000,
+    )
@@ -0,0 +1,160 @@
+"""
+Async views for the read-only recipe APIs.
+
+When the app is served over ASGI (``ASYNC_VIEWS=1``) these views answer GET
+requests on the recipe, tag and ingredient endpoints with Django's async ORM,
+so a slow client or database wait no longer pins a worker process. Any other
+method, paginated lists and requests for the browsable API, fall through to
+the regular DRF viewsets.
+"""
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from rest_framework import exceptions, status
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+from rest_framework.request import Request
+
+from core.renderers import FastJSONRenderer
+from recipe import views
+
+
+class AsyncTokenAuthentication(TokenAuthentication):
+    """Token authentication that looks the token up with the async ORM."""
+
+    async def authenticate_async(self, request):
+        """Return the authenticated user, or None if no token was sent."""
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed("Invalid token header.")
+
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed("Invalid token header.")
+
+        model = self.get_model()
+        try:
+            token = await model.objects.select_related("user").aget(key=key)
+        except model.DoesNotExist:
+            raise exceptions.AuthenticationFailed("Invalid token.")
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed("User inactive or deleted.")
+
+        return token.user
+
+
+def _json_response(data, status_code=status.HTTP_200_OK):
+    """Render data the same way the DRF JSON renderer does."""
+    response = HttpResponse(
+        FastJSONRenderer().render(data),
+        content_type="application/json",
+        status=status_code,
+    )
+    response["Vary"] = "Accept"
+    return response
+
+
+def _error_response(exc):
+    """Render an API exception like DRF's default exception handler."""
+    data = exc.detail
+    if not isinstance(data, (list, dict)):
+        data = {"detail": data}
+    response = _json_response(data, exc.status_code)
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        response["WWW-Authenticate"] = AsyncTokenAuthentication.keyword
+    if getattr(exc, "wait", None):
+        response["Retry-After"] = "%d" % exc.wait
+    return response
+
+
+def _wants_browsable_api(request):
+    """Check whether the client asked for the HTML browsable API."""
+    return "format" in request.GET or "text/html" in request.headers.get("Accept", "")
+
+
+def _wants_page(viewset_class, request):
+    """Check whether the client asked for a paginated list."""
+    paginator_class = viewset_class.pagination_class
+    return paginator_class is not None and paginator_class().is_requested(
+        Request(request)
+    )
+
+
+def _async_read_view(viewset_class, actions):
+    """Build an async view serving GET natively and delegating other methods."""
+    sync_view = viewset_class.as_view(actions)
+    fallback = sync_to_async(sync_view)
+    authentication = AsyncTokenAuthentication()
+
+    async def view(request, pk=None):
+        if (
+            request.method != "GET"
+            or _wants_browsable_api(request)
+            or (pk is None and _wants_page(viewset_class, request))
+        ):
+            kwargs = {} if pk is None else {"pk": pk}
+            return await fallback(request, **kwargs)
+
+        try:
+            user = await authentication.authenticate_async(request)
+            if user is None:
+                raise exceptions.NotAuthenticated()
+        except exceptions.APIException as exc:
+            return _error_response(exc)
+
+        drf_request = Request(request)
+        drf_request.user = user
+        viewset = viewset_class(
+            request=drf_request,
+            args=(),
+            kwargs={} if pk is None else {"pk": pk},
+            format_kwarg=None,
+            action=actions["get"],
+        )
+        try:
+            # The token buckets are read and written under a file lock.
+            await sync_to_async(viewset.check_throttles)(drf_request)
+            # The viewsets prefetch every relation their read serializers
+            # render, so serializing never touches the database synchronously.
+            queryset = viewset.get_queryset()
+            if pk is None:
+                objects = [obj async for obj in queryset]
+                serializer = viewset.get_serializer(objects, many=True)
+            else:
+                try:
+                    obj = await queryset.aget(pk=pk)
+                except queryset.model.DoesNotExist:
+                    raise exceptions.NotFound()
+                serializer = viewset.get_serializer(obj)
+        except exceptions.APIException as exc:
+            return _error_response(exc)
+
+        return _json_response(serializer.data)
+
+    # Token authenticated API, exempt from CSRF like the DRF views. Django's
+    # csrf_exempt decorator does not support coroutines yet.
+    view.csrf_exempt = True
+    # Identify the view like the viewset it stands in for (used for metrics).
+    view.cls = viewset_class
+    view.actions = actions
+    return view
+
+
+recipe_list = _async_read_view(
+    views.RecipeViewSet,
+    {"get": "list", "post": "create"},
+)
+recipe_detail = _async_read_view(
+    views.RecipeViewSet,
+    {
+        "get": "retrieve",
+        "put": "update",
+        "patch": "partial_update",
+        "delete": "destroy",
+    },
+)
+tag_list = _async_read_view(views.TagViewSet, {"get": "list"})
+ingredient_list = _async_read_view(views.IngredientViewSet, {"get": "list"})
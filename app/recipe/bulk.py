@@ -0,0 +1,220 @@
+"""
+Bulk creation, linking and merging of tags and ingredients.
+
+Each change is a single set-based statement against the through table, with
+the ownership of the recipes and of the tags or ingredients checked in the
+same statement. The related managers (and so the m2m_changed handlers of
+core.signals) are bypassed, so ``recipe_count`` and the change sequence of the
+recipes (and so the owner's ``data_version``) are updated here instead. Links
+are added and removed with RETURNING, so only the recipes whose links changed
+are stamped.
+"""
+from django.db import connection, transaction
+from django.db.models import Count, Min
+from django.db.models.functions import Lower, Trim
+
+from core.models import Recipe, next_change_seq
+from core.signals import record_changes
+
+RELATIONS = ("tags", "ingredients")
+
+
+def _owned(user, relation, ids):
+    """Return the user's tags or ingredients with the given ids."""
+    model = Recipe._meta.get_field(relation).related_model
+    return model.objects.filter(user=user, pk__in=ids)
+
+
+def _changed(user, relation, ids, recipe_ids):
+    """Update the counts and stamp the recipes whose links changed."""
+    _owned(user, relation, ids).refresh_recipe_counts()
+    # Only those, so sync clients don't fetch the rest of the selection.
+    record_changes(Recipe.objects.filter(pk__in=set(recipe_ids)), user.pk)
+
+
+@transaction.atomic
+def attach(user, recipes, relation, ids):
+    """Link the user's objects with the given ids to the user's recipes.
+
+    Returns the number of links added; existing links are left alone.
+    """
+    field = Recipe._meta.get_field(relation)
+    table = field.remote_field.through._meta.db_table
+    qn = connection.ops.quote_name
+    source, target = qn(field.m2m_column_name()), qn(field.m2m_reverse_name())
+    recipe_sql, recipe_params = (
+        recipes.filter(user=user).order_by().values("id").query.sql_with_params()
+    )
+    target_sql, target_params = (
+        _owned(user, relation, ids).order_by().values("id").query.sql_with_params()
+    )
+    # NOT EXISTS skips the links already there without going through a
+    # conflict (which burns a sequence value on PostgreSQL); ON CONFLICT
+    # covers the ones added concurrently.
+    sql = (
+        f"INSERT INTO {qn(table)} ({source}, {target}) "
+        f"SELECT r.id, o.id FROM ({recipe_sql}) r CROSS JOIN ({target_sql}) o "
+        f"WHERE NOT EXISTS (SELECT 1 FROM {qn(table)} l "
+        f"WHERE l.{source} = r.id AND l.{target} = o.id) "
+        f"ON CONFLICT DO NOTHING RETURNING {source}"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, recipe_params + target_params)
+        recipe_ids = [row[0] for row in cursor.fetchall()]
+
+    if recipe_ids:
+        _changed(user, relation, ids, recipe_ids)
+    return len(recipe_ids)
+
+
+@transaction.atomic
+def detach(user, recipes, relation, ids):
+    """Unlink the user's objects with the given ids from the user's recipes.
+
+    Returns the number of links removed.
+    """
+    field = Recipe._meta.get_field(relation)
+    through = field.remote_field.through
+    links = through.objects.filter(
+        **{
+            f"{field.m2m_field_name()}__in": recipes.filter(user=user)
+            .order_by()
+            .values("id"),
+            f"{field.m2m_reverse_field_name()}__in": _owned(user, relation, ids)
+            .order_by()
+            .values("id"),
+        }
+    )
+    links_sql, links_params = links.values("id").query.sql_with_params()
+    qn = connection.ops.quote_name
+    sql = (
+        f"DELETE FROM {qn(through._meta.db_table)} WHERE id IN ({links_sql}) "
+        f"RETURNING {qn(field.m2m_column_name())}"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, links_params)
+        recipe_ids = [row[0] for row in cursor.fetchall()]
+
+    if recipe_ids:
+        _changed(user, relation, ids, recipe_ids)
+    return len(recipe_ids)
+
+
+def _relink(model, target_id, source_ids):
+    """Link the recipes of the sources to the target, in one statement."""
+    field = model._meta.get_field("recipe").field
+    table = connection.ops.quote_name(field.remote_field.through._meta.db_table)
+    qn = connection.ops.quote_name
+    source, target = qn(field.m2m_column_name()), qn(field.m2m_reverse_name())
+    placeholders = ", ".join(["%s"] * len(source_ids))
+    sql = (
+        f"INSERT INTO {table} ({source}, {target}) "
+        f"SELECT DISTINCT l.{source}, %s FROM {table} l "
+        f"WHERE l.{target} IN ({placeholders}) AND NOT EXISTS "
+        f"(SELECT 1 FROM {table} x WHERE x.{source} = l.{source} "
+        f"AND x.{target} = %s) "
+        "ON CONFLICT DO NOTHING"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [target_id, *source_ids, target_id])
+
+
+def merge(target, source_ids, batch_size=100):
+    """Merge tags or ingredients of the target's owner into the target.
+
+    The sources' recipes are linked to the target and the sources deleted,
+    a batch of sources per transaction so locks are held briefly. Returns
+    the number of objects merged.
+    """
+    model = type(target)
+    field = model._meta.get_field("recipe").field
+    sources = list(
+        model.objects.filter(user_id=target.user_id, pk__in=source_ids)
+        .exclude(pk=target.pk)
+        .values_list("pk", flat=True)
+    )
+    merged = 0
+    while sources:
+        batch, sources = sources[:batch_size], sources[batch_size:]
+        with transaction.atomic():
+            _relink(model, target.pk, batch)
+            record_changes(
+                Recipe.objects.filter(
+                    pk__in=field.remote_field.through.objects.filter(
+                        **{f"{field.m2m_reverse_field_name()}__in": batch}
+                    ).values(field.m2m_field_name())
+                ),
+                target.user_id,
+            )
+            # Also deletes the sources' links and leaves their tombstones.
+            model.objects.filter(pk__in=batch).delete()
+            model.objects.filter(pk=target.pk).refresh_recipe_counts()
+            merged += len(batch)
+    return merged
+
+
+def merge_duplicates(model, batch_size=100):
+    """Merge the objects of each user having the same normalized name.
+
+    Names are compared trimmed and case insensitively; the oldest object of
+    each group is kept. Returns the number of objects merged.
+    """
+    rows = model.objects.annotate(normalized=Lower(Trim("name")))
+    groups = (
+        rows.values("user_id", "normalized")
+        .annotate(count=Count("id"), target=Min("id"))
+        .filter(count__gt=1)
+        .order_by()
+    )
+    merged = 0
+    for group in list(groups):
+        sources = rows.filter(
+            user_id=group["user_id"], normalized=group["normalized"]
+        ).values_list("pk", flat=True)
+        target = model.objects.get(pk=group["target"])
+        merged += merge(target, list(sources), batch_size)
+    return merged
+
+
+def _normalized(user, model, keys):
+    """Return {normalized name: object} of the user's objects, oldest first."""
+    rows = (
+        model.objects.filter(user=user)
+        .annotate(normalized=Lower(Trim("name")))
+        .filter(normalized__in=keys)
+        .only("id", "name")
+        .order_by("id")
+    )
+    found = {}
+    for row in rows:
+        found.setdefault(row.normalized, row)
+    return found
+
+
+def upsert(model, user, names):
+    """Create the user's tags or ingredients that are missing by name.
+
+    Names are matched trimmed and case insensitively, as merge_duplicates
+    does, so an existing "Garlic" is returned for "garlic". Returns
+    {name: object} for all the names. The missing ones are inserted with one
+    statement, ignoring those created concurrently.
+    """
+    keys = {name: name.strip().lower() for name in names}
+    found = _normalized(user, model, set(keys.values()))
+    missing = {}
+    for name, key in keys.items():
+        if key not in found:
+            missing.setdefault(key, name)
+    if missing:
+        with transaction.atomic():
+            # bulk_create bypasses save(), which stamps the change sequence.
+            change_seq = next_change_seq(user.pk)
+            model.objects.bulk_create(
+                [
+                    model(user=user, name=name, change_seq=change_seq)
+                    for name in missing.values()
+                ],
+                ignore_conflicts=True,
+            )
+        found.update(_normalized(user, model, set(missing)))
+    return {name: found[key] for name, key in keys.items()}
@@ -1,12 +1,49 @@
 """
 Serializer for recipe APIs.
 """
+from itertools import islice
+
+from django.db import transaction
 from rest_framework import serializers
 
 from core.models import Ingredient, Recipe, Tag
+from core.timing import TimedSerializerMixin, timed_serialization
+
+
+class DynamicFieldsMixin:
+    """Restrict the rendered fields with a ``fields`` keyword argument."""
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop("fields", None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class UniqueNameMixin:
+    """Reject a name the user has for another object with a 400.
 
+    Names are unique per user in the database, which DRF does not turn into
+    a validator. Nested in a recipe, existing names are linked instead.
+    """
 
-class TagSerializer(serializers.ModelSerializer):
+    def validate_name(self, value):
+        if self.root is not self:
+            return value
+        others = self.Meta.model.objects.filter(
+            user=self.context["request"].user, name=value
+        )
+        if self.instance is not None:
+            others = others.exclude(pk=self.instance.pk)
+        if others.exists():
+            raise serializers.ValidationError(
+                f"A {self.Meta.model._meta.verbose_name} with this name already exists."
+            )
+        return value
+
+
+class TagSerializer(UniqueNameMixin, TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for Tags."""
 
     class Meta:
@@ -15,7 +52,9 @@ class TagSerializer(serializers.ModelSerializer):
         read_only_fields = ["id"]
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(
+    UniqueNameMixin, TimedSerializerMixin, serializers.ModelSerializer
+):
     """Serializer for Ingredients."""
 
     class Meta:
@@ -24,7 +63,9 @@ class IngredientSerializer(serializers.ModelSerializer):
         read_only_fields = ["id"]
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeSerializer(
+    DynamicFieldsMixin, TimedSerializerMixin, serializers.ModelSerializer
+):
     """Serializer for recipes."""
 
     tags = TagSerializer(many=True, required=False)
@@ -43,47 +84,53 @@ class RecipeSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["id"]
 
-    def _get_or_create_tags(self, tags, instance):
+    def _get_or_create_tags(self, tags):
         """Handle getting or creating tags as needed."""
         auth_user = self.context["request"].user
+        tag_objs = []
         for tag in tags:
             tag_obj, created = Tag.objects.get_or_create(
                 user=auth_user,
                 **tag,
             )
-            instance.tags.add(tag_obj)
+            tag_objs.append(tag_obj)
+        return tag_objs
 
-    def _get_or_create_ingredients(self, ingredients, instance):
+    def _get_or_create_ingredients(self, ingredients):
         """Handle getting or creating ingredients as needed."""
         auth_user = self.context["request"].user
+        ingredient_objs = []
         for ingredient in ingredients:
             ingredient_obj, created = Ingredient.objects.get_or_create(
                 user=auth_user,
                 **ingredient,
             )
-            instance.ingredients.add(ingredient_obj)
+            ingredient_objs.append(ingredient_obj)
+        return ingredient_objs
 
+    # Links are written with add()/set() in one call per relation, so the
+    # recipe_count signal handlers update the counters in one query each.
+    @transaction.atomic
     def create(self, validated_data):
         """Create a recipe."""
         tags = validated_data.pop("tags", [])
         ingredients = validated_data.pop("ingredients", [])
         recipe = Recipe.objects.create(**validated_data)
-        self._get_or_create_tags(tags, recipe)
-        self._get_or_create_ingredients(ingredients, recipe)
+        recipe.tags.add(*self._get_or_create_tags(tags))
+        recipe.ingredients.add(*self._get_or_create_ingredients(ingredients))
 
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         """Update a recipe."""
         tags = validated_data.pop("tags", None)
         ingredients = validated_data.pop("ingredients", None)
         if tags is not None:
-            instance.tags.clear()
-            self._get_or_create_tags(tags, instance)
+            instance.tags.set(self._get_or_create_tags(tags))
 
         if ingredients is not None:
-            instance.ingredients.clear()
-            self._get_or_create_ingredients(ingredients, instance)
+            instance.ingredients.set(self._get_or_create_ingredients(ingredients))
 
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
@@ -107,3 +154,307 @@ class RecipeImageSerializer(serializers.ModelSerializer):
         fields = ["id", "image"]
         read_only_fields = ["id"]
         extra_kwargs = {"image": {"required": True}}
+
+
+class RecipeBatchItemSerializer(serializers.Serializer):
+    """Serializer describing one item of a batch retrieve."""
+
+    id = serializers.IntegerField()
+    status = serializers.IntegerField()
+    recipe = RecipeDetailSerializer(required=False)
+    detail = serializers.CharField(required=False)
+
+
+class RecipeRangeFilterSerializer(serializers.Serializer):
+    """Serializer validating the recipe time and price range filters."""
+
+    time_minutes__gte = serializers.IntegerField(min_value=0, required=False)
+    time_minutes__lte = serializers.IntegerField(min_value=0, required=False)
+    price__gte = serializers.DecimalField(
+        max_digits=5, decimal_places=2, min_value=0, required=False
+    )
+    price__lte = serializers.DecimalField(
+        max_digits=5, decimal_places=2, min_value=0, required=False
+    )
+
+
+class RecipeFilterSerializer(RecipeRangeFilterSerializer):
+    """Serializer validating the recipe list filters and ordering."""
+
+    ordering = serializers.ChoiceField(
+        choices=["-id", "id", "price", "-price", "time_minutes", "-time_minutes"],
+        default="-id",
+    )
+
+
+class RecipeSelectionSerializer(serializers.Serializer):
+    """Serializer selecting recipes by id or by a range filter."""
+
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False
+    )
+    filter = RecipeRangeFilterSerializer(required=False)
+
+    def validate(self, attrs):
+        """Check either recipes or a filter is given."""
+        if ("recipes" in attrs) == ("filter" in attrs):
+            raise serializers.ValidationError("Give either recipes or a filter.")
+        return attrs
+
+
+class RecipeBulkLinkSerializer(RecipeSelectionSerializer):
+    """Serializer for linking tags and ingredients to many recipes."""
+
+    tags = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), default=list
+    )
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), default=list
+    )
+
+    def validate(self, attrs):
+        """Check the recipes and the objects to link are given."""
+        attrs = super().validate(attrs)
+        if not attrs["tags"] and not attrs["ingredients"]:
+            raise serializers.ValidationError("Give tags or ingredients.")
+        return attrs
+
+
+class RecipeBulkLinkResultSerializer(serializers.Serializer):
+    """Serializer for the number of links changed by a bulk action."""
+
+    tags = serializers.IntegerField()
+    ingredients = serializers.IntegerField()
+
+
+class RecipeBulkDeleteResultSerializer(serializers.Serializer):
+    """Serializer for the number of recipes marked for deletion."""
+
+    recipes = serializers.IntegerField()
+
+
+class MergeSerializer(serializers.Serializer):
+    """Serializer for merging tags or ingredients into another one."""
+
+    sources = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), min_length=1
+    )
+
+
+class UpsertSerializer(serializers.Serializer):
+    """Serializer for creating tags or ingredients by name in bulk."""
+
+    names = serializers.ListField(
+        child=serializers.CharField(max_length=255),
+        min_length=1,
+        max_length=1000,
+    )
+
+    def validate_names(self, value):
+        """Collapse whitespace in the names and drop duplicates."""
+        return list(dict.fromkeys(" ".join(name.split()) for name in value))
+
+
+class UsageSerializer(serializers.Serializer):
+    """Serializer for a tag or ingredient with its number of recipes."""
+
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    recipe_count = serializers.IntegerField()
+
+
+class PriceBucketSerializer(serializers.Serializer):
+    """Serializer for a bucket of the price distribution."""
+
+    min = serializers.DecimalField(max_digits=5, decimal_places=2)
+    max = serializers.DecimalField(max_digits=5, decimal_places=2, allow_null=True)
+    count = serializers.IntegerField()
+
+
+class TimeStatsSerializer(serializers.Serializer):
+    """Serializer for preparation time statistics."""
+
+    avg = serializers.FloatField(allow_null=True)
+    min = serializers.IntegerField(allow_null=True)
+    max = serializers.IntegerField(allow_null=True)
+
+
+class PriceStatsSerializer(serializers.Serializer):
+    """Serializer for price statistics."""
+
+    total = serializers.DecimalField(max_digits=12, decimal_places=2)
+    avg = serializers.DecimalField(max_digits=5, decimal_places=2, allow_null=True)
+    min = serializers.DecimalField(max_digits=5, decimal_places=2, allow_null=True)
+    max = serializers.DecimalField(max_digits=5, decimal_places=2, allow_null=True)
+    distribution = PriceBucketSerializer(many=True)
+
+
+class RecipeStatsSerializer(serializers.Serializer):
+    """Serializer for the recipe statistics of a user."""
+
+    recipe_count = serializers.IntegerField()
+    time_minutes = TimeStatsSerializer()
+    price = PriceStatsSerializer()
+    top_tags = UsageSerializer(many=True)
+    top_ingredients = UsageSerializer(many=True)
+
+
+class SyncQuerySerializer(serializers.Serializer):
+    """Serializer validating the parameters of a sync."""
+
+    since = serializers.CharField(required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=1000, default=500)
+
+
+class TagSyncSerializer(TagSerializer):
+    """Serializer for tags in sync pages."""
+
+    class Meta(TagSerializer.Meta):
+        fields = TagSerializer.Meta.fields + ["updated_at"]
+
+
+class IngredientSyncSerializer(IngredientSerializer):
+    """Serializer for ingredients in sync pages."""
+
+    class Meta(IngredientSerializer.Meta):
+        fields = IngredientSerializer.Meta.fields + ["updated_at"]
+
+
+class RecipeSyncSerializer(RecipeDetailSerializer):
+    """Serializer for recipes in sync pages, linking tags and ingredients by id."""
+
+    tags = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+    ingredients = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+
+    class Meta(RecipeDetailSerializer.Meta):
+        fields = RecipeDetailSerializer.Meta.fields + ["updated_at"]
+
+
+class SyncDeletedSerializer(serializers.Serializer):
+    """Serializer for the ids deleted since a sync token."""
+
+    tags = serializers.ListField(child=serializers.IntegerField())
+    ingredients = serializers.ListField(child=serializers.IntegerField())
+    recipes = serializers.ListField(child=serializers.IntegerField())
+
+
+class SyncSerializer(serializers.Serializer):
+    """Serializer for a page of changes since a sync token."""
+
+    tags = TagSyncSerializer(many=True)
+    ingredients = IngredientSyncSerializer(many=True)
+    recipes = RecipeSyncSerializer(many=True)
+    deleted = SyncDeletedSerializer()
+    next = serializers.CharField()
+    more = serializers.BooleanField()
+
+
+class FastRecipeReader:
+    """Read-only fast path rendering recipes for list and retrieve.
+
+    Builds plain dicts straight from ``values()`` rows and one query per
+    nested relation instead of running the serializer machinery per field.
+    The output matches the given (possibly field restricted) recipe
+    serializer exactly.
+    """
+
+    def __init__(self, serializer):
+        self.request = serializer.context.get("request")
+        self.columns = []
+        self.relations = {}
+        # (name, is_relation, converter) in the serializer's field order.
+        self.plan = []
+        for name, field in serializer.fields.items():
+            if isinstance(field, serializers.ListSerializer):
+                self.relations[name] = list(field.child.fields)
+                self.plan.append((name, True, None))
+            else:
+                self.columns.append(name)
+                self.plan.append((name, False, self._converter(field)))
+
+    def _converter(self, field):
+        """Return a callable rendering a column value like the field does."""
+        if isinstance(field, serializers.FileField):
+            storage = Recipe._meta.get_field(field.source).storage
+
+            def render_file(value):
+                if not value:
+                    return None
+                url = storage.url(value)
+                if self.request is not None:
+                    return self.request.build_absolute_uri(url)
+                return url
+
+            return render_file
+        if type(field) in (serializers.IntegerField, serializers.CharField):
+            # Values loaded from these columns already are ints and strs.
+            return None
+        return field.to_representation
+
+    def _related(self, name, fields, recipe_ids):
+        """Return {recipe id: [item, ...]} for an M2M relation."""
+        field = Recipe._meta.get_field(name)
+        source = field.m2m_field_name()
+        target = field.m2m_reverse_field_name()
+        rows = (
+            field.remote_field.through.objects.filter(
+                **{f"{source}_id__in": recipe_ids}
+            )
+            .order_by(f"{target}_id")
+            .values_list(f"{source}_id", *[f"{target}__{item}" for item in fields])
+        )
+        related = {}
+        for recipe_id, *values in rows:
+            related.setdefault(recipe_id, []).append(dict(zip(fields, values)))
+        return related
+
+    def _render_rows(self, rows):
+        """Return the rendered recipes of the given values() rows."""
+        if not rows:
+            return []
+
+        # Timed like the serializers it replaces, related rows included.
+        with timed_serialization():
+            return self._render_related(rows)
+
+    def _render_related(self, rows):
+        recipe_ids = [row["id"] for row in rows]
+        related = {
+            name: self._related(name, fields, recipe_ids)
+            for name, fields in self.relations.items()
+        }
+        results = []
+        for row in rows:
+            item = {}
+            for name, is_relation, convert in self.plan:
+                if is_relation:
+                    item[name] = related[name].get(row["id"], [])
+                    continue
+                value = row[name]
+                if convert is not None and value is not None:
+                    value = convert(value)
+                item[name] = value
+            results.append(item)
+        return results
+
+    def _values(self, queryset):
+        columns = ["id"] + [name for name in self.columns if name != "id"]
+        return queryset.prefetch_related(None).values(*columns)
+
+    def render(self, queryset):
+        """Return the rendered recipes of the queryset, in order."""
+        return self._render_rows(list(self._values(queryset)))
+
+    def render_by_id(self, queryset):
+        """Return {recipe id: rendered recipe} for the queryset."""
+        rows = list(self._values(queryset))
+        return {row["id"]: item for row, item in zip(rows, self._render_rows(rows))}
+
+    def iter_render(self, queryset, chunk_size=500):
+        """Yield the rendered recipes of the queryset, loading them in chunks."""
+        rows = self._values(queryset).iterator(chunk_size=chunk_size)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                return
+            yield from self._render_rows(chunk)
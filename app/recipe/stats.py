@@ -0,0 +1,66 @@
+"""
+Recipe statistics of a user, computed with aggregate queries.
+"""
+from decimal import Decimal
+
+from django.db.models import Avg, Count, Max, Min, Q, Sum
+
+from core.models import Ingredient, Recipe, Tag
+
+# Upper bounds of the price distribution buckets; the last one is open.
+PRICE_BUCKETS = (Decimal("5"), Decimal("10"), Decimal("20"), Decimal("50"))
+TOP_LIMIT = 10
+
+
+def _top(model, user):
+    """Return the most used objects of a model (an index scan on recipe_count)."""
+    return list(
+        model.objects.filter(user=user, recipe_count__gt=0)
+        .order_by("-recipe_count", "name")
+        .values("id", "name", "recipe_count")[:TOP_LIMIT]
+    )
+
+
+def recipe_stats(user):
+    """Return totals, averages, the price distribution and top tags/ingredients."""
+    bounds = (Decimal("0"),) + PRICE_BUCKETS + (None,)
+    buckets = {
+        f"bucket_{index}": Count(
+            "id",
+            filter=Q(price__gte=low) & (Q(price__lt=high) if high else Q()),
+        )
+        for index, (low, high) in enumerate(zip(bounds, bounds[1:]))
+    }
+    # Totals and the price distribution in one query.
+    totals = Recipe.objects.filter(user=user, pending_deletion=False).aggregate(
+        recipe_count=Count("id"),
+        time_avg=Avg("time_minutes"),
+        time_min=Min("time_minutes"),
+        time_max=Max("time_minutes"),
+        price_total=Sum("price"),
+        price_avg=Avg("price"),
+        price_min=Min("price"),
+        price_max=Max("price"),
+        **buckets,
+    )
+
+    return {
+        "recipe_count": totals["recipe_count"],
+        "time_minutes": {
+            "avg": totals["time_avg"],
+            "min": totals["time_min"],
+            "max": totals["time_max"],
+        },
+        "price": {
+            "total": totals["price_total"] or Decimal("0"),
+            "avg": totals["price_avg"],
+            "min": totals["price_min"],
+            "max": totals["price_max"],
+            "distribution": [
+                {"min": low, "max": high, "count": totals[name]}
+                for name, (low, high) in zip(buckets, zip(bounds, bounds[1:]))
+            ],
+        },
+        "top_tags": _top(Tag, user),
+        "top_ingredients": _top(Ingredient, user),
+    }
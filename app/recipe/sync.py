@@ -0,0 +1,135 @@
+"""
+Changes of a user's recipes, tags and ingredients since a sync token.
+
+Saving a row stamps it with the owner's next ``data_version`` (see
+core.models.next_change_seq) and deletions leave a Tombstone stamped the same
+way. A sync token holds the position up to which a client has seen the
+changes, ordered by (change_seq, kind, id), and a page holds the rows after
+it, each kind read with a range scan of its (user, change_seq, id) index.
+Only rows up to the data_version loaded first are read: every change up to it
+has committed, so a page never skips a change that commits late. When that
+data_version shows nothing new, it is the only query.
+"""
+import base64
+import json
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Prefetch, Q
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from core.models import Ingredient, Recipe, Tag, Tombstone
+
+# Kinds of rows in the order they are synced for the same change_seq; tags
+# and ingredients come before the recipes linking them.
+KINDS = ("tags", "ingredients", "recipes", "deleted")
+# Tombstone.kind of each synced model.
+DELETED_KINDS = {"tag": "tags", "ingredient": "ingredients", "recipe": "recipes"}
+
+
+class SyncTokenExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = "Sync token expired, sync again without one."
+    default_code = "sync_token_expired"
+
+
+def encode_token(change_seq, kind, pk, issued_at):
+    payload = json.dumps([change_seq, kind, pk, issued_at])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_token(token):
+    """Return (change_seq, kind, pk, issued_at) of a sync token."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+        if len(values) != 4 or not all(isinstance(v, int) for v in values):
+            raise ValueError
+    except (ValueError, TypeError):
+        raise ValidationError({"since": ["Invalid sync token."]})
+
+    if values[3] < time.time() - settings.SYNC_TOKEN_TTL:
+        # Tombstones of deletions since then may have been purged.
+        raise SyncTokenExpired()
+    return values
+
+
+def _querysets(user):
+    tags_only = Tag.objects.only("id")
+    ingredients_only = Ingredient.objects.only("id")
+    return {
+        "tags": Tag.objects.filter(user=user),
+        "ingredients": Ingredient.objects.filter(user=user),
+        "recipes": Recipe.objects.filter(
+            user=user, pending_deletion=False
+        ).prefetch_related(
+            Prefetch("tags", queryset=tags_only),
+            Prefetch("ingredients", queryset=ingredients_only),
+        ),
+        "deleted": Tombstone.objects.filter(user=user),
+    }
+
+
+def _after(kind, position):
+    """Return a filter selecting the rows of a kind after the position."""
+    change_seq, last_kind, pk = position
+    if kind > last_kind:
+        return Q(change_seq__gte=change_seq)
+    if kind < last_kind:
+        return Q(change_seq__gt=change_seq)
+    return Q(change_seq__gt=change_seq) | Q(change_seq=change_seq, pk__gt=pk)
+
+
+def changes(user, since=None, limit=500):
+    """Return up to limit changes of the user's data after a sync token.
+
+    Returns a dict with the changed rows of each kind, the deleted ids by
+    kind, the ``next`` token and whether there are ``more`` changes.
+    """
+    if since is None:
+        # Before everything, as a client with no data.
+        change_seq, kind, pk, issued_at = -1, len(KINDS), 0, int(time.time())
+    else:
+        change_seq, kind, pk, issued_at = decode_token(since)
+
+    now = int(time.time())
+    # Read from the database, the user of the request may be cached.
+    version = (
+        get_user_model()
+        .objects.filter(pk=user.pk)
+        .values_list("data_version", flat=True)
+        .get()
+    )
+    page = {name: [] for name in KINDS[:-1]}
+    page["deleted"] = {name: [] for name in KINDS[:-1]}
+    if change_seq >= version and kind == len(KINDS):
+        page.update(next=encode_token(change_seq, kind, 0, now), more=False)
+        return page
+
+    # limit + 1 rows of each kind tell whether more follow the page.
+    rows, stop = [], limit + 1
+    querysets = _querysets(user)
+    for index, name in enumerate(KINDS):
+        selected = querysets[name].filter(
+            _after(index, (change_seq, kind, pk)), change_seq__lte=version
+        )
+        for row in selected.order_by("change_seq", "pk")[:stop]:
+            rows.append((row.change_seq, index, row.pk, row))
+    rows.sort(key=lambda row: row[:3])
+
+    for _, index, _, row in rows[:limit]:
+        if KINDS[index] == "deleted":
+            page["deleted"][DELETED_KINDS[row.kind]].append(row.object_id)
+        else:
+            page[KINDS[index]].append(row)
+
+    if len(rows) > limit:
+        # Resume after the last row returned; the time of the original
+        # token is kept, as tombstones after it are still needed.
+        next_token = encode_token(*rows[limit - 1][:3], issued_at)
+    else:
+        next_token = encode_token(version, len(KINDS), 0, now)
+    page.update(next=next_token, more=len(rows) > limit)
+    return page
@@ -0,0 +1,151 @@
+"""
+Tests for the async recipe read views.
+"""
+from decimal import Decimal
+from unittest.mock import patch
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import path
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from core.models import Recipe, Tag
+from core.throttling import TokenBucketThrottle
+from recipe import async_views
+from recipe.serializers import RecipeDetailSerializer, RecipeSerializer, TagSerializer
+
+
+urlpatterns = [
+    path("recipes/", async_views.recipe_list),
+    path("recipes/<int:pk>/", async_views.recipe_detail),
+    path("tags/", async_views.tag_list),
+]
+
+
+def create_user(email="user@example.com", password="testpass123"):
+    """Create and return a new user"""
+    return get_user_model().objects.create_user(email=email, password=password)
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        "title": "Sample recipe title",
+        "time_minutes": 22,
+        "price": Decimal("5.25"),
+        "description": "Sample recipe description.",
+        "link": "http://example.com/recipe.pdf",
+    }
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncRecipeViewTests(TestCase):
+    """Test the async read views."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.token = Token.objects.create(user=self.user)
+        self.auth = {"authorization": f"Token {self.token.key}"}
+
+    async def test_auth_required(self):
+        """Test auth is required to call the async views."""
+        res = await self.async_client.get("/recipes/")
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(res["WWW-Authenticate"], "Token")
+
+    async def test_invalid_token(self):
+        """Test an unknown token is rejected."""
+        res = await self.async_client.get("/recipes/", authorization="Token nope")
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(res.json(), {"detail": "Invalid token."})
+
+    async def test_list_recipes_matches_serializer(self):
+        """Test the async list returns the same data as the viewset."""
+        recipe = await sync_to_async(create_recipe)(user=self.user)
+        tag = await Tag.objects.acreate(user=self.user, name="Vegan")
+        await sync_to_async(recipe.tags.add)(tag)
+        other = await sync_to_async(create_user)(email="other@example.com")
+        await sync_to_async(create_recipe)(user=other)
+
+        res = await self.async_client.get("/recipes/", **self.auth)
+
+        recipes = Recipe.objects.filter(user=self.user).order_by("-id")
+        expected = await sync_to_async(
+            lambda: RecipeSerializer(recipes, many=True).data
+        )()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json(), expected)
+
+    async def test_get_recipe_detail(self):
+        """Test the async detail view."""
+        recipe = await sync_to_async(create_recipe)(user=self.user)
+
+        res = await self.async_client.get(f"/recipes/{recipe.id}/", **self.auth)
+
+        expected = await sync_to_async(lambda: RecipeDetailSerializer(recipe).data)()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json(), expected)
+
+    async def test_other_users_recipe_not_found(self):
+        """Test another user's recipe is not returned."""
+        other = await sync_to_async(create_user)(email="other@example.com")
+        recipe = await sync_to_async(create_recipe)(user=other)
+
+        res = await self.async_client.get(f"/recipes/{recipe.id}/", **self.auth)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_create_falls_back_to_viewset(self):
+        """Test writes are delegated to the synchronous viewset."""
+        payload = {"title": "Curry", "time_minutes": 30, "price": "5.99"}
+
+        res = await self.async_client.post(
+            "/recipes/", payload, content_type="application/json", **self.auth
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        exists = await Recipe.objects.filter(user=self.user, title="Curry").aexists()
+        self.assertTrue(exists)
+
+    async def test_paginated_list_falls_back_to_viewset(self):
+        """Test paginated lists are delegated to the synchronous viewset."""
+        for n in range(3):
+            await sync_to_async(create_recipe)(user=self.user, price=Decimal(n))
+
+        res = await self.async_client.get(
+            "/recipes/", {"ordering": "price", "limit": 2}, **self.auth
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        prices = [recipe["price"] for recipe in res.json()["results"]]
+        self.assertEqual(prices, ["0.00", "1.00"])
+        self.assertIsNotNone(res.json()["next"])
+
+    async def test_list_tags(self):
+        """Test the async tag list."""
+        tag = await Tag.objects.acreate(user=self.user, name="Dessert")
+
+        res = await self.async_client.get("/tags/", **self.auth)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json(), [TagSerializer(tag).data])
+
+    async def test_throttled(self):
+        """Test the async views apply the viewset throttles."""
+        rates = {"anon": None, "user": "1/min"}
+        with patch.object(TokenBucketThrottle, "THROTTLE_RATES", rates):
+            await sync_to_async(caches["throttle"].clear)()
+            await self.async_client.get("/tags/", **self.auth)
+            res = await self.async_client.get("/tags/", **self.auth)
+            await sync_to_async(caches["throttle"].clear)()
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(res["Retry-After"], "60")
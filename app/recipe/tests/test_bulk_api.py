@@ -0,0 +1,221 @@
+"""
+Tests for the bulk tag and ingredient linking APIs.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from core.models import Ingredient, Recipe, Tag
+from core.purge import purge
+
+
+ATTACH_URL = reverse("recipe:recipe-bulk-attach")
+DETACH_URL = reverse("recipe:recipe-bulk-detach")
+DELETE_URL = reverse("recipe:recipe-bulk-delete")
+RECIPES_URL = reverse("recipe:recipe-list")
+STATS_URL = reverse("recipe:stats")
+TAGS_URL = reverse("recipe:tag-list")
+
+
+def create_user(email="user@example.com"):
+    """Create and return a new user"""
+    return get_user_model().objects.create_user(email=email, password="testpass123")
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        "title": "Sample recipe title",
+        "time_minutes": 10,
+        "price": Decimal("5.00"),
+    }
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class PublicBulkAPITests(APITestCase):
+    """Test unauthenticated API requests."""
+
+    def test_auth_required(self):
+        """Test auth is required for the bulk actions."""
+        res = self.client.post(ATTACH_URL, {}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateBulkAPITests(APITestCase):
+    """Test authenticated API requests."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.other = create_user(email="other@example.com")
+
+    def test_attach_tags(self):
+        """Test linking tags to recipes, keeping existing links."""
+        r1 = create_recipe(user=self.user)
+        r2 = create_recipe(user=self.user)
+        tag = Tag.objects.create(user=self.user, name="Vegetarian")
+        r1.tags.add(tag)
+        version = get_user_model().objects.get(pk=self.user.pk).data_version
+
+        payload = {"recipes": [r1.id, r2.id], "tags": [tag.id]}
+        res = self.client.post(ATTACH_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {"tags": 1, "ingredients": 0})
+        self.assertEqual(list(r2.tags.all()), [tag])
+        tag.refresh_from_db()
+        self.assertEqual(tag.recipe_count, 2)
+        self.user.refresh_from_db()
+        self.assertGreater(self.user.data_version, version)
+
+    def test_attach_by_filter(self):
+        """Test linking ingredients to the recipes matching a filter."""
+        cheap = create_recipe(user=self.user, price=Decimal("2.00"))
+        create_recipe(user=self.user, price=Decimal("20.00"))
+        salt = Ingredient.objects.create(user=self.user, name="Salt")
+
+        payload = {"filter": {"price__lte": "5"}, "ingredients": [salt.id]}
+        res = self.client.post(ATTACH_URL, payload, format="json")
+
+        self.assertEqual(res.data, {"tags": 0, "ingredients": 1})
+        self.assertEqual(list(salt.recipe_set.all()), [cheap])
+        salt.refresh_from_db()
+        self.assertEqual(salt.recipe_count, 1)
+
+    def test_attach_other_users_objects_ignored(self):
+        """Test other users' recipes and tags are never linked."""
+        recipe = create_recipe(user=self.user)
+        other_recipe = create_recipe(user=self.other)
+        tag = Tag.objects.create(user=self.user, name="Vegan")
+        other_tag = Tag.objects.create(user=self.other, name="Vegan")
+
+        payload = {"recipes": [recipe.id, other_recipe.id], "tags": [other_tag.id]}
+        res = self.client.post(ATTACH_URL, payload, format="json")
+        self.assertEqual(res.data["tags"], 0)
+
+        payload["tags"] = [tag.id]
+        res = self.client.post(ATTACH_URL, payload, format="json")
+
+        self.assertEqual(res.data["tags"], 1)
+        self.assertFalse(other_recipe.tags.exists())
+        self.assertFalse(other_tag.recipe_set.exists())
+
+    def test_attach_constant_queries(self):
+        """Test the number of queries does not grow with the recipes."""
+        tags = [Tag.objects.create(user=self.user, name=f"Tag {n}") for n in range(3)]
+        tag_ids = [tag.id for tag in tags]
+        for count in [2, 20]:
+            ids = [create_recipe(user=self.user).id for _ in range(count)]
+
+            # The insert, the recipe_count refresh, the change sequence (bump
+            # and read) and the recipes' stamp, plus two savepoints.
+            with self.assertNumQueries(9):
+                res = self.client.post(
+                    ATTACH_URL, {"recipes": ids, "tags": tag_ids}, format="json"
+                )
+
+            self.assertEqual(res.data["tags"], count * 3)
+        for tag in Tag.objects.all():
+            self.assertEqual(tag.recipe_count, 22)
+
+    def test_detach(self):
+        """Test unlinking tags and ingredients from recipes."""
+        r1 = create_recipe(user=self.user)
+        r2 = create_recipe(user=self.user)
+        kept = create_recipe(user=self.user)
+        tag = Tag.objects.create(user=self.user, name="Dessert")
+        salt = Ingredient.objects.create(user=self.user, name="Salt")
+        for recipe in [r1, r2, kept]:
+            recipe.tags.add(tag)
+            recipe.ingredients.add(salt)
+
+        payload = {
+            "recipes": [r1.id, r2.id],
+            "tags": [tag.id],
+            "ingredients": [salt.id],
+        }
+        res = self.client.post(DETACH_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {"tags": 2, "ingredients": 2})
+        self.assertEqual(list(tag.recipe_set.all()), [kept])
+        self.assertEqual(list(salt.recipe_set.all()), [kept])
+        tag.refresh_from_db()
+        salt.refresh_from_db()
+        self.assertEqual((tag.recipe_count, salt.recipe_count), (1, 1))
+
+    def test_detach_other_users_links_kept(self):
+        """Test other users' links are never removed."""
+        other_recipe = create_recipe(user=self.other)
+        other_tag = Tag.objects.create(user=self.other, name="Vegan")
+        other_recipe.tags.add(other_tag)
+
+        payload = {"recipes": [other_recipe.id], "tags": [other_tag.id]}
+        res = self.client.post(DETACH_URL, payload, format="json")
+
+        self.assertEqual(res.data["tags"], 0)
+        self.assertTrue(other_recipe.tags.exists())
+
+    def test_invalid_payload_error(self):
+        """Test payloads without recipes or objects to link are rejected."""
+        recipe = create_recipe(user=self.user)
+        tag = Tag.objects.create(user=self.user, name="Vegan")
+
+        for payload in [
+            {"tags": [tag.id]},
+            {"recipes": [recipe.id], "filter": {}, "tags": [tag.id]},
+            {"recipes": [recipe.id]},
+            {"recipes": ["x"], "tags": [tag.id]},
+            {"filter": {"price__lte": "-1"}, "tags": [tag.id]},
+        ]:
+            res = self.client.post(ATTACH_URL, payload, format="json")
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_delete(self):
+        """Test marking recipes for deletion hides them right away."""
+        cheap = create_recipe(user=self.user, price=Decimal("2.00"))
+        kept = create_recipe(user=self.user, price=Decimal("20.00"))
+        other_recipe = create_recipe(user=self.other, price=Decimal("1.00"))
+
+        payload = {"filter": {"price__lte": "5"}}
+        res = self.client.post(DELETE_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(res.data, {"recipes": 1})
+        cheap.refresh_from_db()
+        other_recipe.refresh_from_db()
+        self.assertTrue(cheap.pending_deletion)
+        self.assertFalse(other_recipe.pending_deletion)
+        res = self.client.get(RECIPES_URL)
+        self.assertEqual([recipe["id"] for recipe in res.data], [kept.id])
+
+    def test_bulk_delete_uncounts_tags(self):
+        """Test hidden recipes stop counting for their tags right away."""
+        tag = Tag.objects.create(user=self.user, name="Vegan")
+        shared = Tag.objects.create(user=self.user, name="Quick")
+        hidden = create_recipe(user=self.user, price=Decimal("2.00"))
+        kept = create_recipe(user=self.user, price=Decimal("20.00"))
+        hidden.tags.add(tag, shared)
+        kept.tags.add(shared)
+
+        self.client.post(DELETE_URL, {"recipes": [hidden.id]}, format="json")
+
+        res = self.client.get(STATS_URL)
+        self.assertEqual(
+            [(row["name"], row["recipe_count"]) for row in res.data["top_tags"]],
+            [("Quick", 1)],
+        )
+        res = self.client.get(TAGS_URL, {"assigned_only": 1})
+        self.assertEqual([row["id"] for row in res.data], [shared.id])
+
+        purge()
+        tag.refresh_from_db()
+        shared.refresh_from_db()
+        self.assertEqual((tag.recipe_count, shared.recipe_count), (0, 1))
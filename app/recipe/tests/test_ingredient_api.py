@@ -94,6 +94,18 @@ class PrivateIngredientsAPITests(APITestCase):
         ingredient.refresh_from_db()
         self.assertEqual(ingredient.name, payload["name"])
 
+    def test_rename_ingredient_to_existing_name(self):
+        """Test renaming to a name already used is rejected."""
+        ingredient = create_ingredient(user=self.user, name="Before")
+        create_ingredient(user=self.user, name="Vanilla")
+
+        res = self.client.patch(detail_url(ingredient.id), {"name": "Vanilla"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("name", res.data)
+        res = self.client.patch(detail_url(ingredient.id), {"name": "Before"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
     def test_delete_ingredient(self):
         """Test deleting an ingredient successful."""
         ingredient = create_ingredient(user=self.user)
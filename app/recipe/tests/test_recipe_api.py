@@ -4,10 +4,12 @@ Tests for recipe APIs.
 from decimal import Decimal
 import tempfile
 import os
+from unittest.mock import patch
 
 from PIL import Image
 from django.contrib.auth import get_user_model
 from django.urls import reverse
+from django.test import override_settings
 
 from rest_framework.test import APITestCase
 from rest_framework import status
@@ -17,6 +19,7 @@ from recipe.serializers import RecipeSerializer, RecipeDetailSerializer
 
 
 RECIPES_URL = reverse("recipe:recipe-list")
+BATCH_URL = reverse("recipe:recipe-batch")
 
 
 def detail_url(recipe_id):
@@ -417,6 +420,303 @@ class PrivateRecipeAPITests(APITestCase):
         self.assertIn(s2.data, res.data)
         self.assertNotIn(s3.data, res.data)
 
+    def test_list_sparse_fields(self):
+        """Test restricting the list response with the fields parameter."""
+        recipe = create_recipe(user=self.user)
+        recipe.tags.add(Tag.objects.create(user=self.user, name="Vegan"))
+
+        with self.assertNumQueries(1):
+            res = self.client.get(RECIPES_URL, {"fields": "id,title"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [{"id": recipe.id, "title": recipe.title}])
+
+    def test_list_exclude_fields(self):
+        """Test leaving fields out of the list response."""
+        recipe = create_recipe(user=self.user)
+        recipe.ingredients.add(Ingredient.objects.create(user=self.user, name="Salt"))
+
+        with self.assertNumQueries(2):
+            res = self.client.get(RECIPES_URL, {"exclude": "tags,price"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        expected = RecipeSerializer(recipe).data
+        del expected["tags"], expected["price"]
+        self.assertEqual(res.data, [expected])
+
+    def test_list_prefetches_relations(self):
+        """Test listing recipes does not query relations per recipe."""
+        for n in range(3):
+            recipe = create_recipe(user=self.user)
+            recipe.tags.add(Tag.objects.create(user=self.user, name=f"Vegan {n}"))
+
+        with self.assertNumQueries(3):
+            res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(len(res.data), 3)
+
+    def test_detail_sparse_fields(self):
+        """Test restricting the detail response with the fields parameter."""
+        recipe = create_recipe(user=self.user)
+
+        res = self.client.get(detail_url(recipe.id), {"fields": "description"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {"description": recipe.description})
+
+    def test_unknown_sparse_field_error(self):
+        """Test requesting an unknown field returns an error."""
+        res = self.client.get(RECIPES_URL, {"fields": "id,user"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("fields", res.data)
+
+    def test_fast_read_path_identical(self):
+        """Test the fast read path renders exactly what the serializers do."""
+        recipe = create_recipe(user=self.user, link="", description="Crème brûlée")
+        recipe.tags.add(
+            Tag.objects.create(user=self.user, name="Dessert"),
+            Tag.objects.create(user=self.user, name="French"),
+        )
+        recipe.ingredients.add(Ingredient.objects.create(user=self.user, name="Egg"))
+        recipe.image = "uploads/recipe/example.jpg"
+        recipe.save()
+        create_recipe(user=self.user, price=Decimal("10.00"))
+
+        requests = [
+            (RECIPES_URL, {}),
+            (RECIPES_URL, {"fields": "id,price,tags"}),
+            (detail_url(recipe.id), {}),
+            (detail_url(recipe.id), {"exclude": "ingredients,title"}),
+        ]
+        for url, params in requests:
+            with self.settings(RECIPE_FAST_READ=False):
+                expected = self.client.get(url, params)
+            res = self.client.get(url, params)
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(res.content, expected.content)
+
+    @override_settings(STREAM_JSON_LISTS=True)
+    def test_stream_recipe_list(self):
+        """Test recipe lists can be streamed with an identical body."""
+        for n in range(3):
+            recipe = create_recipe(user=self.user, title=f"Recipe {n}")
+            recipe.tags.add(Tag.objects.create(user=self.user, name=f"Tag {n}"))
+
+        res = self.client.get(RECIPES_URL)
+        with self.settings(STREAM_JSON_LISTS=False):
+            expected = self.client.get(RECIPES_URL)
+
+        self.assertTrue(res.streaming)
+        self.assertEqual(res["Content-Type"], "application/json")
+        self.assertEqual(b"".join(res.streaming_content), expected.content)
+
+    def test_fast_read_path_other_users_recipe(self):
+        """Test the fast read path does not return other users' recipes."""
+        other_user = create_user(email="user2@example.com", password="testpass123")
+        recipe = create_recipe(user=other_user)
+
+        res = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_filter_by_ranges(self):
+        """Test filtering recipes by time and price ranges."""
+        r1 = create_recipe(user=self.user, time_minutes=10, price=Decimal("3.00"))
+        r2 = create_recipe(user=self.user, time_minutes=30, price=Decimal("8.50"))
+        r3 = create_recipe(user=self.user, time_minutes=60, price=Decimal("20.00"))
+
+        requests = [
+            ({"time_minutes__lte": "30"}, {r1.id, r2.id}),
+            ({"time_minutes__gte": "30", "price__lte": "8.50"}, {r2.id}),
+            ({"price__gte": "5", "price__lte": "25"}, {r2.id, r3.id}),
+        ]
+        for params, expected in requests:
+            res = self.client.get(RECIPES_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual({recipe["id"] for recipe in res.data}, expected)
+
+    def test_invalid_filters_error(self):
+        """Test invalid range filters and orderings return an error."""
+        for params in [
+            {"time_minutes__gte": "soon"},
+            {"time_minutes__lte": "-1"},
+            {"price__lte": "1000"},
+            {"ordering": "title"},
+        ]:
+            res = self.client.get(RECIPES_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn(next(iter(params)), res.data)
+
+    def test_ordering(self):
+        """Test sorting recipes by price and time, ties broken by id."""
+        r1 = create_recipe(user=self.user, time_minutes=30, price=Decimal("8.00"))
+        r2 = create_recipe(user=self.user, time_minutes=10, price=Decimal("8.00"))
+        r3 = create_recipe(user=self.user, time_minutes=20, price=Decimal("2.00"))
+
+        requests = [
+            ("price", [r3.id, r1.id, r2.id]),
+            ("-price", [r2.id, r1.id, r3.id]),
+            ("time_minutes", [r2.id, r3.id, r1.id]),
+            ("id", [r1.id, r2.id, r3.id]),
+        ]
+        for ordering, expected in requests:
+            res = self.client.get(RECIPES_URL, {"ordering": ordering})
+
+            self.assertEqual([recipe["id"] for recipe in res.data], expected)
+
+    def test_keyset_pagination(self):
+        """Test walking the pages returns every recipe once, in order."""
+        for n in range(7):
+            create_recipe(
+                user=self.user,
+                time_minutes=n % 3,
+                price=Decimal(n % 2) + Decimal("0.50"),
+            )
+
+        for ordering in ["price", "-time_minutes", "-id"]:
+            expected = [
+                recipe["id"]
+                for recipe in self.client.get(RECIPES_URL, {"ordering": ordering}).data
+            ]
+            ids = []
+            url, params = RECIPES_URL, {"ordering": ordering, "limit": 3}
+            while url:
+                res = self.client.get(url, params)
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+                self.assertLessEqual(len(res.data["results"]), 3)
+                ids.extend(recipe["id"] for recipe in res.data["results"])
+                url, params = res.data["next"], None
+
+            self.assertEqual(ids, expected)
+
+    def test_keyset_pagination_fast_read_path_identical(self):
+        """Test pages render the same with and without the fast read path."""
+        for n in range(3):
+            create_recipe(user=self.user, price=Decimal(n))
+
+        params = {"ordering": "-price", "limit": 2}
+        with self.settings(RECIPE_FAST_READ=False):
+            expected = self.client.get(RECIPES_URL, params)
+        res = self.client.get(RECIPES_URL, params)
+
+        self.assertEqual(res.content, expected.content)
+        self.assertEqual(len(res.data["results"]), 2)
+        self.assertIsNotNone(res.data["next"])
+
+    def test_paginated_count(self):
+        """Test pages carry an exact count of small lists."""
+        for n in range(3):
+            create_recipe(user=self.user, price=Decimal(n))
+
+        res = self.client.get(RECIPES_URL, {"limit": 1, "price__gte": "1"})
+
+        self.assertEqual(res.data["count"], 2)
+        self.assertTrue(res.data["count_is_exact"])
+
+    @override_settings(EXACT_COUNT_LIMIT=2)
+    def test_paginated_estimated_count(self):
+        """Test large lists are counted with the planner estimate."""
+        for n in range(3):
+            create_recipe(user=self.user)
+
+        with patch("core.pagination._planner_rows", return_value=1200):
+            res = self.client.get(RECIPES_URL, {"limit": 1})
+
+        self.assertEqual(res.data["count"], 1200)
+        self.assertFalse(res.data["count_is_exact"])
+        self.assertEqual(len(res.data["results"]), 1)
+
+    def test_invalid_pagination_error(self):
+        """Test invalid limits and cursors return an error."""
+        create_recipe(user=self.user)
+
+        for params in [{"limit": "0"}, {"limit": "x"}, {"cursor": "garbage"}]:
+            res = self.client.get(RECIPES_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_cursor_from_other_ordering_error(self):
+        """Test a cursor cannot be reused with another ordering."""
+        for n in range(3):
+            create_recipe(user=self.user, price=Decimal(n))
+
+        res = self.client.get(RECIPES_URL, {"ordering": "price", "limit": 1})
+        res = self.client.get(res.data["next"].replace("price", "-id"))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_batch_retrieve(self):
+        """Test retrieving several recipes by id, in the requested order."""
+        r1 = create_recipe(user=self.user, title="Soup")
+        r2 = create_recipe(user=self.user, title="Stew")
+        r2.tags.add(Tag.objects.create(user=self.user, name="Winter"))
+        other_user = create_user(email="user2@example.com", password="testpass123")
+        foreign = create_recipe(user=other_user)
+
+        ids = [r2.id, foreign.id, 9999, r1.id, r2.id]
+        res = self.client.get(BATCH_URL, {"ids": ",".join(map(str, ids))})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data,
+            [
+                {
+                    "id": r2.id,
+                    "status": 200,
+                    "recipe": RecipeDetailSerializer(r2).data,
+                },
+                {"id": foreign.id, "status": 404, "detail": "Not found."},
+                {"id": 9999, "status": 404, "detail": "Not found."},
+                {
+                    "id": r1.id,
+                    "status": 200,
+                    "recipe": RecipeDetailSerializer(r1).data,
+                },
+            ],
+        )
+
+    def test_batch_retrieve_constant_queries(self):
+        """Test the batch retrieve query count does not grow with the ids."""
+        recipes = []
+        for n in range(20):
+            recipe = create_recipe(user=self.user)
+            recipe.tags.add(Tag.objects.create(user=self.user, name=f"Tag {n}"))
+            recipes.append(recipe)
+
+        for count in [2, 20]:
+            ids = ",".join(str(recipe.id) for recipe in recipes[:count])
+            for fast_read in [True, False]:
+                with self.settings(RECIPE_FAST_READ=fast_read):
+                    with self.assertNumQueries(3):
+                        res = self.client.get(BATCH_URL, {"ids": ids})
+                    self.assertEqual(len(res.data), count)
+
+    def test_batch_retrieve_fast_read_path_identical(self):
+        """Test the batch retrieve renders the same through both paths."""
+        recipe = create_recipe(user=self.user)
+        recipe.ingredients.add(Ingredient.objects.create(user=self.user, name="Egg"))
+
+        for params in [{}, {"fields": "title,ingredients"}]:
+            params["ids"] = f"{recipe.id},{recipe.id + 1}"
+            with self.settings(RECIPE_FAST_READ=False):
+                expected = self.client.get(BATCH_URL, params)
+            res = self.client.get(BATCH_URL, params)
+
+            self.assertEqual(res.content, expected.content)
+
+    def test_batch_retrieve_invalid_ids_error(self):
+        """Test missing, malformed and too many ids return an error."""
+        too_many = ",".join(str(n) for n in range(1, 102))
+        for params in [{}, {"ids": "1,x"}, {"ids": too_many}]:
+            res = self.client.get(BATCH_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn("ids", res.data)
+
 
 class ImageUploadTests(APITestCase):
     """Tests for the image upload API."""
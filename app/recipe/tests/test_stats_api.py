@@ -0,0 +1,128 @@
+"""
+Tests for the recipe statistics API.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from core.models import Ingredient, Recipe, Tag
+
+
+STATS_URL = reverse("recipe:stats")
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        "title": "Sample recipe title",
+        "time_minutes": 10,
+        "price": Decimal("5.00"),
+    }
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class PublicStatsAPITests(APITestCase):
+    """Test unauthenticated API requests."""
+
+    def test_auth_required(self):
+        """Test auth is required to retrieve statistics."""
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateStatsAPITests(APITestCase):
+    """Test authenticated API requests."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="testpass123"
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_empty_stats(self):
+        """Test statistics of a user without recipes."""
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["recipe_count"], 0)
+        self.assertEqual(res.data["price"]["total"], "0.00")
+        self.assertIsNone(res.data["price"]["avg"])
+        self.assertEqual(res.data["top_tags"], [])
+
+    def test_stats(self):
+        """Test totals, distribution and top tags are computed."""
+        vegan = Tag.objects.create(user=self.user, name="Vegan")
+        quick = Tag.objects.create(user=self.user, name="Quick")
+        salt = Ingredient.objects.create(user=self.user, name="Salt")
+        for minutes, price in [(10, "4.50"), (20, "12.00"), (60, "75.00")]:
+            recipe = create_recipe(
+                self.user, time_minutes=minutes, price=Decimal(price)
+            )
+            recipe.tags.add(vegan)
+            recipe.ingredients.add(salt)
+        recipe.tags.add(quick)
+        other_user = get_user_model().objects.create_user(
+            email="other@example.com", password="testpass123"
+        )
+        create_recipe(other_user, price=Decimal("1.00"))
+
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.data["recipe_count"], 3)
+        self.assertEqual(res.data["time_minutes"], {"avg": 30.0, "min": 10, "max": 60})
+        self.assertEqual(res.data["price"]["total"], "91.50")
+        self.assertEqual(res.data["price"]["avg"], "30.50")
+        self.assertEqual(
+            [bucket["count"] for bucket in res.data["price"]["distribution"]],
+            [1, 0, 1, 0, 1],
+        )
+        self.assertIsNone(res.data["price"]["distribution"][-1]["max"])
+        self.assertEqual(
+            [(tag["name"], tag["recipe_count"]) for tag in res.data["top_tags"]],
+            [("Vegan", 3), ("Quick", 1)],
+        )
+        self.assertEqual(res.data["top_ingredients"][0]["name"], "Salt")
+
+    def test_stats_cached_until_data_changes(self):
+        """Test statistics are cached until the user's data changes."""
+        create_recipe(self.user)
+        self.client.get(STATS_URL)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(STATS_URL)
+        self.assertEqual(res.data["recipe_count"], 1)
+
+        create_recipe(self.user)
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.data["recipe_count"], 2)
+
+    def test_profile_update_keeps_data_version(self):
+        """Test saving a user loaded earlier does not revert its version."""
+        user = get_user_model().objects.get(pk=self.user.pk)
+        create_recipe(self.user)
+
+        user.name = "New name"
+        user.save()
+
+        user.refresh_from_db()
+        self.assertEqual(user.data_version, 1)
+
+    def test_not_modified(self):
+        """Test a matching If-None-Match gets a 304."""
+        etag = self.client.get(STATS_URL)["ETag"]
+
+        res = self.client.get(STATS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Tag.objects.create(user=self.user, name="Vegan")
+        res = self.client.get(STATS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
@@ -0,0 +1,249 @@
+"""
+Tests for the sync API.
+"""
+import time
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from core.models import Ingredient, Recipe, Tag, Tombstone
+from core.purge import purge
+from recipe import bulk
+from recipe.sync import encode_token
+
+
+SYNC_URL = reverse("recipe:sync")
+DELETE_URL = reverse("recipe:recipe-bulk-delete")
+
+
+def create_user(email="user@example.com"):
+    """Create and return a new user"""
+    return get_user_model().objects.create_user(email=email, password="testpass123")
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        "title": "Sample recipe title",
+        "time_minutes": 10,
+        "price": Decimal("5.00"),
+    }
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+def ids(rows):
+    return sorted(row["id"] for row in rows)
+
+
+class PublicSyncAPITests(APITestCase):
+    """Test unauthenticated API requests."""
+
+    def test_auth_required(self):
+        """Test auth is required to sync."""
+        res = self.client.get(SYNC_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateSyncAPITests(APITestCase):
+    """Test authenticated API requests."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+
+    def sync(self, since=None, **params):
+        if since is not None:
+            params["since"] = since
+        res = self.client.get(SYNC_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def test_full_sync(self):
+        """Test a sync without a token returns all of the user's data."""
+        tag = Tag.objects.create(user=self.user, name="Vegan")
+        ingredient = Ingredient.objects.create(user=self.user, name="Salt")
+        recipe = create_recipe(user=self.user)
+        recipe.tags.add(tag)
+        recipe.ingredients.add(ingredient)
+        create_recipe(user=create_user("other@example.com"))
+
+        data = self.sync()
+
+        self.assertEqual(data["tags"][0]["id"], tag.id)
+        self.assertEqual(data["ingredients"][0]["id"], ingredient.id)
+        self.assertEqual(len(data["recipes"]), 1)
+        self.assertEqual(data["recipes"][0]["tags"], [tag.id])
+        self.assertEqual(data["recipes"][0]["ingredients"], [ingredient.id])
+        self.assertIn("updated_at", data["recipes"][0])
+        self.assertEqual(
+            data["deleted"], {"tags": [], "ingredients": [], "recipes": []}
+        )
+        self.assertFalse(data["more"])
+
+    def test_no_changes_single_query(self):
+        """Test a sync with nothing new costs one query and returns nothing."""
+        create_recipe(user=self.user)
+        token = self.sync()["next"]
+
+        with self.assertNumQueries(1):
+            data = self.sync(token)
+
+        self.assertEqual(data["recipes"], [])
+        self.assertFalse(data["more"])
+        self.assertEqual(self.sync(data["next"])["recipes"], [])
+
+    def test_only_changed_rows(self):
+        """Test only rows changed since the token are returned."""
+        r1 = create_recipe(user=self.user)
+        create_recipe(user=self.user)
+        Tag.objects.create(user=self.user, name="Vegan")
+        token = self.sync()["next"]
+
+        r1.title = "Changed"
+        r1.save()
+        data = self.sync(token)
+
+        self.assertEqual(ids(data["recipes"]), [r1.id])
+        self.assertEqual(data["recipes"][0]["title"], "Changed")
+        self.assertEqual(data["tags"], [])
+
+    def test_link_changes(self):
+        """Test recipes whose tags change are returned."""
+        recipe = create_recipe(user=self.user)
+        other = create_recipe(user=self.user)
+        tag = Tag.objects.create(user=self.user, name="Vegan")
+        token = self.sync()["next"]
+
+        tag.recipe_set.add(recipe)
+        data = self.sync(token)
+        self.assertEqual(ids(data["recipes"]), [recipe.id])
+        self.assertEqual(data["recipes"][0]["tags"], [tag.id])
+
+        bulk.attach(self.user, Recipe.objects.filter(pk=other.pk), "tags", [tag.id])
+        self.assertEqual(ids(self.sync(data["next"])["recipes"]), [other.id])
+
+    def test_bulk_link_changes_only(self):
+        """Test bulk actions return only the recipes whose links changed."""
+        linked = create_recipe(user=self.user)
+        unlinked = create_recipe(user=self.user)
+        tag = Tag.objects.create(user=self.user, name="Vegan")
+        linked.tags.add(tag)
+        recipes = Recipe.objects.filter(pk__in=[linked.pk, unlinked.pk])
+        token = self.sync()["next"]
+
+        bulk.attach(self.user, recipes, "tags", [tag.id])
+        data = self.sync(token)
+        self.assertEqual(ids(data["recipes"]), [unlinked.id])
+
+        unlinked.tags.remove(tag)
+        token = self.sync(data["next"])["next"]
+        bulk.detach(self.user, recipes, "tags", [tag.id])
+        self.assertEqual(ids(self.sync(token)["recipes"]), [linked.id])
+
+    def test_deletions(self):
+        """Test deleted and bulk deleted objects are returned as deleted."""
+        tag = Tag.objects.create(user=self.user, name="Vegan")
+        r1 = create_recipe(user=self.user)
+        r2 = create_recipe(user=self.user)
+        deleted = {"tags": [tag.id], "recipes": [r1.id, r2.id]}
+        token = self.sync()["next"]
+
+        tag.delete()
+        r1.delete()
+        self.client.post(DELETE_URL, {"recipes": [r2.id]}, format="json")
+        data = self.sync(token)
+
+        self.assertEqual(data["deleted"]["tags"], deleted["tags"])
+        self.assertEqual(sorted(data["deleted"]["recipes"]), deleted["recipes"])
+        self.assertEqual(data["recipes"], [])
+
+    def test_merge(self):
+        """Test merged tags are deleted and their recipes returned."""
+        target = Tag.objects.create(user=self.user, name="Vegan")
+        source = Tag.objects.create(user=self.user, name="vegan")
+        recipe = create_recipe(user=self.user)
+        recipe.tags.add(source)
+        token = self.sync()["next"]
+
+        bulk.merge(target, [source.id])
+        data = self.sync(token)
+
+        self.assertEqual(data["deleted"]["tags"], [source.id])
+        self.assertEqual(data["recipes"][0]["tags"], [target.id])
+
+    def test_pages(self):
+        """Test following the tokens returns every change exactly once."""
+        recipes = [create_recipe(user=self.user) for _ in range(3)]
+        tags = bulk.upsert(Tag, self.user, ["A", "B", "C"])
+        Recipe.objects.get(pk=recipes[0].pk).delete()
+
+        seen, token, more = [], None, True
+        while more:
+            data = self.sync(token, limit=2)
+            self.assertLessEqual(
+                len(data["recipes"])
+                + len(data["tags"])
+                + len(data["deleted"]["recipes"]),
+                2,
+            )
+            seen += [("recipe", row["id"]) for row in data["recipes"]]
+            seen += [("tag", row["id"]) for row in data["tags"]]
+            seen += [("deleted", pk) for pk in data["deleted"]["recipes"]]
+            token, more = data["next"], data["more"]
+
+        self.assertEqual(
+            sorted(seen),
+            sorted(
+                [("recipe", r.id) for r in recipes[1:]]
+                + [("tag", tag.pk) for tag in tags.values()]
+                + [("deleted", recipes[0].id)]
+            ),
+        )
+
+    def test_invalid_token(self):
+        """Test an invalid token is rejected."""
+        res = self.client.get(SYNC_URL, {"since": "nonsense"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_expired_token(self):
+        """Test a token older than the tombstones kept asks for a full sync."""
+        token = encode_token(0, 4, 0, int(time.time()) - 3600)
+
+        with self.settings(SYNC_TOKEN_TTL=60):
+            res = self.client.get(SYNC_URL, {"since": token})
+
+        self.assertEqual(res.status_code, status.HTTP_410_GONE)
+
+    def test_purge_old_tombstones(self):
+        """Test tombstones older than the token lifetime are purged."""
+        Tag.objects.create(user=self.user, name="Old").delete()
+        Tag.objects.create(user=self.user, name="New").delete()
+        old = Tombstone.objects.order_by("pk").first()
+        Tombstone.objects.filter(pk=old.pk).update(
+            deleted_at=timezone.now() - timedelta(days=365)
+        )
+
+        self.assertEqual(purge(), 1)
+        self.assertEqual(Tombstone.objects.count(), 1)
+
+    def test_user_delete_leaves_no_tombstones(self):
+        """Test deleting an account does not record its objects' deletion."""
+        create_recipe(user=self.user).tags.add(
+            Tag.objects.create(user=self.user, name="Vegan")
+        )
+
+        with patch("core.signals.record_deletions") as record:
+            self.user.delete()
+
+        record.assert_not_called()
+        self.assertFalse(Tombstone.objects.exists())
@@ -14,6 +14,7 @@ from recipe.serializers import TagSerializer
 
 
 TAGS_URL = reverse("recipe:tag-list")
+UPSERT_URL = reverse("recipe:tag-bulk-upsert")
 
 
 def detail_url(tag_id):
@@ -21,6 +22,11 @@ def detail_url(tag_id):
     return reverse("recipe:tag-detail", args=[tag_id])
 
 
+def merge_url(tag_id):
+    """Create and return a tag merge url."""
+    return reverse("recipe:tag-merge", args=[tag_id])
+
+
 def create_user(email="user@example.com", password="testpass123"):
     """Create and return a new user"""
     return get_user_model().objects.create_user(email=email, password=password)
@@ -94,6 +100,18 @@ class PrivateTagsAPITests(APITestCase):
         tag.refresh_from_db()
         self.assertEqual(tag.name, payload["name"])
 
+    def test_rename_tag_to_existing_name(self):
+        """Test renaming to a name already used is rejected."""
+        tag = create_tag(user=self.user, name="Before")
+        create_tag(user=self.user, name="Dessert")
+
+        res = self.client.patch(detail_url(tag.id), {"name": "Dessert"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("name", res.data)
+        res = self.client.patch(detail_url(tag.id), {"name": "Before"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
     def test_delete_tag(self):
         """Test deleting a tag successful."""
         tag = create_tag(user=self.user)
@@ -146,3 +164,151 @@ class PrivateTagsAPITests(APITestCase):
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(len(res.data), 1)
+
+    def test_order_tags_by_recipe_count(self):
+        """Test listing tags by the number of recipes using them."""
+        tag1 = create_tag(user=self.user, name="Vegan")
+        tag2 = create_tag(user=self.user, name="Vegetarian")
+        for n in range(2):
+            recipe = Recipe.objects.create(
+                title=f"Crumble {n}",
+                time_minutes=5,
+                price=Decimal("5.45"),
+                user=self.user,
+            )
+            recipe.tags.add(tag2)
+        recipe.tags.add(tag1)
+
+        res = self.client.get(TAGS_URL, {"ordering": "-recipe_count"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([tag["id"] for tag in res.data], [tag2.id, tag1.id])
+
+    def test_invalid_ordering(self):
+        """Test an unknown ordering returns an error."""
+        res = self.client.get(TAGS_URL, {"ordering": "user"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_merge_tags(self):
+        """Test merging tags moves their recipes to the target."""
+        target = create_tag(user=self.user, name="Garlic")
+        dup1 = create_tag(user=self.user, name="garlic ")
+        dup2 = create_tag(user=self.user, name="garlic")
+        recipes = [
+            Recipe.objects.create(
+                title=f"Recipe {n}",
+                time_minutes=5,
+                price=Decimal("5.45"),
+                user=self.user,
+            )
+            for n in range(3)
+        ]
+        recipes[0].tags.add(target, dup1)
+        recipes[1].tags.add(dup1, dup2)
+        recipes[2].tags.add(dup2)
+
+        res = self.client.post(
+            merge_url(target.id), {"sources": [dup1.id, dup2.id]}, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        target.refresh_from_db()
+        self.assertEqual(res.data, TagSerializer(target).data)
+        self.assertEqual(list(Tag.objects.filter(user=self.user)), [target])
+        self.assertEqual(
+            set(target.recipe_set.values_list("id", flat=True)),
+            {recipe.id for recipe in recipes},
+        )
+        self.assertEqual(target.recipe_count, 3)
+
+    def test_merge_other_users_tags_ignored(self):
+        """Test tags of other users are not merged."""
+        target = create_tag(user=self.user, name="Garlic")
+        other_tag = create_tag(user=create_user(email="other@example.com"))
+
+        res = self.client.post(
+            merge_url(target.id), {"sources": [other_tag.id]}, format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(Tag.objects.filter(id=other_tag.id).exists())
+
+        res = self.client.post(
+            merge_url(other_tag.id), {"sources": [target.id]}, format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertTrue(Tag.objects.filter(id=target.id).exists())
+
+    def test_bulk_upsert_tags(self):
+        """Test creating the missing tags and returning every id in order."""
+        existing = create_tag(user=self.user, name="Vegan")
+        other_tag = create_tag(user=create_user(email="other@example.com"), name="Keto")
+        names = ["Keto", "  Vegan", "Quick  meal", "Keto"]
+
+        # The lookups, the change sequence and the insert, in a savepoint.
+        with self.assertNumQueries(7):
+            res = self.client.post(UPSERT_URL, {"names": names}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        tags = Tag.objects.filter(user=self.user)
+        self.assertEqual(
+            res.data,
+            TagSerializer(
+                [tags.get(name="Keto"), existing, tags.get(name="Quick meal")],
+                many=True,
+            ).data,
+        )
+        self.assertNotEqual(res.data[0]["id"], other_tag.id)
+        self.assertEqual(tags.count(), 3)
+
+    def test_bulk_upsert_existing_tags(self):
+        """Test upserting existing tags creates nothing."""
+        tag = create_tag(user=self.user, name="Vegan")
+
+        with self.assertNumQueries(1):
+            res = self.client.post(UPSERT_URL, {"names": ["Vegan"]}, format="json")
+
+        self.assertEqual(res.data, [{"id": tag.id, "name": "Vegan"}])
+
+    def test_bulk_upsert_matches_normalized_names(self):
+        """Test names differing in case or spacing return the existing tag."""
+        tag = create_tag(user=self.user, name="Garlic")
+        names = ["garlic", " GARLIC ", "Onion", "onion"]
+
+        res = self.client.post(UPSERT_URL, {"names": names}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        onion = Tag.objects.get(user=self.user, name="Onion")
+        self.assertEqual(
+            res.data,
+            [{"id": tag.id, "name": "Garlic"}] * 2
+            + [{"id": onion.id, "name": "Onion"}] * 2,
+        )
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+
+    def test_bulk_upsert_invalid_names(self):
+        """Test empty and blank names are rejected."""
+        for names in [[], ["Vegan", "  "], ["x" * 256]]:
+            res = self.client.post(UPSERT_URL, {"names": names}, format="json")
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Tag.objects.exists())
+
+    def test_paginate_tags_by_recipe_count(self):
+        """Test paging through tags sorted by a non-unique recipe count."""
+        tags = [create_tag(user=self.user, name=f"Tag {n}") for n in range(5)]
+        recipe = Recipe.objects.create(
+            title="Crumble", time_minutes=5, price=Decimal("5.45"), user=self.user
+        )
+        recipe.tags.add(tags[1], tags[3])
+
+        ids = []
+        url, params = TAGS_URL, {"ordering": "-recipe_count", "limit": 2}
+        while url:
+            res = self.client.get(url, params)
+            self.assertEqual(res.data["count"], 5)
+            ids.extend(tag["id"] for tag in res.data["results"])
+            url, params = res.data["next"], None
+
+        expected = [tags[3], tags[1], tags[4], tags[2], tags[0]]
+        self.assertEqual(ids, [tag.id for tag in expected])
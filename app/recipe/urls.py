@@ -1,10 +1,11 @@
 """
 URL mappings for the recipe app.
 """
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from recipe import views
+from recipe import async_views, views
 
 router = DefaultRouter()
 router.register("recipes", views.RecipeViewSet)
@@ -14,5 +15,17 @@ router.register("ingredients", views.IngredientViewSet)
 app_name = "recipe"
 
 urlpatterns = [
+    path("stats/", views.RecipeStatsView.as_view(), name="stats"),
+    path("sync/", views.RecipeSyncView.as_view(), name="sync"),
     path("", include(router.urls)),
 ]
+
+# Under ASGI the read endpoints are served by native async views, which
+# delegate anything other than a JSON GET back to the viewsets above.
+if settings.ASYNC_VIEWS:
+    urlpatterns = [
+        path("recipes/", async_views.recipe_list),
+        path("recipes/<int:pk>/", async_views.recipe_detail),
+        path("tags/", async_views.tag_list),
+        path("ingredients/", async_views.ingredient_list),
+    ] + urlpatterns
@@ -1,6 +1,13 @@
 """
 Views for the recipe APIs.
 """
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import Http404, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
 from drf_spectacular.utils import (
     OpenApiParameter,
     OpenApiTypes,
@@ -8,19 +15,63 @@ from drf_spectacular.utils import (
     extend_schema_view,
 )
 from rest_framework import mixins, status, viewsets
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from core.authentication import CachedTokenAuthentication
+from core.idempotency import IDEMPOTENCY_PARAMETER, idempotent
 from core.models import Ingredient, Recipe, Tag
+from core.pagination import KeysetPagination
+from core.signals import record_deletions, uncount_hidden_recipes
+from recipe import bulk, sync
 from recipe.serializers import (
+    FastRecipeReader,
     IngredientSerializer,
+    MergeSerializer,
+    RecipeBatchItemSerializer,
+    RecipeBulkDeleteResultSerializer,
+    RecipeBulkLinkResultSerializer,
+    RecipeBulkLinkSerializer,
     RecipeDetailSerializer,
+    RecipeFilterSerializer,
     RecipeImageSerializer,
+    RecipeSelectionSerializer,
     RecipeSerializer,
+    RecipeStatsSerializer,
+    SyncQuerySerializer,
+    SyncSerializer,
     TagSerializer,
+    UpsertSerializer,
 )
+from recipe.stats import recipe_stats
+
+FIELDS_PARAMETERS = [
+    OpenApiParameter(
+        "fields",
+        OpenApiTypes.STR,
+        description="Comma separated list of fields to return.",
+    ),
+    OpenApiParameter(
+        "exclude",
+        OpenApiTypes.STR,
+        description="Comma separated list of fields to leave out.",
+    ),
+]
+BATCH_MAX_IDS = 100
+ATTR_ORDERINGS = ("name", "-name", "recipe_count", "-recipe_count")
+# Each sort key ends with the id as a tie-breaker, as keyset pagination needs
+# a unique ordering; they match the (user, key, id) indexes on Recipe.
+RECIPE_ORDERINGS = {
+    "-id": ("-id",),
+    "id": ("id",),
+    "price": ("price", "id"),
+    "-price": ("-price", "-id"),
+    "time_minutes": ("time_minutes", "id"),
+    "-time_minutes": ("-time_minutes", "-id"),
+}
 
 
 @extend_schema_view(
@@ -36,21 +87,100 @@ from recipe.serializers import (
                 OpenApiTypes.STR,
                 description="Comma separated list of ingredient IDs to filter.",
             ),
+            *[
+                OpenApiParameter(name, type_, description=description)
+                for name, type_, description in [
+                    ("time_minutes__gte", OpenApiTypes.INT, "Minimum time."),
+                    ("time_minutes__lte", OpenApiTypes.INT, "Maximum time."),
+                    ("price__gte", OpenApiTypes.DECIMAL, "Minimum price."),
+                    ("price__lte", OpenApiTypes.DECIMAL, "Maximum price."),
+                ]
+            ],
+            OpenApiParameter(
+                "ordering",
+                OpenApiTypes.STR,
+                enum=list(RECIPE_ORDERINGS),
+                description="Sort key, descending with a leading -.",
+            ),
+            *FIELDS_PARAMETERS,
         ]
-    )
+    ),
+    retrieve=extend_schema(parameters=FIELDS_PARAMETERS),
+    create=extend_schema(parameters=[IDEMPOTENCY_PARAMETER]),
+    update=extend_schema(parameters=[IDEMPOTENCY_PARAMETER]),
+    partial_update=extend_schema(parameters=[IDEMPOTENCY_PARAMETER]),
 )
 class RecipeViewSet(viewsets.ModelViewSet):
     """View to manage recipe APIs."""
 
     serializer_class = RecipeDetailSerializer
     queryset = Recipe.objects.all()
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    pagination_class = KeysetPagination
+    # Set per action for costly ones, see core.throttling.
+    throttle_scope = None
 
     def _params_to_ints(self, qs):
         """Convert a list of strings to integers."""
         return [int(str_id) for str_id in qs.split(",")]
 
+    def _params_to_names(self, qs):
+        """Convert a comma separated string to a list of names."""
+        return [name for name in qs.split(",") if name]
+
+    def get_requested_fields(self):
+        """Return the fields selected with ``fields``/``exclude``, if any."""
+        if self.action not in ("list", "retrieve", "batch"):
+            return None
+        if not hasattr(self, "_requested_fields"):
+            self._requested_fields = self._parse_requested_fields()
+        return self._requested_fields
+
+    def _parse_requested_fields(self):
+        fields = self.request.query_params.get("fields")
+        exclude = self.request.query_params.get("exclude")
+        if fields is None and exclude is None:
+            return None
+
+        available = self.get_serializer_class().Meta.fields
+        selected = self._params_to_names(fields) if fields else available
+        excluded = self._params_to_names(exclude or "")
+        unknown = [name for name in selected + excluded if name not in available]
+        if unknown:
+            raise ValidationError(
+                {"fields": [f"Unknown field: {name}." for name in unknown]}
+            )
+
+        return [name for name in available if name in selected and name not in excluded]
+
+    def _select_fields(self, queryset):
+        """Load only the columns and relations the response renders."""
+        fields = self.get_requested_fields()
+        relations = {"tags": Tag, "ingredients": Ingredient}
+        if fields is not None:
+            relations = {
+                name: model for name, model in relations.items() if name in fields
+            }
+            columns = [name for name in fields if name not in relations]
+            queryset = queryset.only("id", *columns)
+
+        # Related objects are ordered by id, as in the fast read path.
+        return queryset.prefetch_related(
+            *[
+                Prefetch(name, queryset=model.objects.order_by("id"))
+                for name, model in relations.items()
+            ]
+        )
+
+    def _filter_and_order(self, queryset):
+        """Apply the validated range filters and ordering of the list."""
+        params = RecipeFilterSerializer(data=self.request.query_params)
+        params.is_valid(raise_exception=True)
+        filters = dict(params.validated_data)
+        ordering = filters.pop("ordering")
+        return queryset.filter(**filters).order_by(*RECIPE_ORDERINGS[ordering])
+
     def get_queryset(self):
         """Retrieve recipes for authenticated user."""
         tags = self.request.query_params.get("tags")
@@ -64,7 +194,24 @@ class RecipeViewSet(viewsets.ModelViewSet):
             ingredient_ids = self._params_to_ints(ingredients)
             queryset = queryset.filter(ingredients__id__in=ingredient_ids)
 
-        return queryset.filter(user=self.request.user).order_by("-id").distinct()
+        queryset = (
+            queryset.filter(user=self.request.user, pending_deletion=False)
+            .order_by("-id")
+            .distinct()
+        )
+        if self.action == "list":
+            queryset = self._filter_and_order(queryset)
+        if self.action in ("list", "retrieve", "batch"):
+            queryset = self._select_fields(queryset)
+
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        """Return the serializer, restricted to the requested fields."""
+        fields = self.get_requested_fields()
+        if fields is not None:
+            kwargs.setdefault("fields", fields)
+        return super().get_serializer(*args, **kwargs)
 
     def get_serializer_class(self):
         """Return the serializer class for the request."""
@@ -72,14 +219,180 @@ class RecipeViewSet(viewsets.ModelViewSet):
             return RecipeSerializer
         if self.action == "upload_image":
             return RecipeImageSerializer
+        if self.action in ("bulk_attach", "bulk_detach"):
+            return RecipeBulkLinkSerializer
+        if self.action == "bulk_delete":
+            return RecipeSelectionSerializer
 
         return self.serializer_class
 
+    def list(self, request, *args, **kwargs):
+        """List recipes, through the fast read path when enabled."""
+        if not settings.RECIPE_FAST_READ:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        reader = FastRecipeReader(self.get_serializer())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(reader.render(page))
+
+        renderer = request.accepted_renderer
+        # Django 4.1 iterates streaming responses inside the event loop under
+        # ASGI, where the rows could not be loaded.
+        if (
+            settings.STREAM_JSON_LISTS
+            and not settings.ASYNC_VIEWS
+            and hasattr(renderer, "iter_render")
+        ):
+            return StreamingHttpResponse(
+                renderer.iter_render(
+                    reader.iter_render(queryset),
+                    request.accepted_media_type,
+                    self.get_renderer_context(),
+                ),
+                content_type=renderer.media_type,
+            )
+        return Response(reader.render(queryset))
+
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieve a recipe, through the fast read path when enabled."""
+        if not settings.RECIPE_FAST_READ:
+            return super().retrieve(request, *args, **kwargs)
+
+        try:
+            queryset = self.get_queryset().filter(pk=int(kwargs["pk"]))
+        except ValueError:
+            raise Http404
+        results = FastRecipeReader(self.get_serializer()).render(queryset)
+        if not results:
+            raise Http404
+        return Response(results[0])
+
+    def _batch_ids(self):
+        """Return the distinct ids requested with ``ids``, in order."""
+        try:
+            ids = self._params_to_ints(self.request.query_params.get("ids", ""))
+        except ValueError:
+            raise ValidationError({"ids": ["Must be a comma separated list of ids."]})
+        ids = list(dict.fromkeys(ids))
+        if len(ids) > BATCH_MAX_IDS:
+            raise ValidationError({"ids": [f"At most {BATCH_MAX_IDS} ids allowed."]})
+        return ids
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "ids",
+                OpenApiTypes.STR,
+                required=True,
+                description=f"Comma separated list of up to {BATCH_MAX_IDS} ids.",
+            ),
+            *FIELDS_PARAMETERS,
+        ],
+        responses=RecipeBatchItemSerializer(many=True),
+    )
+    @action(methods=["GET"], detail=False)
+    def batch(self, request):
+        """Retrieve several recipes by id, reporting missing ones per item."""
+        ids = self._batch_ids()
+        queryset = self.get_queryset().filter(pk__in=ids)
+        if settings.RECIPE_FAST_READ:
+            recipes = FastRecipeReader(self.get_serializer()).render_by_id(queryset)
+        else:
+            objects = list(queryset)
+            data = self.get_serializer(objects, many=True).data
+            recipes = {recipe.id: item for recipe, item in zip(objects, data)}
+
+        # Other users' recipes are reported as missing, like in retrieve.
+        results = []
+        for recipe_id in ids:
+            if recipe_id in recipes:
+                results.append(
+                    {"id": recipe_id, "status": 200, "recipe": recipes[recipe_id]}
+                )
+            else:
+                results.append({"id": recipe_id, "status": 404, "detail": "Not found."})
+        return Response(results)
+
+    def _selected_recipes(self, data):
+        """Return the user's recipes selected by ids or by a filter."""
+        recipes = Recipe.objects.filter(user=self.request.user, pending_deletion=False)
+        if "recipes" in data:
+            return recipes.filter(pk__in=data["recipes"])
+        return recipes.filter(**data["filter"])
+
+    def _bulk_link(self, request, link):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        recipes = self._selected_recipes(data)
+
+        with transaction.atomic():
+            counts = {
+                relation: link(request.user, recipes, relation, data[relation])
+                if data[relation]
+                else 0
+                for relation in bulk.RELATIONS
+            }
+        return Response(counts)
+
+    @extend_schema(responses=RecipeBulkLinkResultSerializer)
+    @action(
+        methods=["POST"], detail=False, url_path="bulk-attach", throttle_scope="bulk"
+    )
+    def bulk_attach(self, request):
+        """Link tags and ingredients to many recipes, returning links added."""
+        return self._bulk_link(request, bulk.attach)
+
+    @extend_schema(responses=RecipeBulkLinkResultSerializer)
+    @action(
+        methods=["POST"], detail=False, url_path="bulk-detach", throttle_scope="bulk"
+    )
+    def bulk_detach(self, request):
+        """Unlink tags and ingredients from many recipes, returning links removed."""
+        return self._bulk_link(request, bulk.detach)
+
+    @extend_schema(responses=RecipeBulkDeleteResultSerializer)
+    @action(
+        methods=["POST"], detail=False, url_path="bulk-delete", throttle_scope="bulk"
+    )
+    def bulk_delete(self, request):
+        """Mark many recipes for deletion, purged later in the background."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        # Hidden right away; purge_deleted removes them in batches.
+        with transaction.atomic():
+            ids = list(
+                self._selected_recipes(serializer.validated_data).values_list(
+                    "pk", flat=True
+                )
+            )
+            count = Recipe.objects.filter(pk__in=ids).update(pending_deletion=True)
+            if count:
+                uncount_hidden_recipes(ids)
+                record_deletions(Recipe, request.user.pk, ids)
+        return Response({"recipes": count}, status=status.HTTP_202_ACCEPTED)
+
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
+    @idempotent
+    def update(self, request, *args, **kwargs):
+        # Also serves partial_update, which calls it.
+        return super().update(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         """Create a new recipe."""
         serializer.save(user=self.request.user)
 
-    @action(methods=["POST"], detail=True, url_path="upload-image")
+    @extend_schema(parameters=[IDEMPOTENCY_PARAMETER])
+    @action(
+        methods=["POST"], detail=True, url_path="upload-image", throttle_scope="upload"
+    )
+    @idempotent
     def upload_image(self, request, pk=None):
         """Upload an image to a recipe."""
         recipe = self.get_object()
@@ -101,6 +414,12 @@ class RecipeViewSet(viewsets.ModelViewSet):
                 enum=[0, 1],
                 description="Filter by items assigned to recipes.",
             ),
+            OpenApiParameter(
+                "ordering",
+                OpenApiTypes.STR,
+                enum=list(ATTR_ORDERINGS),
+                description="Sort by name or by the number of recipes using it.",
+            ),
         ]
     )
 )
@@ -112,16 +431,54 @@ class BaseRecipeAttrViewSet(
 ):
     """Base viewset for recipe attributes."""
 
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    pagination_class = KeysetPagination
+    # Set per action for costly ones, see core.throttling.
+    throttle_scope = None
 
     def get_queryset(self):
         """Filter queryset to an authenticated user."""
         assigned_only = bool(int(self.request.query_params.get("assigned_only", 0)))
+        ordering = self.request.query_params.get("ordering", "-name")
+        if ordering not in ATTR_ORDERINGS:
+            raise ValidationError({"ordering": [f"Unknown ordering: {ordering}."]})
+
+        # recipe_count is kept up to date by core.signals and indexed with
+        # user, so neither filter nor sort needs to join the recipes.
         queryset = self.queryset
         if assigned_only:
-            queryset = queryset.filter(recipe__isnull=False)
-        return queryset.filter(user=self.request.user).order_by("-name").distinct()
+            queryset = queryset.filter(recipe_count__gt=0)
+        # The id breaks ties for keyset pagination.
+        tie_break = "-id" if ordering.startswith("-") else "id"
+        return queryset.filter(user=self.request.user).order_by(ordering, tie_break)
+
+    @extend_schema(request=UpsertSerializer)
+    @action(
+        methods=["POST"], detail=False, url_path="bulk-upsert", throttle_scope="bulk"
+    )
+    def bulk_upsert(self, request):
+        """Create the missing objects by name, returning all of them in order."""
+        serializer = UpsertSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        names = serializer.validated_data["names"]
+
+        objects = bulk.upsert(self.queryset.model, request.user, names)
+        return Response(
+            self.get_serializer([objects[name] for name in names], many=True).data
+        )
+
+    @extend_schema(request=MergeSerializer)
+    @action(methods=["POST"], detail=True, throttle_scope="bulk")
+    def merge(self, request, pk=None):
+        """Merge other tags or ingredients of the user into this one."""
+        target = self.get_object()
+        serializer = MergeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        bulk.merge(target, serializer.validated_data["sources"])
+        target.refresh_from_db()
+        return Response(self.get_serializer(target).data)
 
 
 class TagViewSet(BaseRecipeAttrViewSet):
@@ -136,3 +493,55 @@ class IngredientViewSet(BaseRecipeAttrViewSet):
 
     serializer_class = IngredientSerializer
     queryset = Ingredient.objects.all()
+
+
+class RecipeStatsView(APIView):
+    """View for the recipe statistics of the authenticated user."""
+
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(responses=RecipeStatsSerializer)
+    def get(self, request):
+        """Return totals, averages and distributions of the user's recipes."""
+        # Read the version from the database, request.user may be cached.
+        version = (
+            get_user_model()
+            .objects.filter(pk=request.user.pk)
+            .values_list("data_version", flat=True)
+            .get()
+        )
+        etag = f'"{request.user.pk}-{version}"'
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            key = f"recipe-stats:{request.user.pk}:{version}"
+            data = cache.get(key)
+            if data is None:
+                data = RecipeStatsSerializer(recipe_stats(request.user)).data
+                cache.set(key, data, settings.RECIPE_STATS_CACHE_TTL)
+            response = Response(data)
+
+        response["ETag"] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class RecipeSyncView(APIView):
+    """View for the changes of the user's data since a sync token."""
+
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(parameters=[SyncQuerySerializer], responses=SyncSerializer)
+    def get(self, request):
+        """Return a page of the recipes, tags and ingredients changed or deleted."""
+        params = SyncQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        page = sync.changes(
+            request.user,
+            params.validated_data.get("since"),
+            params.validated_data["limit"],
+        )
+        response = Response(SyncSerializer(page, context={"request": request}).data)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
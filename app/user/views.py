@@ -1,10 +1,12 @@
 """
 Views for the User API.
 """
-from rest_framework import authentication, generics, permissions
+from django.contrib.auth import get_user_model
+from rest_framework import generics, permissions
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
 
+from core.authentication import CachedTokenAuthentication
 from user.serializers import AuthTokenSerializer, UserSerializer
 
 
@@ -12,6 +14,7 @@ class CreateUserView(generics.CreateAPIView):
     """Create a new user in the system"""
 
     serializer_class = UserSerializer
+    throttle_scope = "token"
 
 
 class CreateTokenView(ObtainAuthToken):
@@ -21,15 +24,27 @@ class CreateTokenView(ObtainAuthToken):
     # ObtainToken uses username and password
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+    # ObtainAuthToken disables throttling, but every attempt hashes a password.
+    throttle_classes = api_settings.DEFAULT_THROTTLE_CLASSES
+    throttle_scope = "token"
 
 
-class ManageUserView(generics.RetrieveUpdateAPIView):
+class ManageUserView(generics.RetrieveUpdateDestroyAPIView):
     """Manage the authenticated user."""
 
     serializer_class = UserSerializer
-    authentication_classes = (authentication.TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (permissions.IsAuthenticated,)
 
     def get_object(self):
         """Retrieve and return the authenticated user."""
-        return self.request.user
+        if self.request.method in permissions.SAFE_METHODS:
+            return self.request.user
+        # The user may come from the token cache; don't save stale fields.
+        return get_user_model().objects.get(pk=self.request.user.pk)
+
+    def perform_destroy(self, instance):
+        """Deactivate the account, deleted later by purge_deleted."""
+        instance.is_active = False
+        instance.pending_deletion = True
+        instance.save(update_fields=["is_active", "pending_deletion"])
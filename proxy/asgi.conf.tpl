@@ -0,0 +1,67 @@
+# Pick the pre-generated schema file for /api/schema/ requests. Queries with
+# other parameters (lang, version) fall through to the app.
+map "$args|$http_accept" $schema_file {
+    default                    none;
+    "~^format=json\|"          openapi.json;
+    "~^format=yaml\|"          openapi.yaml;
+    "~^\|.*json"               openapi.json;
+    "~^\|"                     openapi.yaml;
+}
+
+server {
+    listen ${LISTEN_PORT};
+
+    location /static {
+        alias /vol/static;
+    }
+
+    # Metrics are only exposed to the private network (scrapers)
+    location = /metrics {
+        allow                 127.0.0.1;
+        allow                 10.0.0.0/8;
+        allow                 172.16.0.0/12;
+        allow                 192.168.0.0/16;
+        deny                  all;
+        proxy_pass            http://${APP_HOST}:${APP_PORT};
+        proxy_http_version    1.1;
+        proxy_set_header      Connection "";
+        proxy_set_header      Host $host;
+        proxy_set_header      X-Forwarded-For $proxy_add_x_forwarded_for;
+        proxy_set_header      X-Forwarded-Proto $scheme;
+    }
+
+    # Pre-generated OpenAPI schema, see scripts/run.sh
+    location = /api/schema/ {
+        root                  /vol/static/static/schema;
+        types {
+            application/vnd.oai.openapi  yaml;
+            application/json             json;
+        }
+        charset               utf-8;
+        charset_types         application/vnd.oai.openapi application/json;
+        gzip                  on;
+        gzip_types            application/vnd.oai.openapi application/json;
+        gzip_vary             on;
+        add_header            Cache-Control "public, max-age=86400";
+        try_files             /$schema_file @app;
+    }
+
+    location @app {
+        proxy_pass            http://${APP_HOST}:${APP_PORT};
+        proxy_http_version    1.1;
+        proxy_set_header      Connection "";
+        proxy_set_header      Host $host;
+        proxy_set_header      X-Forwarded-For $proxy_add_x_forwarded_for;
+        proxy_set_header      X-Forwarded-Proto $scheme;
+    }
+
+    location / {
+        proxy_pass            http://${APP_HOST}:${APP_PORT};
+        proxy_http_version    1.1;
+        proxy_set_header      Connection "";
+        proxy_set_header      Host $host;
+        proxy_set_header      X-Forwarded-For $proxy_add_x_forwarded_for;
+        proxy_set_header      X-Forwarded-Proto $scheme;
+        client_max_body_size  10M;
+    }
+}
\ No newline at end of file
@@ -1,3 +1,13 @@
+# Pick the pre-generated schema file for /api/schema/ requests. Queries with
+# other parameters (lang, version) fall through to the app.
+map "$args|$http_accept" $schema_file {
+    default                    none;
+    "~^format=json\|"          openapi.json;
+    "~^format=yaml\|"          openapi.yaml;
+    "~^\|.*json"               openapi.json;
+    "~^\|"                     openapi.yaml;
+}
+
 server {
     listen ${LISTEN_PORT};
 
@@ -5,6 +15,38 @@ server {
         alias /vol/static;
     }
 
+    # Metrics are only exposed to the private network (scrapers)
+    location = /metrics {
+        allow                 127.0.0.1;
+        allow                 10.0.0.0/8;
+        allow                 172.16.0.0/12;
+        allow                 192.168.0.0/16;
+        deny                  all;
+        uwsgi_pass            ${APP_HOST}:${APP_PORT};
+        include               /etc/nginx/uwsgi_params;
+    }
+
+    # Pre-generated OpenAPI schema, see scripts/run.sh
+    location = /api/schema/ {
+        root                  /vol/static/static/schema;
+        types {
+            application/vnd.oai.openapi  yaml;
+            application/json             json;
+        }
+        charset               utf-8;
+        charset_types         application/vnd.oai.openapi application/json;
+        gzip                  on;
+        gzip_types            application/vnd.oai.openapi application/json;
+        gzip_vary             on;
+        add_header            Cache-Control "public, max-age=86400";
+        try_files             /$schema_file @app;
+    }
+
+    location @app {
+        uwsgi_pass            ${APP_HOST}:${APP_PORT};
+        include               /etc/nginx/uwsgi_params;
+    }
+
     location / {
         uwsgi_pass            ${APP_HOST}:${APP_PORT};
         include               /etc/nginx/uwsgi_params;
@@ -2,5 +2,9 @@
 
 set -e
 
-envsubst < /etc/nginx/default.conf.tpl > /etc/nginx/conf.d/default.conf
+if [ "$SERVER_MODE" = "asgi" ]; then
+    envsubst '${LISTEN_PORT} ${APP_HOST} ${APP_PORT}' < /etc/nginx/asgi.conf.tpl > /etc/nginx/conf.d/default.conf
+else
+    envsubst '${LISTEN_PORT} ${APP_HOST} ${APP_PORT}' < /etc/nginx/default.conf.tpl > /etc/nginx/conf.d/default.conf
+fi
 nginx -g "daemon off;"
\ No newline at end of file
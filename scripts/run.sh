@@ -2,8 +2,24 @@
 
 set -e
 
-python manage.py wait_for_db
-python manage.py collectstatic --noinput
-python manage.py migrate
+# Waits for the database, then runs collectstatic and migrate only if static
+# files or migrations changed (FAST_START=0 always runs them), and writes the
+# OpenAPI schema the proxy serves. Logs the time spent in each phase.
+if [ "$FAST_START" = "0" ]; then
+    python manage.py startup --force --schema-dir /vol/web/static/schema
+else
+    python manage.py startup --schema-dir /vol/web/static/schema
+fi
 
-uwsgi --socket :9000 --workers 4 --master --enable-threads --module app.wsgi
\ No newline at end of file
+# Each worker writes its metrics here; /metrics aggregates across workers.
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus}
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
+if [ "$SERVER_MODE" = "asgi" ]; then
+    uvicorn app.asgi:application --host 0.0.0.0 --port 9000 --workers 4
+else
+    # The app (and its warm-up, see app/wsgi.py) is loaded in the master and
+    # shared copy-on-write by the forked workers; don't add --lazy-apps.
+    uwsgi --socket :9000 --workers 4 --master --enable-threads --module app.wsgi
+fi
\ No newline at end of file